@@ -0,0 +1,109 @@
+"""
+Processamento vetorizado dos sinais de telemetria.
+
+Reúne as derivadas numéricas usadas para estimar velocidades (diferenças
+atrasadas, centrais e em janela), suavização por Savitzky-Golay,
+reamostragem para uma base de tempo uniforme e métricas de erro de
+rastreamento entre o sinal desejado e o medido. Todas as funções trabalham
+sobre arrays (N,) ou (N, k) ao longo do eixo 0 e não fazem laços em Python
+sobre as amostras, então podem ser usadas fora da malha de controle sobre
+milhões de amostras.
+"""
+import numpy as np
+import math
+
+# Diferença entre cada amostra e a anterior. A primeira amostra é comparada
+# com initialValue no instante initialTime (por padrão, com ela mesma).
+# Amostras sem intervalo de tempo desde a anterior ficam com derivada zero
+def backwardDifference(values, time, initialValue=None, initialTime=0.):
+    values = np.asarray(values, dtype=float)
+    time = np.asarray(time, dtype=float)
+    initialValue = values[:1] if initialValue is None else np.asarray(initialValue, dtype=float)[None]
+    previous = np.concatenate([initialValue, values[:-1]])
+    dt = np.diff(time, prepend=initialTime).reshape((-1,) + (1,) * (values.ndim - 1))
+    return np.divide(values - previous, dt, out=np.zeros_like(values), where=dt > 0)
+
+# Diferença central (segunda ordem) com amostragem não uniforme. Amostras
+# com o mesmo instante (no modo sincronizado duas leituras podem cair no mesmo
+# passo de simulação) contam uma vez e recebem a derivada desse instante
+def centralDifference(values, time):
+    values = np.asarray(values, dtype=float)
+    time = np.asarray(time, dtype=float)
+    unique, first, inverse = np.unique(time, return_index=True, return_inverse=True)
+    if len(unique) == len(time):
+        return np.gradient(values, time, axis=0)
+    if len(unique) < 2:
+        return np.zeros_like(values)
+    return np.gradient(values[first], unique, axis=0)[inverse]
+
+# Diferença entre amostras separadas por window posições. Retorna os instantes
+# centrais de cada janela e a derivada estimada
+def windowedDifference(values, time, window):
+    values = np.asarray(values, dtype=float)
+    time = np.asarray(time, dtype=float)
+    dt = time[window:] - time[:-window]
+    derivative = (values[window:] - values[:-window]) / dt.reshape((-1,) + (1,) * (values.ndim - 1))
+    centers = (time[window:] + time[:-window]) / 2
+    return centers, derivative
+
+# Reamostra o sinal numa base de tempo uniforme com passo dt por interpolação linear
+def resample(time, values, dt):
+    time = np.asarray(time, dtype=float)
+    values = np.asarray(values, dtype=float)
+    uniformTime = np.arange(time[0], time[-1] + dt / 2, dt)
+    if values.ndim == 1:
+        return uniformTime, np.interp(uniformTime, time, values)
+    flat = values.reshape(len(values), -1)
+    resampled = np.column_stack([np.interp(uniformTime, time, column) for column in flat.T])
+    return uniformTime, resampled.reshape((len(uniformTime),) + values.shape[1:])
+
+# Filtro de Savitzky-Golay para sinais com amostragem uniforme (passo delta).
+# Ajusta um polinômio de grau order em cada janela de window amostras (ímpar)
+# e retorna o valor ou a derivada de ordem deriv no centro da janela. Nas
+# bordas usa o polinômio ajustado à primeira e à última janela
+def savitzkyGolay(values, window, order, deriv=0, delta=1.0):
+    values = np.asarray(values, dtype=float)
+    if window % 2 == 0 or window <= order:
+        raise ValueError("window deve ser ímpar e maior que order")
+    if len(values) < window:
+        raise ValueError("Sinal menor que a janela do filtro")
+    half = window // 2
+    offsets = np.arange(-half, half + 1)
+    fit = np.linalg.pinv(np.vander(offsets, order + 1, increasing=True))
+
+    # Derivada de ordem deriv do polinômio avaliada nas posições x
+    def derivativeMatrix(x):
+        matrix = np.zeros((len(x), order + 1))
+        for power in range(deriv, order + 1):
+            matrix[:, power] = math.factorial(power) / math.factorial(power - deriv) * x**(power - deriv)
+        return matrix
+
+    scale = delta**deriv
+    kernel = derivativeMatrix(np.zeros(1))[0] @ fit
+    windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=0)
+    result = np.empty_like(values)
+    result[half:len(values) - half] = windows @ kernel / scale
+
+    edge = derivativeMatrix(offsets[:half].astype(float))
+    result[:half] = edge @ np.tensordot(fit, values[:window], axes=(1, 0)) / scale
+    edge = derivativeMatrix(offsets[half + 1:].astype(float))
+    result[len(values) - half:] = edge @ np.tensordot(fit, values[-window:], axes=(1, 0)) / scale
+    return result
+
+# Erro entre o sinal desejado e o medido. O desejado é interpolado nos
+# instantes das medidas. Métricas por eixo: média, RMS e máximo absoluto
+def trackingError(desiredTime, desired, measuredTime, measured):
+    desired = np.asarray(desired, dtype=float)
+    measured = np.asarray(measured, dtype=float)
+    measuredTime = np.asarray(measuredTime, dtype=float)
+    desiredTime = np.asarray(desiredTime, dtype=float)
+    if desired.ndim == 1:
+        reference = np.interp(measuredTime, desiredTime, desired)
+    else:
+        reference = np.column_stack([np.interp(measuredTime, desiredTime, column)
+                                     for column in desired.T])
+    error = measured - reference
+    return {'error': error,
+            'mean': np.mean(error, axis=0),
+            'rms': np.sqrt(np.mean(error**2, axis=0)),
+            'maxAbs': np.max(np.abs(error), axis=0)}
@@ -0,0 +1,114 @@
+"""
+Interface assíncrona (asyncio) para CylindricRobot.
+
+Todas as chamadas ao simulador rodam numa única thread dedicada de I/O
+(o cliente ZMQ não pode ser usado por várias threads), então o event loop
+nunca fica bloqueado. A execução de trajetórias é um gerador assíncrono que
+entrega uma amostra de telemetria por ciclo:
+
+    async for sample in robot.execute(plan):
+        ...
+
+Cancelar a tarefa ou estourar o tempo limite para o robô com segurança:
+o alvo de cada junta passa a ser a posição atual lida do simulador.
+"""
+import asyncio
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from robot import CylindricRobot
+from realtime import SimulationClock, DEFAULT_CONTROL_RATE
+from trajectory import planCartesianTrajectory
+from profiles import BANG_BANG
+from timing import minimumCartesianDuration
+from validation import enforcePlanLimits
+
+TelemetrySample = namedtuple('TelemetrySample', ['time', 'scheduled', 'tipPos', 'jointPos'])
+
+class AsyncCylindricRobot(object):
+    def __init__(self, robot: CylindricRobot):
+        self.robot = robot
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="robot-io")
+
+    # Executa uma função na thread de I/O sem bloquear o event loop
+    async def run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def getCurrentPosition(self):
+        return await self.run(self.robot.getCurrentPosition)
+
+    async def getCurrentJointPostions(self):
+        return await self.run(self.robot.getCurrentJointPostions)
+
+    async def jointMove(self, theta, d2, d3):
+        await self.run(self.robot.jointMove, theta, d2, d3)
+
+    async def cartesianMove(self, x, y, z):
+        await self.run(self.robot.cartesianMove, x, y, z)
+
+    async def cartesianTrajectoryMove(self, x, y, z, duration=None, profile=BANG_BANG):
+        await self.run(self.robot.cartesianTrajectoryMove, x, y, z, duration, profile)
+
+    # Para o robô na posição atual
+    async def stop(self):
+        joints = await self.run(self.robot.getCurrentJointPostions)
+        await self.run(self.robot.sendJoints, *joints)
+
+    async def plan(self, target, duration=None, profile=BANG_BANG, controlRate=DEFAULT_CONTROL_RATE):
+        initialPos = await self.getCurrentPosition()
+        if duration is None:
+            duration = minimumCartesianDuration(self.robot, initialPos, target, profile)
+        return planCartesianTrajectory(self.robot, initialPos, target, duration, controlRate, profile)
+
+    # Executa o plano e entrega uma TelemetrySample por ciclo. Se timeout (s)
+    # for informado e a execução passar dele, o robô é parado e TimeoutError
+    # é lançado. Se a tarefa for cancelada, o robô também é parado. O plano é
+    # validado (robot.limitPolicy) antes do primeiro envio
+    async def execute(self, plan, timeout=None):
+        loop = asyncio.get_running_loop()
+        robot = self.robot
+        plan = enforcePlanLimits(robot, plan, robot.limitPolicy)
+        clock = None
+        if robot.stepping:
+            clock = SimulationClock(robot.sim)
+            await self.run(clock.start)
+        start = loop.time()
+
+        finished = False
+        try:
+            for tick in range(len(plan)):
+                scheduled = plan.times[tick]
+                if timeout is not None and scheduled > timeout:
+                    raise TimeoutError("Execução excedeu " + str(timeout) + " s")
+                if clock is not None:
+                    now = await self.run(clock.waitUntil, scheduled)
+                else:
+                    await asyncio.sleep(max(0., start + scheduled - loop.time()))
+                    now = loop.time() - start
+                if timeout is not None and now > timeout:
+                    raise TimeoutError("Execução excedeu " + str(timeout) + " s")
+                tipPos, jointPos = await self.run(robot.io.exchange, plan.joints[tick])
+                yield TelemetrySample(now, scheduled, tipPos, jointPos)
+            finished = True
+        finally:
+            if not finished:
+                # Cancelamento, tempo limite ou consumidor interrompido
+                await asyncio.shield(self.stop())
+
+    # Executa o plano até o fim e retorna todas as amostras
+    async def executeAll(self, plan, timeout=None):
+        return [sample async for sample in self.execute(plan, timeout)]
+
+    async def executeCartesianTrajectory(self, target, duration=None, profile=BANG_BANG,
+                                         controlRate=DEFAULT_CONTROL_RATE, timeout=None):
+        plan = await self.plan(target, duration, profile, controlRate)
+        return await self.executeAll(plan, timeout)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    # Espera a thread de I/O terminar sem bloquear o event loop
+    async def __aexit__(self, *exc):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
@@ -0,0 +1,208 @@
+"""
+Troca de dados com o CoppeliaSim em uma única chamada por ciclo de controle.
+
+Cada chamada da API remota (setJointTargetPosition, getObjectPosition,
+getJointPosition, ...) é uma ida e volta pelo ZMQ. Para reduzir o custo por
+ciclo, um script de customização com a função exchange é instalado na cena:
+ele recebe os alvos de todas as juntas e devolve a posição da ponta e das
+juntas de uma só vez (sim.callScriptFunction). Com vários robôs na mesma
+cena, exchangeMany faz o mesmo para todos eles em uma única chamada. Logo
+após a instalação uma leitura (readState) confirma que as funções podem ser
+chamadas. Se a instalação ou essa leitura falhar (versão antiga do
+CoppeliaSim, script não inicializado ou outro backend), o script é removido
+e as chamadas individuais são usadas, continuando a ser contabilizadas.
+close() remove o script da cena.
+"""
+import numpy as np
+import logging
+from time import perf_counter
+
+logger = logging.getLogger(__name__)
+
+EXCHANGE_SCRIPT = '''
+-- Em versões recentes do CoppeliaSim o módulo sim precisa ser carregado
+if sim == nil then
+    sim = require('sim')
+end
+
+function exchange(motors, targets, tip, teleport)
+    for i = 1, #motors do
+        if teleport then
+            sim.setJointPosition(motors[i], targets[i])
+        else
+            sim.setJointTargetPosition(motors[i], targets[i])
+        end
+    end
+    return readState(motors, tip)
+end
+
+function exchangeMany(motorsList, targetsList, tips, teleports)
+    local tipsPos, jointsList = {}, {}
+    for r = 1, #motorsList do
+        tipsPos[r], jointsList[r] = exchange(motorsList[r], targetsList[r], tips[r], teleports[r])
+    end
+    return tipsPos, jointsList
+end
+
+function readState(motors, tip)
+    local joints = {}
+    for i = 1, #motors do
+        joints[i] = sim.getJointPosition(motors[i])
+    end
+    return sim.getObjectPosition(tip, sim.handle_world), joints
+end
+'''
+
+# Quantidade de ciclos mantidos para as estatísticas de latência
+LATENCY_HISTORY = 4096
+
+# Instala o script com as funções de troca e confirma com uma leitura das
+# juntas motors e da ponta tip que elas podem ser chamadas. Retorna o handle
+# do script, ou None para usar as chamadas individuais
+def installExchangeScript(sim, motors, tip):
+    try:
+        script = sim.createScript(sim.scripttype_customization, EXCHANGE_SCRIPT)
+    except Exception as error:
+        logger.info("Batched I/O unavailable, using individual calls: %s", error)
+        return None
+    try:
+        sim.callScriptFunction('readState', script, motors, tip)
+    except Exception as error:
+        logger.info("Exchange script not callable, using individual calls: %s", error)
+        removeExchangeScript(sim, script)
+        return None
+    return script
+
+# Remove o script da cena. Versões recentes removem scripts como objetos
+def removeExchangeScript(sim, script):
+    try:
+        sim.removeScript(script)
+    except Exception:
+        try:
+            sim.removeObjects([script])
+        except Exception as error:
+            logger.warning("Could not remove exchange script %s: %s", script, error)
+
+class BatchedIO(object):
+    def __init__(self, robot, install=True):
+        self.robot = robot
+        self.sim = robot.sim
+        self.script = installExchangeScript(self.sim, robot.motors, robot.tip) if install else None
+        self.latency = np.zeros(LATENCY_HISTORY)
+        self.resetStats()
+
+    @property
+    def batched(self):
+        return self.script is not None
+
+    # Remove o script da cena; as próximas trocas usam chamadas individuais
+    def close(self):
+        if self.script is not None:
+            removeExchangeScript(self.sim, self.script)
+            self.script = None
+
+    # Instala o script de novo depois de uma reconexão. Se o simulador não
+    # foi reiniciado, o script anterior ainda existe e é removido antes
+    def reinstall(self):
+        self.close()
+        self.script = installExchangeScript(self.sim, self.robot.motors, self.robot.tip)
+
+    def resetStats(self):
+        self.ticks = 0
+        self.roundTrips = 0
+
+    def record(self, start, roundTrips):
+        self.latency[self.ticks % LATENCY_HISTORY] = perf_counter() - start
+        self.ticks += 1
+        self.roundTrips += roundTrips
+
+    # Envia os alvos das juntas e lê a posição da ponta e das juntas
+    def exchange(self, joints):
+        start = perf_counter()
+        robot = self.robot
+        if self.batched:
+            tipPos, jointPos = self.sim.callScriptFunction(
+                'exchange', self.script, robot.motors, [float(joint) for joint in joints],
+                robot.tip, robot.teleport)
+            self.record(start, 1)
+        else:
+            robot.sendJoints(*joints)
+            tipPos = robot.getCurrentPosition()
+            jointPos = robot.getCurrentJointPostions()
+            self.record(start, 2 * robot.jointNumber + 1)
+        return tipPos, jointPos
+
+    # Como exchange, mas grava a leitura nos buffers de state
+    # (geometry.JointState) em vez de retornar listas novas. targets é uma
+    # lista de floats, convertida antes da execução
+    def exchangeInto(self, targets, state):
+        start = perf_counter()
+        robot = self.robot
+        if self.batched:
+            tipPos, jointPos = self.sim.callScriptFunction(
+                'exchange', self.script, robot.motors, targets, robot.tip, robot.teleport)
+            state.tip[:] = tipPos
+            state.joints[:] = jointPos
+            self.record(start, 1)
+        else:
+            robot.sendJoints(*targets)
+            state.tip[:] = robot.getCurrentPosition()
+            robot.readJoints(state.joints)
+            self.record(start, 2 * robot.jointNumber + 1)
+        return state
+
+    # Lê a posição da ponta e das juntas sem enviar alvos
+    def readState(self):
+        start = perf_counter()
+        robot = self.robot
+        if self.batched:
+            tipPos, jointPos = self.sim.callScriptFunction(
+                'readState', self.script, robot.motors, robot.tip)
+            self.record(start, 1)
+        else:
+            tipPos = robot.getCurrentPosition()
+            jointPos = robot.getCurrentJointPostions()
+            self.record(start, robot.jointNumber + 1)
+        return tipPos, jointPos
+
+    # Idas e voltas por ciclo e latência dos ciclos mais recentes, em segundos
+    def stats(self):
+        stats = {'batched': self.batched, 'ticks': self.ticks, 'roundTrips': self.roundTrips}
+        if self.ticks == 0:
+            return stats
+        latency = self.latency[:min(self.ticks, LATENCY_HISTORY)]
+        stats.update({'roundTripsPerTick': self.roundTrips / self.ticks,
+                      'latencyMean': float(np.mean(latency)),
+                      'latencyP50': float(np.percentile(latency, 50)),
+                      'latencyP99': float(np.percentile(latency, 99)),
+                      'latencyMax': float(np.max(latency))})
+        return stats
+
+# Troca de dados de vários robôs da mesma cena numa única chamada por ciclo
+class FleetIO(BatchedIO):
+    def __init__(self, robots, install=True):
+        self.robots = robots
+        super().__init__(robots[0], install)
+
+    # Envia os alvos dos robôs em indices (uma linha de joints por robô) e
+    # retorna as posições das pontas e das juntas desses robôs
+    def exchangeMany(self, indices, joints):
+        start = perf_counter()
+        robots = [self.robots[index] for index in indices]
+        if self.batched:
+            tipsPos, jointsList = self.sim.callScriptFunction(
+                'exchangeMany', self.script,
+                [robot.motors for robot in robots],
+                [[float(joint) for joint in row] for row in joints],
+                [robot.tip for robot in robots],
+                [robot.teleport for robot in robots])
+            self.record(start, 1)
+        else:
+            tipsPos = []
+            jointsList = []
+            for robot, row in zip(robots, joints):
+                robot.sendJoints(*row)
+                tipsPos.append(robot.getCurrentPosition())
+                jointsList.append(robot.getCurrentJointPostions())
+            self.record(start, len(robots) * (2 * self.robot.jointNumber + 1))
+        return tipsPos, jointsList
@@ -0,0 +1,326 @@
+"""
+Benchmarks da cinemática e das trajetórias do robô cilíndrico.
+
+Cada caso é executado várias vezes (rodadas) e o resultado registra a vazão
+(itens por segundo, pela mediana das rodadas), os percentis da latência de
+cada chamada e o pico de memória alocada em uma rodada (tracemalloc). A
+latência vem de chamadas cronometradas uma a uma: um item nos casos
+escalares, um sub-lote de SUB_BATCH linhas nos vetorizados e o caso inteiro
+(uma rodada) quando não há chamada menor, como no plano e na execução
+completa. A coluna itens/cham. indica quantos itens cada chamada processa. O simulador é
+o OfflineSim em modo sincronizado, então os resultados não dependem do
+CoppeliaSim e são reprodutíveis.
+
+Uso:
+    python benchmarks.py                  # executa e compara com a referência
+    python benchmarks.py --save           # executa e grava a referência
+    python benchmarks.py --only ik fk     # apenas os casos com esses nomes
+    python benchmarks.py --quick          # menos rodadas e cargas menores
+
+A referência é gravada em JSON (BASELINE_PATH). Um caso é marcado como
+regressão quando a vazão cai mais que a tolerância (padrão 20%) em relação à
+referência; nesse caso o programa termina com código 1. Referências gravadas
+com --quick só são comparadas com execuções --quick, e vice-versa.
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import math
+import os
+import platform
+import itertools
+import tracemalloc
+from time import perf_counter, perf_counter_ns
+import numpy as np
+
+from robot import CylindricRobot
+from offline_sim import OfflineSim
+from generate_workspace import generateWorkspace, DEFAULT_RESOLUTION
+from trajectory import planCartesianTrajectory
+from profiles import BANG_BANG
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+DEFAULT_TOLERANCE = 0.2
+SEED = 0
+# Chamadas cronometradas uma a uma para os percentis de latência: no máximo
+# LATENCY_SAMPLES, até LATENCY_BUDGET segundos, com pelo menos MIN_LATENCY_SAMPLES
+LATENCY_SAMPLES = 10000
+LATENCY_BUDGET = 1.0 # s
+MIN_LATENCY_SAMPLES = 100
+SUB_BATCH = 1000 # Linhas por chamada nos casos vetorizados
+
+# Implementação anterior da cinemática inversa, mantida como referência.
+# Formulação com duas raízes e escolha pela primeira com d3 >= 0
+def legacyIk(robot, x, y, z):
+    x2 = x**2
+    y2 = y**2
+    y4 = y**4
+    a2 = robot.a2
+    a2_2 = robot.a2**2
+    d = x**2 + y**2
+    denSqrtTerm = math.sqrt(x2*y2 + y4 - y2*a2_2)
+    numSqrtTerm = math.sqrt(-y2 * (-x2 - y2 + a2_2))
+    root1DenTerm = (x * a2 - denSqrtTerm) / d
+    root1NumTerm = ((x * numSqrtTerm / d) - (x2 * a2 / d) + a2) / y
+    root2DenTerm = (x * a2 + denSqrtTerm) / d
+    root2NumTerm = (-(x * numSqrtTerm / d) - (x2 * a2 / d) + a2) / y
+    thetaList = [math.atan2(root1NumTerm, root1DenTerm),
+                 math.atan2(root2NumTerm, root2DenTerm)]
+    d2 = z - robot.d1 + robot.a3
+    d3List = []
+    for angle in thetaList:
+        d3List.append(y * math.cos(angle) - x * math.sin(angle) - robot.df)
+    if d3List[0] >= 0:
+        return [thetaList[0], d2, d3List[0]]
+    elif d3List[1] >= 0:
+        return [thetaList[1], d2, d3List[1]]
+    raise ValueError("Falhou em calcular ik")
+
+# Configurações das juntas sorteadas dentro dos limites (N, 3)
+def randomJoints(robot, count):
+    rng = np.random.default_rng(SEED)
+    return rng.uniform(robot.geometry.lo, robot.geometry.hi, size=(count, robot.jointNumber))
+
+# Cronometra call (sem argumentos) uma chamada por vez. Retorna as latências em s
+def sampleLatency(call, samples=LATENCY_SAMPLES, budget=LATENCY_BUDGET):
+    latency = np.empty(samples)
+    deadline = perf_counter() + budget
+    for count in range(samples):
+        start = perf_counter_ns()
+        call()
+        latency[count] = perf_counter_ns() - start
+        if count + 1 >= MIN_LATENCY_SAMPLES and perf_counter() > deadline:
+            return latency[:count + 1] * 1e-9
+    return latency * 1e-9
+
+# Função sem argumentos que a cada chamada aplica function ao próximo item
+# (tupla de argumentos) de items, em ciclo
+def cycleCalls(function, items):
+    arguments = itertools.cycle(items)
+    return lambda: function(*next(arguments))
+
+# Executa function (que processa items itens) em rounds rodadas, mais uma
+# rodada com tracemalloc para medir o pico de memória. Os percentis de
+# latência são de call (que processa callItems itens por chamada); sem call,
+# a chamada é a rodada inteira
+def measure(function, items, rounds, call=None, callItems=None):
+    function() # Aquecimento
+    times = np.empty(rounds)
+    for index in range(rounds):
+        start = perf_counter()
+        function()
+        times[index] = perf_counter() - start
+    if call is None:
+        latency = times
+        callItems = items
+    else:
+        latency = sampleLatency(call)
+
+    tracemalloc.start()
+    try:
+        function()
+        __, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'items': items,
+            'rounds': rounds,
+            'throughput': items / float(np.median(times)),
+            'callItems': callItems,
+            'latencySamples': len(latency),
+            'latencyP50': float(np.percentile(latency, 50)),
+            'latencyP90': float(np.percentile(latency, 90)),
+            'latencyP99': float(np.percentile(latency, 99)),
+            'peakMemory': int(peak)}
+
+# Casos do benchmark: nome -> (função sem argumentos, itens por rodada,
+# chamada cronometrada para a latência ou None, itens por chamada)
+def buildCases(quick=False):
+    scale = 10 if quick else 1
+    sim = OfflineSim()
+    sim.startSimulation()
+    robot = CylindricRobot("/P0_ST", sim)
+
+    scalarCount = 20000 // scale
+    batchCount = 200000 // scale
+    scalarJoints = randomJoints(robot, scalarCount).tolist()
+    scalarPoints = robot.fkBatch(np.array(scalarJoints)).tolist()
+    batchJoints = randomJoints(robot, batchCount)
+    batchPoints = robot.fkBatch(batchJoints)
+    # Fórmula antiga divide por y: evita pontos com y == 0
+    legacyPoints = [point for point in scalarPoints if point[1] != 0]
+
+    def fkScalar():
+        for theta, d2, d3 in scalarJoints:
+            robot.fk(theta, d2, d3)
+
+    def ikScalar():
+        for x, y, z in scalarPoints:
+            robot.ik(x, y, z)
+
+    def ikLegacy():
+        for x, y, z in legacyPoints:
+            legacyIk(robot, x, y, z)
+
+    # Poucos alvos repetidos, como os pontos de pega e entrega da célula. Com
+    # as formas fechadas a consulta ao cache custa mais que o cálculo
+    cached = CylindricRobot("/P0_ST", sim)
+    cached.enableKinematicsCache()
+    repeatedJoints = scalarJoints[:20] * (scalarCount // 20)
+    repeatedPoints = scalarPoints[:20] * (scalarCount // 20)
+
+    def fkCached():
+        for theta, d2, d3 in repeatedJoints:
+            cached.fk(theta, d2, d3)
+
+    def ikCached():
+        for x, y, z in repeatedPoints:
+            cached.ik(x, y, z)
+
+    subJoints = batchJoints[:SUB_BATCH]
+    subPoints = batchPoints[:SUB_BATCH]
+    cases = {
+        'fk': (fkScalar, scalarCount, cycleCalls(robot.fk, scalarJoints), 1),
+        'ik': (ikScalar, scalarCount, cycleCalls(robot.ik, scalarPoints), 1),
+        'ikLegacy': (ikLegacy, len(legacyPoints),
+                     cycleCalls(lambda x, y, z: legacyIk(robot, x, y, z), legacyPoints), 1),
+        'fkCached': (fkCached, len(repeatedJoints), cycleCalls(cached.fk, repeatedJoints), 1),
+        'ikCached': (ikCached, len(repeatedPoints), cycleCalls(cached.ik, repeatedPoints), 1),
+        'fkBatch': (lambda: robot.fkBatch(batchJoints), batchCount,
+                    lambda: robot.fkBatch(subJoints), len(subJoints)),
+        'ikBatch': (lambda: robot.ikBatch(batchPoints), batchCount,
+                    lambda: robot.ikBatch(subPoints), len(subPoints)),
+    }
+
+    # Varredura do espaço de trabalho com passos 1x, 1/2 e 1/4 do padrão
+    for divisor in (1, 2, 4) if not quick else (1, 2):
+        resolution = tuple(step / divisor for step in DEFAULT_RESOLUTION)
+        size = len(generateWorkspace(robot, resolution))
+        cases['workspace/' + str(divisor)] = (
+            lambda resolution=resolution: generateWorkspace(robot, resolution), size, None, None)
+
+    # Plano bang-bang da trajetória do exercício a 500 Hz
+    start = [-0.75, -0.25, 0.75]
+    target = [-0.25, 0.75, 1.75]
+    plan = planCartesianTrajectory(robot, start, target, 13.0, 500., BANG_BANG)
+    cases['planBangBang'] = (
+        lambda: planCartesianTrajectory(robot, start, target, 13.0, 500., BANG_BANG), len(plan), None, None)
+
+    current = [0.3, 0.2, 0.1]
+    goal = [-1.2, 1.1, 0.9]
+    paramsCount = 20000 // scale
+
+    def executionParams():
+        for __ in range(paramsCount):
+            robot.calculateExecutionParams(goal, current, 4.0)
+    cases['calculateExecutionParams'] = (
+        executionParams, paramsCount, lambda: robot.calculateExecutionParams(goal, current, 4.0), 1)
+
+    # Trajetória completa em modo sincronizado: planejamento, troca de dados com
+    # o simulador a cada ciclo e montagem dos resultados
+    runner = CylindricRobot("/P0_ST", sim, stepping=True)
+    controlRate = 200.
+    # Duração mínima dentro dos limites das juntas é de ~4 s
+    duration = 4.0 if quick else 13.0
+
+    def fullRun():
+        runner.teleport = True
+        runner.sendJoints(*runner.ik(*start))
+        runner.teleport = False
+        runner.executeCartesianTrajectory(target, duration, BANG_BANG, controlRate)
+    cases['fullRun'] = (fullRun, int(duration * controlRate), None, None)
+    return cases
+
+# Compara com a referência: casos com vazão menor que (1 - tolerance) vezes
+# a vazão de referência são regressões. As cargas de --quick são outras, então
+# a referência precisa ter sido gravada no mesmo modo
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE, quick=False):
+    if bool(baseline.get('quick', False)) != quick:
+        mode = "com" if baseline.get('quick') else "sem"
+        raise ValueError("Referência gravada %s --quick: execute %s --quick ou grave outra referência"
+                         % (mode, mode))
+    report = {}
+    for name, result in results.items():
+        reference = baseline.get('results', {}).get(name)
+        if reference is None:
+            continue
+        ratio = result['throughput'] / reference['throughput']
+        report[name] = {'ratio': ratio, 'regression': ratio < 1 - tolerance}
+    return report
+
+def environment():
+    return {'python': platform.python_version(), 'numpy': np.__version__,
+            'machine': platform.machine(), 'processor': platform.processor()}
+
+def run(names=None, quick=False, rounds=None):
+    cases = buildCases(quick)
+    rounds = rounds or (5 if quick else 15)
+    results = {}
+    for name, (function, items, call, callItems) in cases.items():
+        if names and not any(name == pattern or name.startswith(pattern + "/") for pattern in names):
+            continue
+        # O caso completo faz menos rodadas: cada uma percorre toda a trajetória
+        caseRounds = max(5, rounds // 3) if name == "fullRun" or name.startswith("workspace") else rounds
+        results[name] = measure(function, items, caseRounds, call, callItems)
+    return results
+
+def formatTable(results, report=None):
+    lines = ["%-26s %14s %11s %12s %12s %12s %12s %9s" % ("caso", "itens/s", "itens/cham.", "p50 (µs)",
+                                                         "p90 (µs)", "p99 (µs)", "pico (KiB)", "vs ref")]
+    for name, result in results.items():
+        comparison = ""
+        if report and name in report:
+            comparison = "%.2fx" % report[name]['ratio']
+            if report[name]['regression']:
+                comparison += " !"
+        lines.append("%-26s %14.0f %11d %12.3f %12.3f %12.3f %12.1f %9s" % (
+            name, result['throughput'], result['callItems'], result['latencyP50'] * 1e6,
+            result['latencyP90'] * 1e6,
+            result['latencyP99'] * 1e6, result['peakMemory'] / 1024, comparison))
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do robô cilíndrico")
+    parser.add_argument("--only", nargs="+", help="Executa apenas os casos informados")
+    parser.add_argument("--quick", action="store_true", help="Cargas menores e menos rodadas")
+    parser.add_argument("--rounds", type=int, help="Rodadas por caso")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Arquivo JSON de referência")
+    parser.add_argument("--save", action="store_true", help="Grava os resultados como referência")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Queda de vazão tolerada (fração)")
+    args = parser.parse_args()
+
+    # As mensagens do robô e do OfflineSim não entram na medição
+    logging.disable(logging.INFO)
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = run(args.only, args.quick, args.rounds)
+
+    report = None
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        try:
+            report = compare(results, baseline, args.tolerance, args.quick)
+        except ValueError as error:
+            print(formatTable(results))
+            print(error)
+            return 2
+    print(formatTable(results, report))
+
+    if args.save:
+        with open(args.baseline, 'w') as file:
+            json.dump({'environment': environment(), 'quick': args.quick, 'results': results},
+                      file, indent=2)
+        print("Referência salva em", args.baseline)
+        return 0
+
+    regressions = [name for name, item in (report or {}).items() if item['regression']]
+    if regressions:
+        print("Regressões:", ", ".join(regressions))
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
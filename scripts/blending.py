@@ -0,0 +1,149 @@
+"""
+Trajetórias por vários pontos sem parar em cada um (segmentos lineares com
+concordâncias parabólicas).
+
+Entre dois pontos consecutivos a velocidade é constante. Perto de cada ponto
+intermediário a velocidade passa de um segmento para o seguinte com
+aceleração constante, durante o tempo de concordância tb, então a velocidade
+é contínua e o robô não para: a trajetória passa perto do ponto (corta o
+canto) em vez de exatamente por ele. No primeiro e no último ponto a
+concordância parte do repouso e termina no repouso.
+
+A velocidade é a soma de rampas, uma por ponto, cada uma limitada ao seu
+intervalo de concordância, e a posição é a integral dessas rampas. Com isso o
+perfil inteiro é avaliado de uma vez como um produto de matrizes
+(instantes x pontos), sem laços por amostra.
+"""
+import numpy as np
+from realtime import buildSchedule, DEFAULT_CONTROL_RATE
+from trajectory import TrajectoryPlan
+from validation import validateTrajectory
+from geometry import thetaStopCrossings
+
+# Duração mínima de um segmento, evita divisão por zero com pontos repetidos
+MIN_SEGMENT_DURATION = 1e-6
+# Iterações do ajuste das durações para que as concordâncias não se sobreponham
+TIMING_ITERATIONS = 100
+
+# Velocidades de cada segmento, com repouso antes do primeiro ponto e depois
+# do último: (n + 2, d) para n segmentos
+def segmentVelocities(waypoints, durations):
+    deltas = np.diff(waypoints, axis=0)
+    rest = np.zeros((1, waypoints.shape[1]))
+    return np.vstack([rest, deltas / durations[:, None], rest])
+
+# Durações dos segmentos e das concordâncias que respeitam os limites de
+# velocidade e aceleração de cada coordenada. Cada segmento começa com a
+# duração mínima pela velocidade e é alongado enquanto as concordâncias das
+# suas pontas não couberem nele
+def blendTiming(waypoints, velLimits, accLimits, iterations=TIMING_ITERATIONS):
+    waypoints = np.asarray(waypoints, dtype=float)
+    velLimits = np.asarray(velLimits, dtype=float)
+    accLimits = np.asarray(accLimits, dtype=float)
+    deltas = np.abs(np.diff(waypoints, axis=0))
+    durations = np.maximum(np.max(deltas / velLimits, axis=1), MIN_SEGMENT_DURATION)
+    for __ in range(iterations):
+        velocityChange = np.abs(np.diff(segmentVelocities(waypoints, durations), axis=0))
+        blends = np.max(velocityChange / accLimits, axis=1)
+        # Fração do segmento ocupada pelas concordâncias das duas pontas
+        ratio = (blends[:-1] + blends[1:]) / (2 * durations)
+        if np.all(ratio <= 1 + 1e-9):
+            break
+        # A concordância diminui com 1/T e o segmento cresce com T
+        durations *= np.sqrt(np.maximum(ratio, 1.))
+    velocityChange = np.abs(np.diff(segmentVelocities(waypoints, durations), axis=0))
+    return durations, np.max(velocityChange / accLimits, axis=1)
+
+# Instantes em que o robô passa por cada ponto (centro de cada concordância)
+def blendCenters(durations, blends):
+    return blends[0] / 2 + np.concatenate([[0.], np.cumsum(durations)])
+
+def blendDuration(durations, blends):
+    return float(blendCenters(durations, blends)[-1] + blends[-1] / 2)
+
+# Posição, velocidade e aceleração (M, d) nos instantes informados
+def evaluateBlend(waypoints, durations, blends, times):
+    waypoints = np.asarray(waypoints, dtype=float)
+    velocityChange = np.diff(segmentVelocities(waypoints, durations), axis=0)
+    centers = blendCenters(durations, blends)
+    # Tempo desde o início de cada concordância (M, n + 1)
+    tau = np.asarray(times, dtype=float)[:, None] - centers + blends / 2
+    safeBlends = np.where(blends > 0, blends, 1.)
+    inBlend = (tau >= 0) & (tau < blends)
+    ramp = np.where(tau >= blends, 1., np.where(inBlend, tau / safeBlends, 0.))
+    area = np.where(tau >= blends, tau - blends / 2,
+                    np.where(inBlend, tau**2 / (2 * safeBlends), 0.))
+    position = waypoints[0] + area @ velocityChange
+    velocity = ramp @ velocityChange
+    acceleration = np.where(inBlend, 1. / safeBlends, 0.) @ velocityChange
+    return position, velocity, acceleration
+
+# Avalia a trajetória nos instantes de envio. Com duration maior que a
+# mínima, o tempo é esticado uniformemente (velocidade / k, aceleração / k²)
+def sampleBlend(waypoints, velLimits, accLimits, duration=None, controlRate=DEFAULT_CONTROL_RATE):
+    durations, blends = blendTiming(waypoints, velLimits, accLimits)
+    minimum = blendDuration(durations, blends)
+    if duration is None:
+        duration = minimum
+    scale = duration / minimum
+    # Limites das concordâncias também são instantes de envio
+    centers = blendCenters(durations, blends)
+    events = np.concatenate([centers - blends / 2, centers + blends / 2]) * scale
+    times = buildSchedule(duration, controlRate, events)
+    position, velocity, __ = evaluateBlend(waypoints, durations, blends, times / scale)
+    return times, position, velocity / scale, duration
+
+# Trajetória por várias configurações de juntas (K, 3), concordada em espaço
+# de juntas dentro de robot.velLimits e robot.accLimits. A junta de rotação
+# tem fim de curso em ±180°, então theta vai direto de um ponto ao outro sem
+# tomar o menor ângulo; as concordâncias ficam entre os segmentos vizinhos,
+# dentro dos limites
+def planBlendedJointTrajectory(robot, jointWaypoints, duration=None,
+                               controlRate=DEFAULT_CONTROL_RATE):
+    jointWaypoints = np.asarray(jointWaypoints, dtype=float)
+    times, joints, jointVel, duration = sampleBlend(jointWaypoints, robot.velLimits,
+                                                    robot.accLimits, duration, controlRate)
+    cartesian = robot.fkBatch(joints)
+
+    # Velocidade cartesiana pela derivada da cinemática direta
+    desiredVel = np.empty_like(cartesian)
+    desiredVel[:, 0] = -cartesian[:, 1] * jointVel[:, 0] - np.sin(joints[:, 0]) * jointVel[:, 2]
+    desiredVel[:, 1] = cartesian[:, 0] * jointVel[:, 0] + np.cos(joints[:, 0]) * jointVel[:, 2]
+    desiredVel[:, 2] = jointVel[:, 1]
+    return TrajectoryPlan(times, cartesian, joints, desiredVel, duration)
+
+# Trajetória por vários pontos cartesianos (K, 3) com segmentos em linha reta,
+# concordada em espaço cartesiano dentro de robot.linearVelLimit e
+# robot.linearAccLimit (por eixo). Os cantos cortados pelas concordâncias
+# também são verificados com ikBatch. Sem duration, o tempo ainda é esticado
+# uniformemente até que as juntas fiquem dentro de robot.velLimits e
+# robot.accLimits, que perto da região central limitam mais que a ponta
+def planBlendedCartesianTrajectory(robot, waypoints, duration=None,
+                                   controlRate=DEFAULT_CONTROL_RATE):
+    waypoints = np.asarray(waypoints, dtype=float)
+    velLimits = np.full(3, robot.linearVelLimit)
+    accLimits = np.full(3, robot.linearAccLimit)
+    fitJoints = duration is None
+    times, cartesian, desiredVel, duration = sampleBlend(waypoints, velLimits, accLimits,
+                                                         duration, controlRate)
+    joints = blendJoints(robot, times, cartesian)
+    if fitJoints:
+        timeScale = validateTrajectory(robot, times, joints)['timeScale']
+        if timeScale > 1:
+            times, cartesian, desiredVel, duration = sampleBlend(
+                waypoints, velLimits, accLimits, duration * timeScale, controlRate)
+            joints = blendJoints(robot, times, cartesian)
+    return TrajectoryPlan(times, cartesian, joints, desiredVel, duration)
+
+# Juntas dos pontos cartesianos da trajetória. Falha se algum ponto não tiver
+# solução ou se o caminho cruzar o fim de curso da junta de rotação (theta
+# salta de ±180° para ∓180°), o que nenhum ajuste de tempo resolve
+def blendJoints(robot, times, cartesian):
+    joints, valid = robot.ikBatch(cartesian)
+    if not np.all(valid):
+        raise ValueError("Falhou em calcular ik no instante " + str(times[~valid][0]) + " s")
+    seam = thetaStopCrossings(joints)
+    if np.any(seam):
+        raise ValueError("Trajetória cruza o fim de curso da junta de rotação no instante "
+                         + str(times[1:][seam][0]) + " s")
+    return joints
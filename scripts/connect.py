@@ -1,23 +1,252 @@
+"""
+Gerenciamento da conexão com o CoppeliaSim.
+
+ConnectionManager mantém um único cliente compartilhado por processo e entrega
+o objeto sim através de um proxy (ManagedSim). O proxy serializa as chamadas
+com uma trava, já que o cliente ZMQ não pode ser usado por várias threads ao
+mesmo tempo, e se reconecta quando a conexão cai no meio da execução. As
+tentativas de conexão usam espera exponencial com jitter, a cena só é
+carregada quando o robô não está presente e uma thread opcional verifica
+periodicamente se o simulador continua respondendo.
+
+Depois de reconectar, só as leituras (funções get*) são repetidas
+automaticamente. As demais chamadas (startSimulation, loadScene,
+createScript, callScriptFunction, ...) podem ter sido executadas antes da
+queda, então levantam ReconnectedError para quem chamou. Um simulador
+reiniciado também perde o estado da execução (simulação iniciada, modo
+sincronizado, script de troca de dados): funções registradas com
+addReconnectHook rodam após cada reconexão para restaurá-lo.
+
+O socket REQ do cliente espera a resposta por no máximo callTimeout segundos;
+sem esse limite uma chamada perdida travaria a thread (e a trava) para
+sempre. Depois de uma resposta perdida o socket REQ não aceita outro envio,
+então o cliente é descartado e um novo é criado na reconexão.
+"""
 import time
-from coppeliasim_zmqremoteapi_client import RemoteAPIClient
+import random
+import threading
+from time import perf_counter
 import os
+import logging
 
-def connect():
+logger = logging.getLogger(__name__)
 
-    SCENE_PATH = "../sim/cilyndric_robot_scene.ttt"
-    scenePath = os.path.abspath(SCENE_PATH)
+SCENE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sim", "cilyndric_robot_scene.ttt")
+# Objeto que indica que a cena do projeto já está aberta
+SCENE_OBJECT = "/P0_ST"
+# Espera máxima pela resposta de cada chamada (s). Cobre loadScene
+DEFAULT_CALL_TIMEOUT = 10.0
+# Prefixo das funções do sim que apenas leem estado e podem ser repetidas
+READ_PREFIX = "get"
 
-    for attempt in range(20):
-        try:
-            client = RemoteAPIClient()
-            sim = client.getObject('sim')
-            print(f"[SUCCESS] Conectado ao CoppeliaSim")
-            return sim
-        except Exception:
-            print(f"[WAITING] Tentando conectar... ({attempt + 1}/20)")
-            time.sleep(1)
+# Chamada interrompida por uma reconexão e não repetida
+class ReconnectedError(ConnectionError):
+    pass
+
+# Cliente ZMQ com limite de espera na recepção. A importação fica aqui para
+# que o módulo possa ser usado com outra fábrica de clientes sem o pacote
+def createClient(host, port, timeout):
+    import zmq
+    from coppeliasim_zmqremoteapi_client import RemoteAPIClient
+    client = RemoteAPIClient(host, port)
+    client.socket.setsockopt(zmq.RCVTIMEO, int(timeout * 1000))
+    client.socket.setsockopt(zmq.LINGER, 0)
+    return client
+
+# Fecha o socket de um cliente que não será mais usado
+def closeClient(client):
+    socket = getattr(client, 'socket', None)
+    if socket is None:
+        return
+    try:
+        socket.close(linger=0)
+    except Exception as error:
+        logger.warning("[WARNING] Falha ao fechar o cliente: %s", error)
+
+class ConnectionManager(object):
+    def __init__(self, host='localhost', port=23000, scenePath=SCENE_PATH, sceneObject=SCENE_OBJECT,
+                 maxAttempts=20, baseDelay=0.05, maxDelay=2.0, healthInterval=5.0,
+                 callTimeout=DEFAULT_CALL_TIMEOUT, clientFactory=createClient):
+        self.host = host
+        self.port = port
+        self.scenePath = os.path.abspath(scenePath)
+        self.sceneObject = sceneObject
+        self.maxAttempts = maxAttempts
+        self.baseDelay = baseDelay
+        self.maxDelay = maxDelay
+        self.healthInterval = healthInterval
+        self.callTimeout = callTimeout
+        self.clientFactory = clientFactory
+
+        self.lock = threading.RLock()
+        self.client = None
+        self.sim = None
+        self.proxy = ManagedSim(self)
+        self.healthThread = None
+        self.stopHealth = threading.Event()
+        # Funções chamadas com o proxy do sim depois de cada reconexão
+        self.reconnectHooks = []
+
+        # Métricas da conexão
+        self.connects = 0
+        self.reconnects = 0
+        self.failedHealthChecks = 0
+        self.connectLatency = None
+
+    # Cria o cliente e obtém o objeto sim, tentando novamente com espera
+    # exponencial e jitter até maxAttempts vezes
+    def connect(self):
+        with self.lock:
+            start = perf_counter()
+            for attempt in range(self.maxAttempts):
+                client = None
+                try:
+                    client = self.clientFactory(self.host, self.port, self.callTimeout)
+                    sim = client.require('sim') if hasattr(client, 'require') else client.getObject('sim')
+                    break
+                except Exception:
+                    # Sem resposta o socket REQ fica inutilizável
+                    closeClient(client)
+                    logger.warning("[WAITING] Tentando conectar... (%d/%d)", attempt + 1, self.maxAttempts)
+                    time.sleep(random.uniform(0, min(self.maxDelay, self.baseDelay * 2**attempt)))
+            else:
+                raise TimeoutError("Não foi possível conectar ao CoppeliaSim.")
+
+            self.client = client
+            self.sim = sim
+            self.connects += 1
+            self.connectLatency = perf_counter() - start
+            logger.info("[SUCCESS] Conectado ao CoppeliaSim em %.3f s", self.connectLatency)
+            self.ensureScene()
+            return self.proxy
+
+    # Carrega a cena apenas se o robô ainda não estiver nela
+    def ensureScene(self):
+        if self.sim.getObject(self.sceneObject, {'noError': True}) != -1:
+            return
         try:
-            sim.loadScene(scenePath)
+            self.sim.loadScene(self.scenePath)
         except Exception:
             raise RuntimeError("Não foi possível abrir a cena do CoppeliaSim.")
-    raise TimeoutError("Não foi possível conectar ao CoppeliaSim.")
\ No newline at end of file
+
+    # Descarta o cliente atual, que não pode ser reaproveitado depois de
+    # uma resposta perdida
+    def discardClient(self):
+        with self.lock:
+            closeClient(self.client)
+            self.client = None
+            self.sim = None
+
+    def reconnect(self):
+        with self.lock:
+            self.reconnects += 1
+            self.discardClient()
+            self.connect()
+            for hook in self.reconnectHooks:
+                hook(self.proxy)
+            return self.proxy
+
+    # Registra hook(sim) para restaurar o estado da execução após reconectar
+    def addReconnectHook(self, hook):
+        self.reconnectHooks.append(hook)
+
+    def removeReconnectHook(self, hook):
+        self.reconnectHooks.remove(hook)
+
+    # Retorna o sim compartilhado, conectando na primeira vez
+    def getSim(self):
+        with self.lock:
+            if self.sim is None:
+                self.connect()
+            return self.proxy
+
+    def getClient(self):
+        self.getSim()
+        return self.client
+
+    # Verifica se o simulador responde com uma chamada barata. A trava fica
+    # presa no máximo callTimeout segundos
+    def isHealthy(self):
+        with self.lock:
+            try:
+                self.sim.getSimulationTime()
+                return True
+            except Exception:
+                self.failedHealthChecks += 1
+                return False
+
+    def healthCheck(self):
+        if not self.isHealthy():
+            self.reconnect()
+
+    def startHealthChecks(self):
+        if self.healthThread is not None:
+            return
+        self.stopHealth.clear()
+        self.healthThread = threading.Thread(target=self.healthLoop, name="sim-health", daemon=True)
+        self.healthThread.start()
+
+    def stopHealthChecks(self):
+        self.stopHealth.set()
+        if self.healthThread is not None:
+            self.healthThread.join()
+            self.healthThread = None
+
+    def healthLoop(self):
+        while not self.stopHealth.wait(self.healthInterval):
+            try:
+                self.healthCheck()
+            except Exception as error:
+                logger.error("[ERROR] Falha ao reconectar ao CoppeliaSim: %s", error)
+
+    def metrics(self):
+        return {'connected': self.sim is not None,
+                'connects': self.connects,
+                'reconnects': self.reconnects,
+                'failedHealthChecks': self.failedHealthChecks,
+                'connectLatency': self.connectLatency}
+
+# Proxy do objeto sim. Constantes (sim.handle_world, ...) são repassadas
+# diretamente e as funções são executadas com a trava do gerenciador. Se uma
+# chamada falhar e o simulador não responder, reconecta; leituras são
+# repetidas e as demais chamadas levantam ReconnectedError
+class ManagedSim(object):
+    def __init__(self, manager):
+        self._manager = manager
+        self._calls = {}
+
+    def __getattr__(self, name):
+        if name in self._calls:
+            return self._calls[name]
+        manager = self._manager
+        manager.getSim()
+        attribute = getattr(manager.sim, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            with manager.lock:
+                try:
+                    return getattr(manager.sim, name)(*args, **kwargs)
+                except Exception:
+                    if manager.isHealthy():
+                        raise
+                    manager.reconnect()
+                    if not name.startswith(READ_PREFIX):
+                        raise ReconnectedError("Conexão refeita durante sim." + name
+                                               + "; a chamada não foi repetida")
+                    return getattr(manager.sim, name)(*args, **kwargs)
+        self._calls[name] = call
+        return call
+
+# Gerenciador compartilhado pelo processo
+defaultManager = None
+
+def getManager(**options):
+    global defaultManager
+    if defaultManager is None:
+        defaultManager = ConnectionManager(**options)
+    return defaultManager
+
+def connect():
+    return getManager().getSim()
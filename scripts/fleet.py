@@ -0,0 +1,127 @@
+"""
+Controle de vários robôs cilíndricos da mesma cena ao mesmo tempo.
+
+Os robôs compartilham a mesma conexão (o mesmo objeto sim), que não pode ser
+usada por várias threads. Por isso a execução não cria uma thread por robô:
+os planos de todos os robôs são calculados antes e uma única malha de
+controle percorre a união dos instantes de envio. A cada ciclo os alvos de
+todos os robôs com amostra naquele instante são enviados juntos
+(FleetIO.exchangeMany), então os robôs se movem simultaneamente e o custo de
+comunicação por ciclo não cresce com o número de robôs.
+"""
+import numpy as np
+import logging
+from robot import CylindricRobot
+from batch_io import FleetIO
+from realtime import jitterStats, DEFAULT_CONTROL_RATE
+from trajectory import planCartesianTrajectory, executionResults
+from profiles import BANG_BANG
+from timing import minimumCartesianDuration
+from validation import enforcePlanLimits
+
+logger = logging.getLogger(__name__)
+
+MOTOR_PATH = "/motor0"
+
+# Encontra os robôs da cena: objetos na raiz que possuem a junta /motor0
+def discoverRobots(sim):
+    aliases = []
+    for handle in sim.getObjectsInTree(sim.handle_scene, sim.handle_all, 2):
+        alias = "/" + sim.getObjectAlias(handle)
+        if sim.getObject(alias + MOTOR_PATH, {'noError': True}) != -1:
+            aliases.append(alias)
+    return aliases
+
+class RobotFleet(object):
+    def __init__(self, sim, aliases=None, batchedIO=False, stepping=False):
+        self.sim = sim
+        if aliases is None:
+            aliases = discoverRobots(sim)
+        if not aliases:
+            raise KeyError("Nenhum robô encontrado na cena")
+        self.robots = [CylindricRobot(alias, sim) for alias in aliases]
+        self.io = FleetIO(self.robots, install=batchedIO)
+        if stepping:
+            for robot in self.robots:
+                robot.enableStepping()
+        self.timingStats = None
+
+    def __len__(self):
+        return len(self.robots)
+
+    # Remove da cena o script de troca de dados instalado por batchedIO
+    def close(self):
+        self.io.close()
+
+    # Movimento em espaço de juntas de todos os robôs. Não bloqueia: o
+    # simulador executa os movimentos em paralelo
+    def cartesianTrajectoryMoveAll(self, targets, duration=None, profile=BANG_BANG):
+        for robot, target in zip(self.robots, targets):
+            robot.cartesianTrajectoryMove(*target, duration, profile)
+
+    # Planeja trajetórias lineares para cada robô (um alvo por robô) e as
+    # executa simultaneamente. durations pode ser um valor único, uma lista ou
+    # None para a duração mínima de cada robô
+    def executeCartesianTrajectories(self, targets, durations=None, profile=BANG_BANG,
+                                     controlRate=DEFAULT_CONTROL_RATE, clock=None):
+        if durations is None or np.isscalar(durations):
+            durations = [durations] * len(self.robots)
+        plans = []
+        for robot, target, duration in zip(self.robots, targets, durations):
+            initialPos = robot.getCurrentPosition()
+            if duration is None:
+                duration = minimumCartesianDuration(robot, initialPos, target, profile)
+            plans.append(planCartesianTrajectory(robot, initialPos, target, duration,
+                                                 controlRate, profile))
+        return self.executePlans(plans, clock)
+
+    # Executa um plano por robô numa única malha de controle. Retorna, para
+    # cada robô, os mesmos dados de CylindricRobot.executePlan. Todos os
+    # planos são validados (limitPolicy de cada robô) antes do primeiro envio
+    def executePlans(self, plans, clock=None):
+        plans = [enforcePlanLimits(robot, plan, robot.limitPolicy)
+                 for robot, plan in zip(self.robots, plans)]
+        robotCount = len(plans)
+        initialPos = [robot.getCurrentPosition() for robot in self.robots[:robotCount]]
+        schedule = np.unique(np.concatenate([plan.times for plan in plans]))
+        actualTimes = np.empty(len(schedule))
+
+        # Dados medidos de cada robô e a próxima amostra de cada plano
+        endEffectorPos = [np.empty((len(plan), 3)) for plan in plans]
+        jointsPosition = [np.empty((len(plan), self.robots[0].jointNumber)) for plan in plans]
+        sampleTimes = [np.empty(len(plan)) for plan in plans]
+        nextSample = np.zeros(robotCount, dtype=int)
+        sent = 0
+
+        clock = self.robots[0].createClock() if clock is None else clock
+        self.io.resetStats()
+        clock.start()
+        for tick, scheduled in enumerate(schedule):
+            now = clock.waitUntil(scheduled)
+            actualTimes[tick] = now
+
+            # Robôs com amostra neste instante
+            indices = [index for index in range(robotCount)
+                       if nextSample[index] < len(plans[index])
+                       and plans[index].times[nextSample[index]] <= scheduled]
+            joints = [plans[index].joints[nextSample[index]] for index in indices]
+            tipsPos, jointsList = self.io.exchangeMany(indices, joints)
+
+            for index, tipPos, jointPos in zip(indices, tipsPos, jointsList):
+                sample = nextSample[index]
+                endEffectorPos[index][sample] = tipPos
+                jointsPosition[index][sample] = jointPos
+                sampleTimes[index][sample] = now
+                nextSample[index] += 1
+            sent += len(indices)
+
+        elapsed = float(actualTimes[-1]) if len(actualTimes) else 0.
+        self.timingStats = jitterStats(schedule, actualTimes)
+        self.timingStats['setpoints'] = sent
+        self.timingStats['setpointsPerSecond'] = sent / elapsed if elapsed > 0 else 0.
+        logger.info("Fleet timing: %s", self.timingStats)
+        logger.info("Fleet I/O: %s", self.io.stats())
+
+        return [executionResults(plans[index], initialPos[index], sampleTimes[index],
+                                 endEffectorPos[index], jointsPosition[index])
+                for index in range(robotCount)]
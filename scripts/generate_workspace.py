@@ -1,34 +1,76 @@
 import numpy as np
 import math
+import logging
 from robot import CylindricRobot
 
+logger = logging.getLogger(__name__)
+
 # Intervalo definido para a varredura do espaço de trabalho
 ANGLE_INTERVAL = math.radians(10) # rads
 LINEAR_INTERVAL = 0.2 # m
+DEFAULT_RESOLUTION = (ANGLE_INTERVAL, LINEAR_INTERVAL, LINEAR_INTERVAL)
+
+# Quantidade de pontos calculados por vez na varredura
+CHUNK_SIZE = 1 << 20
+
+# Retorna os valores avaliados para cada junta com a resolução (passo) desejada
+def jointRanges(robot: CylindricRobot, resolution=DEFAULT_RESOLUTION):
+    ranges = []
+    geometry = robot.geometry
+    for low, high, interval in zip(geometry.lo, geometry.hi, resolution):
+        # Encontra o total de pontos avaliados para a junta
+        points = int((high - low) / interval)
+        ranges.append(np.linspace(low, high, points))
+    return ranges
+
+# Total de pontos gerados pela varredura, incluindo a posição inicial fk(0, 0, 0)
+def workspaceSize(robot: CylindricRobot, resolution=DEFAULT_RESOLUTION):
+    return 1 + math.prod(len(jointRange) for jointRange in jointRanges(robot, resolution))
+
+# Gera a varredura em blocos de no máximo chunkSize pontos, na mesma ordem do
+# laço triplo junta 0 -> junta 1 -> junta 2. Cada bloco é um array (N, 3).
+def workspaceChunks(robot: CylindricRobot, resolution=DEFAULT_RESOLUTION, chunkSize=CHUNK_SIZE):
+    motor0Range, motor1Range, motor2Range = jointRanges(robot, resolution)
+    shape = (len(motor0Range), len(motor1Range), len(motor2Range))
+    total = math.prod(shape)
 
-# Realiza a varredura do espaço de trabalho usando a cinemática direta
-def generateWorkspace(robot: CylindricRobot):
-    print('Gerando varredura do espaço de trabalho')
-    
-    # Encontra o total de pontos avaliados para cada junta
-    motor0Points = int((robot.limits[0]['max'] - robot.limits[0]['min']) / ANGLE_INTERVAL)
-    motor1Points = int((robot.limits[1]['max'] - robot.limits[1]['min']) / LINEAR_INTERVAL)
-    motor2Points = int((robot.limits[2]['max'] - robot.limits[2]['min']) / LINEAR_INTERVAL)
+    yield robot.fkBatch([[0., 0., 0.]])
+    joints = np.empty((min(chunkSize, total), robot.jointNumber))
+    for start in range(0, total, chunkSize):
+        stop = min(start + chunkSize, total)
+        index0, index1, index2 = np.unravel_index(np.arange(start, stop), shape)
+        block = joints[:stop - start]
+        np.take(motor0Range, index0, out=block[:, 0])
+        np.take(motor1Range, index1, out=block[:, 1])
+        np.take(motor2Range, index2, out=block[:, 2])
+        yield robot.fkBatch(block)
 
-    # Junta rotacional
-    motor0Range= np.linspace(robot.limits[0]['min'], robot.limits[0]['max'], motor0Points)
-    # Juntas prismáticas
-    motor1Range = np.linspace(robot.limits[1]['min'], robot.limits[1]['max'], motor1Points)
-    motor2Range = np.linspace(robot.limits[2]['min'], robot.limits[2]['max'], motor2Points)
+# Realiza a varredura do espaço de trabalho usando a cinemática direta.
+# Se out for informado (array ou memmap com workspaceSize linhas), os pontos
+# são escritos diretamente nele e a memória usada fica limitada a um bloco.
+def generateWorkspace(robot: CylindricRobot, resolution=DEFAULT_RESOLUTION,
+                      out=None, chunkSize=CHUNK_SIZE, dtype=np.float64):
+    logger.info('Gerando varredura do espaço de trabalho')
 
-    points = []
-    points.append(robot.fk(0, 0, 0))
-    for angle in motor0Range:
-        for pos1 in motor1Range:
-            for pos2 in motor2Range:
-                position = robot.fk(angle, pos1, pos2)
-                points.append(position)
+    size = workspaceSize(robot, resolution)
+    if out is None:
+        out = np.empty((size, 3), dtype=dtype)
+    elif out.shape != (size, 3):
+        raise ValueError("Esperado array com formato " + str((size, 3)))
 
-    return np.array(points)
+    row = 0
+    for chunk in workspaceChunks(robot, resolution, chunkSize):
+        out[row:row + len(chunk)] = chunk
+        row += len(chunk)
 
+    return out
 
+# Gera a varredura diretamente num arquivo .npy mapeado em memória, que pode
+# ser lido depois com np.load(path, mmap_mode='r')
+def generateWorkspaceFile(robot: CylindricRobot, path, resolution=DEFAULT_RESOLUTION,
+                          chunkSize=CHUNK_SIZE, dtype=np.float32):
+    size = workspaceSize(robot, resolution)
+    out = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(size, 3))
+    generateWorkspace(robot, resolution, out, chunkSize)
+    out.flush()
+    return out
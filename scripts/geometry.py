@@ -0,0 +1,101 @@
+"""
+Representação compacta da geometria e do estado das juntas do robô.
+
+RobotGeometry reúne as constantes de DH (d1, a2, a3, df) e os limites de
+posição das juntas em arrays contíguos lo e hi, prontos para operações
+vetorizadas sobre trajetórias inteiras (clamp, withinLimits). A geometria é
+imutável: alterar um parâmetro cria outra instância (replace), então
+comparar a identidade do objeto basta para saber se algo mudou.
+
+JointState guarda a última leitura do robô (posição da ponta e das juntas)
+em buffers alocados uma única vez e sobrescritos a cada ciclo de controle.
+"""
+import numpy as np
+import math
+from types import MappingProxyType
+
+class RobotGeometry(object):
+    __slots__ = ('d1', 'a2', 'a3', 'df', 'lo', 'hi')
+
+    def __init__(self, d1, a2, a3, df, lo, hi):
+        lo = np.array(lo, dtype=float)
+        hi = np.array(hi, dtype=float)
+        if lo.shape != hi.shape or np.any(lo > hi):
+            raise ValueError("Limites das juntas inválidos")
+        lo.flags.writeable = False
+        hi.flags.writeable = False
+        # Atribuição direta: __setattr__ bloqueia alterações depois de criada
+        object.__setattr__(self, 'd1', float(d1)) # m
+        object.__setattr__(self, 'a2', float(a2)) # m
+        object.__setattr__(self, 'a3', float(a3)) # m
+        object.__setattr__(self, 'df', float(df)) # m
+        object.__setattr__(self, 'lo', lo) # Mínimo de cada junta
+        object.__setattr__(self, 'hi', hi) # Máximo de cada junta
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RobotGeometry é imutável, use replace()")
+
+    def __eq__(self, other):
+        return isinstance(other, RobotGeometry) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return ("RobotGeometry(d1=%r, a2=%r, a3=%r, df=%r, lo=%r, hi=%r)"
+                % (self.d1, self.a2, self.a3, self.df, self.lo.tolist(), self.hi.tolist()))
+
+    # Cria a geometria a partir dos limites no formato [{'min': ..., 'max': ...}]
+    @classmethod
+    def fromLimits(cls, d1, a2, a3, df, limits):
+        return cls(d1, a2, a3, df, [limit['min'] for limit in limits],
+                   [limit['max'] for limit in limits])
+
+    # Cópia com os parâmetros informados alterados
+    def replace(self, **changes):
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return RobotGeometry(**values)
+
+    # Parâmetros que definem o espaço de trabalho, na ordem d1, a2, a3, df e
+    # depois mínimo e máximo de cada junta
+    def key(self):
+        return (self.d1, self.a2, self.a3, self.df) + tuple(np.column_stack([self.lo, self.hi]).ravel().tolist())
+
+    # Limites no formato antigo, somente leitura
+    def limits(self):
+        return tuple(MappingProxyType({'min': low, 'max': high})
+                     for low, high in zip(self.lo.tolist(), self.hi.tolist()))
+
+    @property
+    def jointNumber(self):
+        return len(self.lo)
+
+    # Raio do cilindro central que o robô não alcança (d3 >= 0)
+    @property
+    def deadZoneRadius(self):
+        return math.hypot(self.a2, self.df)
+
+    # Limita as juntas (N, 3) ou (3,) aos limites de posição
+    def clamp(self, joints, out=None):
+        return np.clip(joints, self.lo, self.hi, out=out)
+
+    # Máscara das linhas de joints (N, 3) dentro dos limites, com folga tolerance
+    def withinLimits(self, joints, tolerance=0.):
+        joints = np.asarray(joints, dtype=float)
+        inside = (joints >= self.lo - tolerance) & (joints <= self.hi + tolerance)
+        return np.all(inside, axis=-1)
+
+# Máscara (N - 1,) dos pares de amostras consecutivas de joints (N, 3) em que
+# theta salta mais de π. Como theta tem fim de curso em ±π, o salto indica
+# que o caminho cruza o fim de curso: a junta teria de dar a volta inteira
+def thetaStopCrossings(joints):
+    joints = np.asarray(joints, dtype=float)
+    return np.abs(np.diff(joints[:, 0])) > math.pi
+
+class JointState(object):
+    __slots__ = ('tip', 'joints')
+
+    def __init__(self, jointNumber=3):
+        self.tip = np.zeros(3) # Posição da ponta (m)
+        self.joints = np.zeros(jointNumber) # Posição das juntas
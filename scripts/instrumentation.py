@@ -0,0 +1,217 @@
+"""
+Instrumentação leve dos pontos críticos do robô.
+
+Um registro global (metrics) guarda contadores, temporizadores (número de
+chamadas, tempo total e máximo) e histogramas de latência com faixas fixas.
+A coleta pode ser ligada e desligada a qualquer momento com enable() e
+disable(). Os métodos instrumentados só são trocados pelas versões com
+medição enquanto a coleta está ligada; desligada, os demais pontos custam
+apenas a verificação de metrics.enabled.
+
+Pontos instrumentados:
+    - ik, ikBatch e fkBatch (decorador instrumented; fk, com poucas
+      operações de math, não é medido)
+    - cada função do sim (InstrumentedSim, temporizador "sim.<função>")
+    - o corpo da malha de controle (temporizador e histograma "tick") e o
+      atraso de cada ciclo em relação ao agendado (histograma "lateness")
+
+Os valores podem ser exportados como JSON (toJSON) ou no formato texto do
+Prometheus (toPrometheus).
+"""
+import json
+import functools
+from bisect import bisect_left
+from time import perf_counter
+
+# Faixas do histograma de latência (s), de 10 µs a 1 s
+LATENCY_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3,
+                   5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0)
+
+class Timer(object):
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.
+        self.max = 0.
+
+    def add(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def toDict(self):
+        return {'count': self.count, 'total': self.total, 'max': self.max,
+                'mean': self.total / self.count if self.count else 0.}
+
+class Histogram(object):
+    __slots__ = ('buckets', 'counts', 'count', 'total')
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1) # Última faixa: acima do maior limite
+        self.count = 0
+        self.total = 0.
+
+    def add(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    # Valor aproximado do percentil (limite superior da faixa que o contém)
+    def percentile(self, fraction):
+        if self.count == 0:
+            return 0.
+        accumulated = 0
+        for limit, count in zip(self.buckets + (float('inf'),), self.counts):
+            accumulated += count
+            if accumulated >= fraction * self.count:
+                return limit
+        return float('inf')
+
+    def toDict(self):
+        return {'buckets': list(self.buckets), 'counts': self.counts,
+                'count': self.count, 'sum': self.total,
+                'p50': self.percentile(0.5), 'p99': self.percentile(0.99)}
+
+class Metrics(object):
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.counters = {}
+        self.timers = {}
+        self.histograms = {}
+        # Métodos instrumentados: (classe, nome, original, com medição)
+        self.methods = []
+
+    # Liga a coleta e troca os métodos instrumentados pelas versões com medição
+    def enable(self):
+        self.enabled = True
+        for cls, name, __, measured in self.methods:
+            setattr(cls, name, measured)
+
+    # Desliga a coleta e devolve os métodos originais: sem custo adicional
+    def disable(self):
+        self.enabled = False
+        for cls, name, original, __ in self.methods:
+            setattr(cls, name, original)
+
+    def reset(self):
+        self.counters = {}
+        self.timers = {}
+        self.histograms = {}
+
+    def increment(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def addTime(self, name, elapsed):
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = Timer()
+        timer.add(elapsed)
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram(buckets)
+        histogram.add(value)
+
+    def snapshot(self):
+        return {'counters': dict(self.counters),
+                'timers': {name: timer.toDict() for name, timer in self.timers.items()},
+                'histograms': {name: histogram.toDict() for name, histogram in self.histograms.items()}}
+
+    def toJSON(self, indent=2):
+        return json.dumps(self.snapshot(), indent=indent)
+
+    # Formato texto de exposição do Prometheus. Temporizadores viram resumos
+    # (_count e _sum em segundos) e histogramas usam faixas cumulativas
+    def toPrometheus(self, prefix="cylindric_robot"):
+        lines = []
+        for name, value in sorted(self.counters.items()):
+            metric = prefix + "_" + sanitize(name) + "_total"
+            lines += ["# TYPE " + metric + " counter", metric + " " + str(value)]
+        for name, timer in sorted(self.timers.items()):
+            metric = prefix + "_" + sanitize(name) + "_seconds"
+            lines += ["# TYPE " + metric + " summary",
+                      metric + "_count " + str(timer.count),
+                      metric + "_sum " + repr(timer.total),
+                      "# TYPE " + metric + "_max gauge",
+                      metric + "_max " + repr(timer.max)]
+        for name, histogram in sorted(self.histograms.items()):
+            metric = prefix + "_" + sanitize(name) + "_seconds"
+            lines.append("# TYPE " + metric + " histogram")
+            accumulated = 0
+            for limit, count in zip(histogram.buckets, histogram.counts):
+                accumulated += count
+                lines.append(metric + '_bucket{le="' + repr(limit) + '"} ' + str(accumulated))
+            lines += [metric + '_bucket{le="+Inf"} ' + str(histogram.count),
+                      metric + "_count " + str(histogram.count),
+                      metric + "_sum " + repr(histogram.total)]
+        return "\n".join(lines) + "\n"
+
+# Nomes do Prometheus aceitam apenas letras, dígitos e _
+def sanitize(name):
+    return "".join(char if char.isalnum() else "_" for char in name)
+
+# Registro global usado pelo robô
+metrics = Metrics()
+
+def enable():
+    metrics.enable()
+
+def disable():
+    metrics.disable()
+
+# Versão de function que soma o tempo de cada chamada ao temporizador name
+def timedFunction(name, function, registry=None):
+    registry = metrics if registry is None else registry
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            registry.addTime(name, perf_counter() - start)
+    return wrapper
+
+# Decorador de classe que registra métodos para instrumentação. Os métodos só
+# são trocados pelas versões com medição enquanto a coleta estiver ligada
+def instrumented(*names, registry=None):
+    registry = metrics if registry is None else registry
+
+    def decorator(cls):
+        for name in names:
+            original = cls.__dict__[name]
+            registry.methods.append((cls, name, original, timedFunction(name, original, registry)))
+            if registry.enabled:
+                setattr(cls, name, registry.methods[-1][3])
+        return cls
+    return decorator
+
+# Proxy do objeto sim que mede o tempo de cada função chamada. Constantes
+# (sim.handle_world, ...) são repassadas diretamente
+class InstrumentedSim(object):
+    def __init__(self, sim):
+        self._sim = sim
+        self._calls = {}
+
+    def __getattr__(self, name):
+        if name in self._calls:
+            return self._calls[name]
+        attribute = getattr(self._sim, name)
+        if not callable(attribute):
+            return attribute
+        timerName = "sim." + name
+
+        def call(*args, **kwargs):
+            if not metrics.enabled:
+                return attribute(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                metrics.addTime(timerName, perf_counter() - start)
+        self._calls[name] = call
+        return call
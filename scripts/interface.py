@@ -2,11 +2,97 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import numpy as np # Importando numpy para a simulação do getCurrentPosition
+import threading
+import queue
+from collections import deque
+from time import perf_counter
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+# Frequência de atualização das leituras (Hz) e amostras mostradas no gráfico
+POLL_RATE = 10.0
+HISTORY_SIZE = 300
+
+# Executa toda a comunicação com o robô numa thread separada, para que a
+# interface nunca espere pelo simulador. Os comandos entram numa fila e são
+# executados em ordem. As leituras de posição são agrupadas: enquanto uma
+# leitura estiver pendente, novos pedidos são ignorados, então a fila não
+# cresce quando o simulador fica lento. Falhas de leitura não entram na fila
+# de erros: apenas a última fica em readError até a próxima leitura certa
+class RobotWorker(object):
+    def __init__(self, robot, historySize=HISTORY_SIZE):
+        self.robot = robot
+        self.commands = queue.Queue()
+        self.errors = queue.Queue()
+        self.lock = threading.Lock()
+        self.latest = None # (tempo, posição da ponta, juntas, FK das juntas)
+        self.history = deque(maxlen=historySize)
+        self.statePending = False
+        self.readError = None
+        self.start = perf_counter()
+        self.thread = threading.Thread(target=self.run, name="robot-worker", daemon=True)
+        self.thread.start()
+
+    def submit(self, function, *args):
+        self.commands.put((function, args))
+
+    # Pede uma nova leitura, a menos que a anterior ainda não tenha sido feita
+    def requestState(self):
+        with self.lock:
+            if self.statePending:
+                return False
+            self.statePending = True
+        self.commands.put((self.readState, ()))
+        return True
+
+    def readState(self):
+        try:
+            position = self.robot.getCurrentPosition()
+            joints = self.robot.getCurrentJointPostions()
+            sample = (perf_counter() - self.start, position, joints, self.robot.fk(*joints))
+        except Exception as error:
+            with self.lock:
+                self.readError = error
+        else:
+            with self.lock:
+                self.latest = sample
+                self.history.append(sample)
+                self.readError = None
+        finally:
+            with self.lock:
+                self.statePending = False
+
+    # Última leitura e cópia das amostras recentes
+    def snapshot(self):
+        with self.lock:
+            return self.latest, list(self.history)
+
+    # Falha da última leitura, ou None se ela deu certo
+    def lastReadError(self):
+        with self.lock:
+            return self.readError
+
+    def run(self):
+        while True:
+            command = self.commands.get()
+            if command is None:
+                return
+            function, args = command
+            try:
+                function(*args)
+            except Exception as error:
+                self.errors.put(error)
+
+    def stop(self):
+        self.commands.put(None)
+        self.thread.join()
 
 class RobotControlApp:
-    def __init__(self, master, robot):
+    def __init__(self, master, robot, pollRate=POLL_RATE):
         self.master = master
         self.robot = robot
+        self.worker = RobotWorker(robot)
+        self.pollInterval = int(1000 / pollRate) # ms
         master.title("Controle de Robô Simples")
 
         # --- Frames para organização ---
@@ -61,7 +147,7 @@ class RobotControlApp:
         self.cartesian_move_button = ttk.Button(self.cartesian_frame, text="Mover Cartesiano", command=self._call_cartesian_move)
         self.cartesian_move_button.grid(row=4, column=0, columnspan=2, pady=10)
 
-        self.refresh_position_button = ttk.Button(self.position_frame, text="Atualizar Posição", command=self._update_current_position_display)
+        self.refresh_position_button = ttk.Button(self.position_frame, text="Atualizar Posição", command=self.worker.requestState)
         self.refresh_position_button.grid(row=1, column=0, columnspan=2, pady=10)
 
         # Configura as colunas para expandir
@@ -73,12 +159,34 @@ class RobotControlApp:
         self.position_label.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
         self.fk_label = ttk.Label(self.position_frame, text="FK = [?, ?, ?]", font=("Arial", 12, "bold"))
         self.fk_label.grid(row=2, column=1, padx=5, pady=5, sticky="ew")
+        self.joints_label = ttk.Label(self.position_frame, text="Juntas = [?, ?, ?]", font=("Arial", 12, "bold"))
+        self.joints_label.grid(row=3, column=1, padx=5, pady=5, sticky="ew")
+        self.live_fk_label = ttk.Label(self.position_frame, text="FK atual = [?, ?, ?]", font=("Arial", 12, "bold"))
+        self.live_fk_label.grid(row=4, column=1, padx=5, pady=5, sticky="ew")
+        # Falha de leitura atual; some na próxima leitura que der certo
+        self.status_label = ttk.Label(self.position_frame, text="", foreground="red")
+        self.status_label.grid(row=5, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
+        self.statusText = ""
 
         # Configura a coluna para expandir
         self.position_frame.grid_columnconfigure(1, weight=1)
 
-        # Inicializa a exibição da posição
-        self._update_current_position_display()
+        # --- Gráfico das últimas posições da ponta ---
+        self.plot_frame = ttk.LabelFrame(master, text="Trajetória Recente")
+        self.plot_frame.grid(row=0, column=2, rowspan=2, padx=10, pady=10, sticky="nsew")
+        figure = Figure(figsize=(5, 4), dpi=80)
+        self.plot_axis = figure.add_subplot(111)
+        self.plot_axis.set_xlabel('Tempo [s]')
+        self.plot_axis.set_ylabel('Posição [m]')
+        self.plot_lines = [self.plot_axis.plot([], [], label=label)[0] for label in ('X', 'Y', 'Z')]
+        self.plot_axis.legend(loc='upper left')
+        self.canvas = FigureCanvasTkAgg(figure, master=self.plot_frame)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.lastSampleTime = None
+
+        # Inicializa a exibição da posição e começa as leituras periódicas
+        master.protocol("WM_DELETE_WINDOW", self.close)
+        self._poll()
 
     def _call_joint_move(self):
         """Chama jointMove com os valores dos campos de entrada."""
@@ -93,7 +201,7 @@ class RobotControlApp:
             messagebox.showinfo("Erro", "Valor invalido para posição das juntas")
             return # Ignora se a entrada não for numérica, a mensagem de erro já foi mostrada
         
-        self.robot.jointMove(target[0], target[1], target[2])
+        self.worker.submit(self.robot.jointMove, target[0], target[1], target[2])
         position = self.robot.fk(target[0], target[1], target[2])
         self.fk_label.config(text=f"FK = [{position[0]:.3f}, {position[1]:.3f}, {position[2]:.3f}]")
 
@@ -112,23 +220,67 @@ class RobotControlApp:
             messagebox.showinfo("Erro", "Valor invalido para posição alvo")
             return # Ignora se a entrada não for numérica, a mensagem de erro já foi mostrada
 
-        self.robot.cartesianTrajectoryMove(target[0], target[1], target[2], duration)
+        self.worker.submit(self.robot.cartesianTrajectoryMove, target[0], target[1], target[2], duration)
+
+    def _poll(self):
+        """Pede uma nova leitura e atualiza a tela com a última disponível."""
+        self.worker.requestState()
+        self._update_current_position_display()
+        self._update_status()
+        # Erros dos comandos enviados: uma única janela com todos os pendentes
+        messages = []
+        while True:
+            try:
+                messages.append(str(self.worker.errors.get_nowait()))
+            except queue.Empty:
+                break
+        if messages:
+            messagebox.showinfo("Erro", "\n".join(messages))
+        self.poll_job = self.master.after(self.pollInterval, self._poll)
+
+    def _update_status(self):
+        """Mostra a falha de leitura atual, trocando o texto só quando ele muda."""
+        error = self.worker.lastReadError()
+        text = "" if error is None else f"Falha na leitura: {error}"
+        if text != self.statusText:
+            self.statusText = text
+            self.status_label.config(text=text)
 
     def _update_current_position_display(self):
-        """Atualiza o Label com a posição atual."""
-        position = self.robot.getCurrentPosition()
+        """Atualiza os Labels e o gráfico com a última leitura."""
+        latest, history = self.worker.snapshot()
+        if latest is None or latest[0] == self.lastSampleTime:
+            return # Nenhuma leitura nova desde a última atualização
+        self.lastSampleTime = latest[0]
+        __, position, joints, fk = latest
         self.position_label.config(text=f"Pos = [{position[0]:.3f}, {position[1]:.3f}, {position[2]:.3f}]")
+        self.joints_label.config(text=f"Juntas = [{joints[0]:.3f}, {joints[1]:.3f}, {joints[2]:.3f}]")
+        self.live_fk_label.config(text=f"FK atual = [{fk[0]:.3f}, {fk[1]:.3f}, {fk[2]:.3f}]")
+
+        times = np.array([sample[0] for sample in history])
+        positions = np.array([sample[1] for sample in history])
+        for axis, line in enumerate(self.plot_lines):
+            line.set_data(times, positions[:, axis])
+        self.plot_axis.relim()
+        self.plot_axis.autoscale_view()
+        self.canvas.draw_idle()
+
+    def close(self):
+        """Para as leituras e a thread do robô antes de fechar a janela."""
+        self.master.after_cancel(self.poll_job)
+        self.worker.stop()
+        self.master.destroy()
 
 
 # --- Cria e executa a aplicação ---
 if __name__ == "__main__":
 
-    from coppeliasim_zmqremoteapi_client import RemoteAPIClient
+    import logging
     from connect import connect
     # Classe para interface com o robô
     from robot import CylindricRobot
 
-    client = RemoteAPIClient()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     sim = connect()
 
     print("Simulação iniciada")
@@ -0,0 +1,101 @@
+"""
+Cache das cinemáticas direta e inversa para alvos repetidos.
+
+Os mesmos pontos de pega e entrega são pedidos milhares de vezes, e cada
+pedido recalcula ik (ou fk) do zero. KinematicsCache guarda as soluções num
+dicionário ordenado com descarte do item usado há mais tempo (LRU) quando o
+limite de itens é atingido.
+
+O cache só compensa quando o cálculo custa mais que a consulta (~5 µs com a
+trava, a quantização e o OrderedDict), por exemplo para uma cinemática
+numérica ou uma subclasse instrumentada. As formas fechadas de ik e fk de
+CylindricRobot levam ~1,5 µs e ficam mais lentas com o cache (veja os casos
+fk, ik, fkCached e ikCached em benchmarks.py), então ele não é ativado por
+padrão em lugar nenhum.
+
+As coordenadas são quantizadas em células de lado tolerance (m ou rad): dois
+pedidos na mesma célula recebem a mesma solução, a do primeiro ponto pedido.
+Com a tolerância padrão (1 µm) a diferença é desprezível.
+
+As soluções só valem para a geometria (d1, a2, a3, df) e os limites das
+juntas com que foram calculadas. Como robot.geometry é imutável (qualquer
+alteração troca o objeto), a cada consulta basta comparar a identidade da
+geometria atual com a das soluções; se mudou, o cache é esvaziado.
+"""
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHE_SIZE = 4096 # Itens por cinemática
+DEFAULT_TOLERANCE = 1e-6 # Lado da célula de quantização (m ou rad)
+
+class KinematicsCache(object):
+    def __init__(self, robot, size=DEFAULT_CACHE_SIZE, tolerance=DEFAULT_TOLERANCE):
+        if size < 1:
+            raise ValueError("O cache precisa de pelo menos um item")
+        if tolerance <= 0:
+            raise ValueError("A tolerância precisa ser positiva")
+        self.robot = robot
+        self.size = size
+        self.tolerance = tolerance
+        self.scale = 1. / tolerance
+        self.entries = {'ik': OrderedDict(), 'fk': OrderedDict()}
+        # A interface consulta o cache a partir de duas threads
+        self.lock = threading.Lock()
+        self.geometry = robot.geometry
+        self.resetStats()
+
+    def resetStats(self):
+        self.hits = {'ik': 0, 'fk': 0}
+        self.misses = {'ik': 0, 'fk': 0}
+        self.evictions = {'ik': 0, 'fk': 0}
+        self.invalidations = 0
+
+    def clear(self):
+        with self.lock:
+            for entries in self.entries.values():
+                entries.clear()
+
+    # Esvazia o cache se a geometria ou os limites do robô mudaram
+    def validate(self):
+        if self.robot.geometry is not self.geometry:
+            self.geometry = self.robot.geometry
+            self.invalidations += 1
+            for entries in self.entries.values():
+                entries.clear()
+
+    # Solução de kind para (a, b, c), calculada por compute se não estiver no cache
+    def lookup(self, kind, compute, a, b, c):
+        scale = self.scale
+        key = (round(a * scale), round(b * scale), round(c * scale))
+        entries = self.entries[kind]
+        with self.lock:
+            self.validate()
+            solution = entries.get(key)
+            if solution is not None:
+                entries.move_to_end(key)
+                self.hits[kind] += 1
+                return solution
+            self.misses[kind] += 1
+            # Falhas (ValueError de ik) não são guardadas
+            solution = entries[key] = tuple(compute(self.robot, a, b, c))
+            if len(entries) > self.size:
+                entries.popitem(last=False)
+                self.evictions[kind] += 1
+        return solution
+
+    # Usa a implementação atual da classe (instrumentada ou não) nas faltas
+    def ik(self, x, y, z):
+        return self.lookup('ik', type(self.robot).ik, x, y, z)
+
+    # fk retorna uma lista; cada chamada recebe a sua cópia
+    def fk(self, theta, d2, d3):
+        return list(self.lookup('fk', type(self.robot).fk, theta, d2, d3))
+
+    def stats(self):
+        stats = {'size': self.size, 'tolerance': self.tolerance, 'invalidations': self.invalidations}
+        for kind, entries in self.entries.items():
+            requests = self.hits[kind] + self.misses[kind]
+            stats[kind] = {'entries': len(entries), 'hits': self.hits[kind],
+                           'misses': self.misses[kind], 'evictions': self.evictions[kind],
+                           'hitRate': self.hits[kind] / requests if requests else 0.}
+        return stats
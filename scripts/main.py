@@ -1,23 +1,65 @@
 import math
+import logging
 # Conexão com o Coppelia Sim
-from coppeliasim_zmqremoteapi_client import RemoteAPIClient
-from connect import connect
+from connect import connect, getManager
+# Simulador local para rodar sem o CoppeliaSim
+from offline_sim import OfflineSim
 
 # Classe para interface com o robô
 from robot import CylindricRobot
 
 # Funções para gerar resultados
 from generate_workspace import generateWorkspace
+from path_planner import planPath
+from telemetry import TelemetryRecorder
+from instrumentation import metrics
 from plot_graphs import * 
 
-client = RemoteAPIClient()
-sim = connect()
+# Mensagens das classes do robô (logging.DEBUG mostra também cada ciclo)
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+# Sem o CoppeliaSim, usa o simulador local (offline_sim.py)
+OFFLINE = False
+
+if OFFLINE:
+    sim = OfflineSim()
+else:
+    sim = connect()
+    # Reconecta automaticamente se o simulador parar de responder
+    getManager().startHealthChecks()
+
+# Pasta do relatório: com um valor, as figuras são salvas em arquivos (em
+# paralelo, ao final) em vez de abertas em janelas
+REPORT_DIR = None
+
+# Mede ik, chamadas ao simulador e a malha de controle e salva as métricas
+# em JSON e no formato do Prometheus ao final
+INSTRUMENT = False
+if INSTRUMENT:
+    metrics.enable()
+
+# Modo sincronizado: a simulação avança apenas com sim.step() no tempo de
+# simulação, mais rápido que o tempo real e com resultados reprodutíveis
+STEPPING = False
 
 print("Simulação iniciada")
 sim.startSimulation()
 
 # Cria objeto para interface com o robô
-robot = CylindricRobot("/P0_ST", sim)
+robot = CylindricRobot("/P0_ST", sim, batchedIO=True, stepping=STEPPING)
+
+# Um simulador reiniciado perde a simulação em andamento, o modo sincronizado
+# e o script de troca de dados. Chamadas interrompidas pela reconexão ainda
+# levantam ReconnectedError; este hook só restaura o estado da execução
+def restoreRun(sim):
+    sim.startSimulation()
+    if robot.stepping:
+        sim.setStepping(True)
+    if robot.io.batched:
+        robot.io.reinstall()
+
+if not OFFLINE:
+    getManager().addReconnectHook(restoreRun)
 
 # A matrícula é: 122800
 duration = 13.0 # s
@@ -26,33 +68,43 @@ targetPosition = [0.75, 0.75, 1.75]
 
 # Executa a varedura no espaço de trabalho do robô
 wsPoints = generateWorkspace(robot)
-plotRobotWorkspace(wsPoints)
+if REPORT_DIR is None:
+    plotRobotWorkspace(wsPoints)
 
 # Mostra porque não é possível executar os pontos propostos pelo exercício
-# A linha entre os pontos final e inical cruza a região central que o robô não alcança
-plotRouteInWorkspace(startPosition, targetPosition, wsPoints)
-
-# Vamos então empurrar os pontos um pouco para fora dessa região central
-startPosition = [-0.75, -0.25, 0.75]
-targetPosition = [-0.25, 0.75, 1.75] 
-plotRouteInWorkspace(startPosition, targetPosition, wsPoints)
+# A linha entre os pontos final e inical cruza a região central que o robô não alcança.
+# Em vez de mover os pontos à mão, o planejador contorna a região central
+# com pontos intermediários tangentes a ela
+waypoints = planPath(robot, startPosition, targetPosition)
+routes = [(startPosition, targetPosition, waypoints)]
+if REPORT_DIR is None:
+    plotRouteInWorkspace(startPosition, targetPosition, wsPoints, waypoints=waypoints)
 
 # Executa trajetória
 # Move o robô para a posição inicial da simulação (teletransporta para facilitar)
 robot.setJointPosition(startPosition)
-trajTime, eefPos, eefVel, desiredVel, velTime, jointsPos = robot.executeBangBangTrajectory(targetPosition, duration)
+# Grava a telemetria da trajetória em disco (lida depois por test_vel.py)
+TELEMETRY_PATH = "telemetry"
+with TelemetryRecorder(TELEMETRY_PATH) as recorder:
+    trajTime, eefPos, eefVel, desiredVel, velTime, jointsPos = robot.executeCartesianPath(
+        targetPosition, duration, recorder=recorder)
+print(f"Telemetria salva em {TELEMETRY_PATH}")
 
-# Salva os dados num arquivo para testes
-import pickle
-filePath = "data.pkl"
-with open(filePath, 'wb') as file:
-    pickle.dump([trajTime, eefPos, eefVel, desiredVel, velTime, jointsPos], file)
-    print(f"Variable saved to {filePath}")
+robot.close()
+sim.stopSimulation()
+print("Simulação encerrada")
 
-plotEefTrajectory(trajTime, eefPos)
-plotTrajectory(trajTime, eefPos)
-plotEefVelocity(velTime, eefVel, desiredVel)
-plotJointsTrajectory(trajTime, jointsPos)
+if INSTRUMENT:
+    with open("metrics.json", "w") as file:
+        file.write(metrics.toJSON())
+    with open("metrics.prom", "w") as file:
+        file.write(metrics.toPrometheus())
 
-sim.stopSimulation()
-print("Simulação encerrada")
\ No newline at end of file
+if REPORT_DIR is None:
+    plotEefTrajectory(trajTime, eefPos)
+    plotTrajectory(trajTime, eefPos)
+    plotEefVelocity(velTime, eefVel, desiredVel)
+    plotJointsTrajectory(trajTime, jointsPos)
+else:
+    files = renderReport(REPORT_DIR, wsPoints, routes, TELEMETRY_PATH)
+    print("Figuras salvas: ", files)
\ No newline at end of file
@@ -0,0 +1,240 @@
+"""
+Simulador local que substitui o objeto sim do CoppeliaSim.
+
+Implementa as funções da API remota usadas por CylindricRobot (getObject,
+setJointTargetPosition, getJointPosition, getObjectPosition, ...) com a mesma
+assinatura, para que toda a cadeia de planejamento e execução rode sem o
+CoppeliaSim, por exemplo em benchmarks e testes.
+
+Cada junta segue o seu alvo respeitando os limites de velocidade, aceleração e
+jerk ([vel, acc, jerk], o mesmo argumento aceito por setJointTargetPosition).
+A posição da ponta é calculada pela cinemática direta do robô. No modo
+sincronizado (setStepping) a simulação avança apenas com step() e roda tão
+rápido quanto o processador permitir; caso contrário acompanha o tempo real.
+"""
+import numpy as np
+from time import perf_counter
+from robot import CylindricRobot
+
+DEFAULT_TIME_STEP = 0.005 # s
+# Velocidade, aceleração e jerk padrão das juntas ao seguir o alvo
+DEFAULT_MOTION_PARAMS = (2.0, 10.0, 1000.0)
+# Passos de integração para cobrir o erro restante perto do alvo. Como o jerk
+# é limitado, a aceleração leva alguns passos para inverter; sem essa faixa
+# linear a junta passa do alvo e oscila em torno dele sem nunca chegar
+SETTLING_STEPS = 4
+
+JOINT_NAME = "/motor"
+TIP_NAME = "/tip"
+# Cada robô ocupa um bloco de handles: três juntas e a ponta
+OBJECTS_PER_ROBOT = 4
+# Handles da base de cada robô, fora da faixa usada pelas juntas e pontas
+ROBOT_HANDLE_BASE = 100000
+
+class OfflineSim(object):
+    handle_world = -1
+    handle_scene = -12
+    handle_all = -2
+    scripttype_customization = 6
+    floatparam_simulation_time_step = 1
+
+    def __init__(self, robots=("/P0_ST",), dt=DEFAULT_TIME_STEP, motionParams=DEFAULT_MOTION_PARAMS):
+        self.dt = dt
+        self.time = 0.0
+        self.running = False
+        self.stepping = False
+        self.wallStart = None
+        self.robots = list(robots)
+        # Handles dos scripts instalados (createScript)
+        self.scripts = set()
+
+        # Handles de cada objeto da cena a partir do caminho
+        self.handles = {}
+        for index, alias in enumerate(self.robots):
+            base = 1 + index * OBJECTS_PER_ROBOT
+            for joint in range(OBJECTS_PER_ROBOT - 1):
+                self.handles[alias + JOINT_NAME + str(joint)] = base + joint
+            self.handles[alias + TIP_NAME] = base + OBJECTS_PER_ROBOT - 1
+            self.handles[alias] = ROBOT_HANDLE_BASE + index
+
+        # Estado das juntas de todos os robôs, uma linha por robô
+        shape = (len(self.robots), OBJECTS_PER_ROBOT - 1)
+        self.position = np.zeros(shape)
+        self.velocity = np.zeros(shape)
+        self.acceleration = np.zeros(shape)
+        self.target = np.zeros(shape)
+        self.motionParams = np.empty(shape + (3,))
+        self.motionParams[:] = motionParams
+
+        # Modelos cinemáticos usados para a posição da ponta e limites das juntas
+        self.kinematics = [CylindricRobot(alias, self) for alias in self.robots]
+        self.lower = np.array([model.geometry.lo for model in self.kinematics])
+        self.upper = np.array([model.geometry.hi for model in self.kinematics])
+
+    # --- Objetos da cena ---
+    def getObject(self, path, options=None):
+        if path in self.handles:
+            return self.handles[path]
+        if options and options.get('noError'):
+            return -1
+        raise Exception("Object does not exist: " + path)
+
+    # Apenas os robôs ficam na raiz da cena
+    def getObjectsInTree(self, treeBase, objectType=-2, options=0):
+        return [ROBOT_HANDLE_BASE + index for index in range(len(self.robots))]
+
+    def getObjectAlias(self, handle, options=-1):
+        for path, value in self.handles.items():
+            if value == handle:
+                return path.split('/')[-1]
+        raise Exception("Invalid handle")
+
+    # Retorna o índice do robô e da junta (ou None para a ponta) de um handle
+    def decode(self, handle):
+        robot, offset = divmod(handle - 1, OBJECTS_PER_ROBOT)
+        if handle < 1 or robot >= len(self.robots):
+            raise Exception("Invalid handle")
+        return robot, (offset if offset < OBJECTS_PER_ROBOT - 1 else None)
+
+    # --- Juntas ---
+    def setJointTargetPosition(self, handle, position, motionParams=None):
+        self.sync()
+        robot, joint = self.decode(handle)
+        self.target[robot, joint] = position
+        if motionParams:
+            self.motionParams[robot, joint, :len(motionParams)] = motionParams
+
+    def setJointPosition(self, handle, position):
+        self.sync()
+        robot, joint = self.decode(handle)
+        self.position[robot, joint] = position
+        self.target[robot, joint] = position
+        self.velocity[robot, joint] = 0.
+        self.acceleration[robot, joint] = 0.
+
+    def getJointPosition(self, handle):
+        self.sync()
+        robot, joint = self.decode(handle)
+        return float(self.position[robot, joint])
+
+    def getJointVelocity(self, handle):
+        self.sync()
+        robot, joint = self.decode(handle)
+        return float(self.velocity[robot, joint])
+
+    # --- Ponta da ferramenta ---
+    def getObjectPosition(self, handle, relativeTo=-1):
+        self.sync()
+        robot, __ = self.decode(handle)
+        return self.kinematics[robot].fkBatch(self.position[robot])[0].tolist()
+
+    def getObjectVelocity(self, handle, relativeTo=-1):
+        self.sync()
+        robot, __ = self.decode(handle)
+        # Derivada da cinemática direta na direção da velocidade das juntas
+        step = 1e-6
+        joints = np.vstack([self.position[robot], self.position[robot] + step * self.velocity[robot]])
+        points = self.kinematics[robot].fkBatch(joints)
+        linear = ((points[1] - points[0]) / step).tolist()
+        return linear, [0., 0., float(self.velocity[robot, 0])]
+
+    # --- Scripts (mesmas funções instaladas por batch_io) ---
+    def createScript(self, scriptType, scriptText, options=0, lang=''):
+        script = max(self.scripts, default=0) + 1
+        self.scripts.add(script)
+        return script
+
+    def removeScript(self, scriptHandle):
+        if scriptHandle not in self.scripts:
+            raise Exception("Invalid script handle")
+        self.scripts.remove(scriptHandle)
+
+    def callScriptFunction(self, functionName, scriptHandle, *args):
+        if scriptHandle not in self.scripts:
+            raise Exception("Invalid script handle")
+        if functionName == 'exchange':
+            motors, targets, tip, teleport = args
+            for motor, target in zip(motors, targets):
+                if teleport:
+                    self.setJointPosition(motor, target)
+                else:
+                    self.setJointTargetPosition(motor, target)
+            return self.callScriptFunction('readState', scriptHandle, motors, tip)
+        if functionName == 'exchangeMany':
+            results = [self.callScriptFunction('exchange', scriptHandle, *robotArgs)
+                       for robotArgs in zip(*args)]
+            return [result[0] for result in results], [result[1] for result in results]
+        if functionName == 'readState':
+            motors, tip = args
+            return (self.getObjectPosition(tip),
+                    [self.getJointPosition(motor) for motor in motors])
+        raise Exception("Unknown script function: " + functionName)
+
+    # --- Controle da simulação ---
+    def startSimulation(self):
+        self.running = True
+        self.time = 0.0
+        self.wallStart = perf_counter()
+
+    def stopSimulation(self):
+        self.running = False
+
+    def setStepping(self, enable):
+        self.stepping = enable
+        # Ao sair do modo sincronizado o tempo real continua a partir daqui
+        self.wallStart = perf_counter() - self.time
+
+    def step(self):
+        if self.running:
+            self.integrate(1)
+
+    def getSimulationTime(self):
+        self.sync()
+        return self.time
+
+    def getSimulationTimeStep(self):
+        return self.dt
+
+    def setFloatParam(self, parameter, value):
+        if parameter == self.floatparam_simulation_time_step:
+            self.dt = value
+
+    # Fora do modo sincronizado a simulação acompanha o tempo real
+    def sync(self):
+        if self.running and not self.stepping:
+            steps = int((perf_counter() - self.wallStart - self.time) / self.dt)
+            if steps > 0:
+                self.integrate(steps)
+
+    # Integra a dinâmica de todas as juntas por steps passos de dt
+    def integrate(self, steps):
+        dt = self.dt
+        maxVel = self.motionParams[..., 0]
+        maxAcc = self.motionParams[..., 1]
+        maxJerk = self.motionParams[..., 2]
+        for __ in range(steps):
+            error = self.target - self.position
+            # Maior velocidade que ainda permite parar no alvo, limitada perto
+            # dele a cobrir o erro em SETTLING_STEPS passos
+            distance = np.abs(error)
+            desiredVel = np.sign(error) * np.minimum(
+                np.minimum(maxVel, np.sqrt(2 * maxAcc * distance)), distance / (SETTLING_STEPS * dt))
+            desiredAcc = np.clip((desiredVel - self.velocity) / dt, -maxAcc, maxAcc)
+            self.acceleration = np.clip(desiredAcc, self.acceleration - maxJerk * dt,
+                                        self.acceleration + maxJerk * dt)
+            self.velocity += self.acceleration * dt
+            self.position += self.velocity * dt
+
+            # Chegada ao alvo
+            arrived = ((np.abs(self.target - self.position) <= np.abs(self.velocity) * dt)
+                       & (np.abs(self.velocity) <= maxAcc * dt))
+            self.position[arrived] = self.target[arrived]
+            self.velocity[arrived] = 0.
+            self.acceleration[arrived] = 0.
+
+            # Fim de curso das juntas
+            clipped = (self.position < self.lower) | (self.position > self.upper)
+            np.clip(self.position, self.lower, self.upper, out=self.position)
+            self.velocity[clipped] = 0.
+            self.acceleration[clipped] = 0.
+            self.time += dt
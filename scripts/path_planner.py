@@ -0,0 +1,96 @@
+"""
+Planejamento de caminhos que contornam a região central inalcançável.
+
+A junta radial não tem curso negativo (d3 >= 0), então o robô só alcança
+pontos com x² + y² >= a2² + df²: o cilindro central com esse raio é uma zona
+morta. Uma reta cartesiana entre dois pontos alcançáveis pode atravessá-la.
+planPath amostra a reta e verifica os pontos com ikBatch (ou com um
+ReachabilityIndex) de uma só vez; se algum ponto falhar, troca a reta por
+pontos intermediários que passam tangentes ao cilindro, com uma folga, pelo
+lado mais curto. Como theta tem fim de curso em ±π, um caminho em que theta
+salta mais de π entre amostras também é inviável, e o contorno passa pelo
+outro lado. A alternativa sem pontos intermediários é interpolar em
+espaço de juntas (trajectory.planJointTrajectory), que nunca entra na zona
+morta porque d3 varia entre dois valores válidos.
+"""
+import numpy as np
+import math
+from geometry import thetaStopCrossings
+
+DEFAULT_CLEARANCE = 0.02 # m de folga em relação à zona morta
+SEGMENT_STEP = 0.005 # m entre amostras na verificação dos segmentos
+MAX_ARC_STEP = math.pi / 8 # rad entre pontos do contorno
+
+# Raio do cilindro central que o robô não alcança
+def deadZoneRadius(robot):
+    return robot.geometry.deadZoneRadius
+
+# Amostra os segmentos de reta entre pontos consecutivos com passo máximo step
+def samplePath(waypoints, step=SEGMENT_STEP):
+    waypoints = np.asarray(waypoints, dtype=float)
+    deltas = np.diff(waypoints, axis=0)
+    counts = np.maximum(1, np.ceil(np.linalg.norm(deltas, axis=1) / step).astype(int))
+    segment = np.repeat(np.arange(len(deltas)), counts)
+    # Fração de cada amostra dentro do seu segmento
+    starts = np.cumsum(counts) - counts
+    alpha = (np.arange(len(segment)) - starts[segment]) / counts[segment]
+    points = waypoints[segment] + alpha[:, None] * deltas[segment]
+    return np.vstack([points, waypoints[-1:]])
+
+# Verifica se todos os pontos do caminho têm solução de ik e se theta não
+# cruza o fim de curso entre amostras. Com um índice de alcançabilidade
+# (reachability.ReachabilityIndex), o alcance vem da grade de voxels
+def isPathFeasible(robot, waypoints, index=None, step=SEGMENT_STEP):
+    points = samplePath(waypoints, step)
+    if index is not None and not np.all(index.areReachable(points)):
+        return False
+    joints, valid = robot.ikBatch(points)
+    if index is None and not np.all(valid):
+        return False
+    return not np.any(thetaStopCrossings(joints[valid]))
+
+# Caminho que sai de start tangente ao círculo de raio radius (plano XY),
+# percorre o círculo no sentido direction (+1 anti-horário, -1 horário) e
+# chega tangente a target. Os pontos do arco ficam num raio um pouco maior
+# para que as cordas entre eles não entrem no círculo. z varia linearmente
+# com o comprimento percorrido no plano XY
+def tangentWaypoints(start, target, radius, direction):
+    startRadius = math.hypot(start[0], start[1])
+    targetRadius = math.hypot(target[0], target[1])
+    startAngle = math.atan2(start[1], start[0]) + direction * math.acos(radius / startRadius)
+    targetAngle = math.atan2(target[1], target[0]) - direction * math.acos(radius / targetRadius)
+    sweep = (direction * (targetAngle - startAngle)) % (2 * math.pi)
+
+    steps = max(1, math.ceil(sweep / MAX_ARC_STEP))
+    angles = startAngle + direction * sweep * np.arange(steps + 1) / steps
+    arcRadius = radius / math.cos(sweep / (2 * steps))
+    arc = arcRadius * np.column_stack([np.cos(angles), np.sin(angles)])
+
+    xy = np.vstack([start[:2], arc, target[:2]])
+    length = np.concatenate([[0.], np.cumsum(np.linalg.norm(np.diff(xy, axis=0), axis=1))])
+    z = start[2] + (target[2] - start[2]) * length / length[-1]
+    return np.column_stack([xy, z]), float(length[-1])
+
+# Caminho cartesiano de start até target como uma lista de pontos (K, 3).
+# Se a reta for viável, retorna apenas os dois pontos. Caso contrário,
+# contorna a zona morta pelo lado mais curto que for viável, o que inclui
+# não cruzar o fim de curso de theta
+def planPath(robot, start, target, clearance=DEFAULT_CLEARANCE, index=None):
+    start = np.asarray(start, dtype=float)
+    target = np.asarray(target, dtype=float)
+    straight = np.array([start, target])
+    if isPathFeasible(robot, straight, index):
+        return straight
+    __, valid = robot.ikBatch(straight)
+    if not np.all(valid):
+        raise ValueError("Ponto inicial ou final fora do espaço de trabalho")
+
+    # A folga não pode afastar o contorno além dos próprios pontos
+    radius = min(deadZoneRadius(robot) + clearance,
+                 math.hypot(start[0], start[1]), math.hypot(target[0], target[1]))
+    candidates = sorted((tangentWaypoints(start, target, radius, direction)
+                         for direction in (1, -1)), key=lambda candidate: candidate[1])
+    for waypoints, __ in candidates:
+        if isPathFeasible(robot, waypoints, index):
+            return waypoints
+    raise ValueError("Não foi possível contornar a região central")
@@ -1,7 +1,96 @@
+"""
+Gráficos dos resultados da simulação.
+
+Por padrão cada função abre uma janela (plt.show()). Em modo sem interface
+(setHeadless) as figuras são salvas como arquivos na pasta de saída e
+renderReport gera todas as figuras do relatório em paralelo, uma por processo.
+Nuvens de pontos grandes (área de trabalho) são reduzidas a um ponto por voxel
+e séries temporais longas mantêm apenas o mínimo e o máximo de cada intervalo,
+então o número de pontos desenhados não cresce com a resolução ou com a taxa
+de amostragem. A animação da trajetória usa blit e pode ser exportada em vídeo.
+"""
 import numpy as np
 import math
+import os
+from concurrent.futures import ProcessPoolExecutor
 import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
+from matplotlib.animation import FuncAnimation, FFMpegWriter, PillowWriter
+from telemetry import loadTelemetry
+from analysis import centralDifference
+
+# Limites de pontos desenhados por figura
+MAX_CLOUD_POINTS = 50000
+MAX_SERIES_POINTS = 4000
+MAX_ANIMATION_FRAMES = 500
+ANIMATION_FPS = 30
+
+# Pasta onde as figuras são salvas no modo sem interface (None: mostra na tela)
+outputDir = None
+
+# Passa a salvar as figuras em arquivos na pasta indicada, sem abrir janelas
+def setHeadless(path):
+    global outputDir
+    plt.switch_backend('Agg')
+    os.makedirs(path, exist_ok=True)
+    outputDir = path
+
+# Mostra a figura ou, no modo sem interface, salva e libera a memória
+def finishFigure(fig, name):
+    fig.tight_layout()
+    if outputDir is None:
+        plt.show()
+        return None
+    path = os.path.join(outputDir, name + ".png")
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+    return path
+
+# Mantém um ponto por voxel. Se ainda sobrarem mais de maxPoints, o voxel
+# dobra de tamanho até caber
+def decimatePoints(points, maxPoints=MAX_CLOUD_POINTS, voxelSize=None):
+    points = np.asarray(points)
+    if len(points) <= maxPoints:
+        return points
+    if voxelSize is None:
+        # Tamanho inicial: divide a caixa envolvente em cerca de maxPoints voxels
+        extent = np.ptp(points[::max(1, len(points) // maxPoints)], axis=0)
+        volume = np.prod(extent[extent > 0])
+        voxelSize = (volume / maxPoints) ** (1 / max(1, np.count_nonzero(extent)))
+    # Coordenadas em colunas contíguas: as reduções ficam bem mais rápidas
+    columns = np.ascontiguousarray(points.T)
+    origin = columns.min(axis=1)
+    cells = ((columns - origin[:, None]) / voxelSize).astype(np.int64)
+    while True:
+        # Índice linear do voxel de cada ponto
+        shape = cells.max(axis=1) + 1
+        keys = np.ravel_multi_index(cells, shape)
+        occupied = np.bincount(keys, minlength=int(np.prod(shape))) > 0
+        if np.count_nonzero(occupied) <= maxPoints:
+            break
+        # Dobra o voxel: metade do índice inteiro em cada eixo
+        cells >>= 1
+    # Um representante por voxel ocupado (o último ponto escrito no voxel)
+    representative = np.empty(len(occupied), dtype=np.int64)
+    representative[keys] = np.arange(len(points))
+    return points[np.sort(representative[occupied])]
+
+# Reduz uma série temporal mantendo o mínimo e o máximo de cada intervalo de
+# amostras, para que picos não desapareçam no gráfico
+def decimateSeries(time, values, maxPoints=MAX_SERIES_POINTS):
+    time = np.asarray(time)
+    values = np.asarray(values)
+    if len(time) <= maxPoints:
+        return time, values
+    columns = values.reshape(len(values), -1)
+    buckets = max(1, maxPoints // (2 * columns.shape[1]))
+    size = len(time) // buckets
+    blocks = columns[:buckets * size].reshape(buckets, size, -1)
+    offsets = np.arange(buckets)[:, None] * size
+    index = np.concatenate([(offsets + np.argmin(blocks, axis=1)).ravel(),
+                            (offsets + np.argmax(blocks, axis=1)).ravel(),
+                            [0, len(time) - 1]])
+    index = np.unique(index)
+    return time[index], values[index]
 
 def setupPlot():
     fig = plt.figure()
@@ -15,73 +104,97 @@ def setupPlot():
     ax.grid(True)
     return fig, ax
 
-def plotRobotWorkspace(points):
-    __, ax = setupPlot()
+def plotRobotWorkspace(points, name="workspace"):
+    fig, ax = setupPlot()
+    points = decimatePoints(points)
     ax.scatter(points[:, 0], points[:, 1], points[:, 2], s=1, alpha=0.5, c='blue')
     ax.set_title('Área de Trabalho - Gerada pela cinemática direta')
-    plt.tight_layout()
-    plt.show()
+    return finishFigure(fig, name)
 
-def plotRouteInWorkspace(origin, target, workspace):
-    __, ax = setupPlot()
+# Rota em linha reta (vermelho) e, se informado, o caminho planejado que
+# contorna a região central (verde)
+def plotRouteInWorkspace(origin, target, workspace, name="route", waypoints=None):
+    fig, ax = setupPlot()
+    workspace = decimatePoints(workspace)
     ax.scatter(workspace[:, 0], workspace[:, 1], workspace[:, 2], s=1, alpha=0.5, c='blue')
     ax.plot([origin[0], target[0]], [origin[1], target[1]], [origin[2], target[2]], c='red')
+    if waypoints is not None:
+        waypoints = np.asarray(waypoints)
+        ax.plot(waypoints[:, 0], waypoints[:, 1], waypoints[:, 2], c='green', linewidth=2)
     ax.set_title('Área de Trabalho com rota proposta')
-    plt.tight_layout()
-    plt.show()
+    return finishFigure(fig, name)
 
-def plotEefTrajectory(time, toolPosition):
+# Animação da ponta do robô. Usa no máximo MAX_ANIMATION_FRAMES quadros e
+# blit, redesenhando apenas a linha e o marcador. Com videoPath (ou no modo sem
+# interface) a animação é exportada em vídeo em vez de mostrada
+def plotEefTrajectory(time, toolPosition, videoPath=None, fps=ANIMATION_FPS):
     fig, ax = setupPlot()
+    toolPosition = np.asarray(toolPosition)
+    frames = np.unique(np.linspace(0, len(time) - 1, min(len(time), MAX_ANIMATION_FRAMES)).astype(int))
     trajectory_line, = ax.plot([], [], [], 'k-', linewidth=2)
-    current_pos_marker = ax.scatter([], [], [], c='r', s=50)
+    current_pos_marker, = ax.plot([], [], [], 'ro', markersize=7)
     initialPos = toolPosition[0]
 
     def update(frame):
-        x = toolPosition[frame][0]
-        y = toolPosition[frame][1]
-        z = toolPosition[frame][2]
+        x, y, z = toolPosition[frame]
         trajectory_line.set_data([initialPos[0], x], [initialPos[1], y])
         trajectory_line.set_3d_properties([initialPos[2], z])
-        current_pos_marker._offsets3d = ([x], [y], [z])
+        current_pos_marker.set_data([x], [y])
+        current_pos_marker.set_3d_properties([z])
         return trajectory_line, current_pos_marker
 
-    ani = FuncAnimation(fig, update, frames=len(time),
-                        interval=10, blit=False, repeat=True)
+    ani = FuncAnimation(fig, update, frames=frames,
+                        interval=1000 / fps, blit=True, repeat=True)
+
+    fig.tight_layout()
+    if videoPath is None and outputDir is not None:
+        videoPath = os.path.join(outputDir, "eefTrajectory.mp4")
+    if videoPath is None:
+        plt.show()
+        return None
+    return saveAnimation(ani, videoPath, fps)
 
-    plt.tight_layout()
-    plt.show()
-    
-def plotEefVelocity(trajTime, toolVelocity, desiredVel):
-    __, axis = plt.subplots(3, 1)
-    vel = np.array(toolVelocity)
-    dVel = np.array(desiredVel)
+# Exporta a animação em vídeo com o ffmpeg. Sem ele, salva um GIF
+def saveAnimation(ani, path, fps=ANIMATION_FPS):
+    if FFMpegWriter.isAvailable():
+        writer = FFMpegWriter(fps=fps)
+    else:
+        path = os.path.splitext(path)[0] + ".gif"
+        writer = PillowWriter(fps=fps)
+    ani.save(path, writer=writer)
+    plt.close(ani._fig)
+    return path
 
-    axis[0].plot(trajTime, vel[:, 0], label='Medida')
+def plotEefVelocity(trajTime, toolVelocity, desiredVel, name="eefVelocity"):
+    fig, axis = plt.subplots(3, 1)
+    velTime, vel = decimateSeries(trajTime, np.asarray(toolVelocity))
+    trajTime, dVel = decimateSeries(trajTime, np.asarray(desiredVel))
+
+    axis[0].plot(velTime, vel[:, 0], label='Medida')
     axis[0].plot(trajTime, dVel[:, 0], label='Enviada')
     axis[0].set_ylabel('Velocidade [m/s]', fontsize=12)
     axis[0].legend()
     axis[0].set_title("vel no eixo X")
 
-    axis[1].plot(trajTime, vel[:, 1], label='Medida')
+    axis[1].plot(velTime, vel[:, 1], label='Medida')
     axis[1].plot(trajTime, dVel[:, 1], label='Enviada')
     axis[1].set_ylabel('Velocidade [m/s]', fontsize=12)
     axis[1].set_title("Velocidade no eixo Y")
     axis[1].legend()
 
-    axis[2].plot(trajTime, vel[:, 2], label='Medida')
+    axis[2].plot(velTime, vel[:, 2], label='Medida')
     axis[2].plot(trajTime, dVel[:, 2], label='Enviada')
     axis[2].set_ylabel('Velocidade [m/s]', fontsize=12)
     axis[2].set_xlabel('Tempo [s]', fontsize=12)
     axis[2].set_title("Velocidade no eixo Z")
     axis[2].legend()
 
-    plt.tight_layout()
-    plt.show()
+    return finishFigure(fig, name)
 
-def plotTrajectory(trajTime, eefPositions):
+def plotTrajectory(trajTime, eefPositions, name="trajectory"):
 
-    __, axis = plt.subplots(3, 1)
-    eefArray = np.array(eefPositions)
+    fig, axis = plt.subplots(3, 1)
+    trajTime, eefArray = decimateSeries(trajTime, np.asarray(eefPositions))
 
     # For Sine Function
     axis[0].plot(trajTime, eefArray[:, 0])
@@ -98,13 +211,12 @@ def plotTrajectory(trajTime, eefPositions):
     axis[2].set_xlabel('Tempo [s]', fontsize=12)
 
     # Combine all the operations and display
-    plt.tight_layout()
-    plt.show()
+    return finishFigure(fig, name)
 
-def plotJointsTrajectory(trajTime, jointsPos):
+def plotJointsTrajectory(trajTime, jointsPos, name="jointsTrajectory"):
 
-    __, axis = plt.subplots(3, 1)
-    jointArray = np.array(jointsPos)
+    fig, axis = plt.subplots(3, 1)
+    trajTime, jointArray = decimateSeries(trajTime, np.asarray(jointsPos))
 
     # For Sine Function
     axis[0].plot(trajTime, jointArray[:, 0])
@@ -124,5 +236,51 @@ def plotJointsTrajectory(trajTime, jointsPos):
     axis[2].set_xlabel('Tempo [s]', fontsize=12)
 
     # Combine all the operations and display
-    plt.tight_layout()
-    plt.show()
\ No newline at end of file
+    return finishFigure(fig, name)
+
+# Plota os gráficos da trajetória a partir da telemetria gravada em disco
+def plotTelemetry(path):
+    data = loadTelemetry(path)
+    trajTime = data['time']
+    eefPos = data['tipPos']
+    # Velocidade medida por diferenças centrais entre amostras
+    eefVel = centralDifference(eefPos, trajTime)
+    return [plotTrajectory(trajTime, eefPos),
+            plotEefVelocity(trajTime, eefVel, data['desiredVel']),
+            plotJointsTrajectory(trajTime, data['jointPos'])]
+
+# Animação da ponta a partir da telemetria gravada em disco
+def plotTelemetryAnimation(path):
+    data = loadTelemetry(path)
+    return plotEefTrajectory(data['time'], data['tipPos'])
+
+# Executa uma função de plotagem num processo de renderização sem interface
+def renderJob(path, functionName, args):
+    setHeadless(path)
+    return globals()[functionName](*args)
+
+# Gera as figuras do relatório em arquivos, em paralelo. A área de trabalho é
+# reduzida antes de ser enviada aos processos e a telemetria é lida do disco
+# por cada processo, então os dados grandes não são copiados entre eles.
+# routes é uma lista de pares (origem, alvo), opcionalmente com os pontos do
+# caminho planejado. Retorna os arquivos gerados
+def renderReport(path, workspace=None, routes=(), telemetryPath=None, workers=None):
+    os.makedirs(path, exist_ok=True)
+    jobs = []
+    if workspace is not None:
+        workspace = decimatePoints(workspace)
+        jobs.append(("plotRobotWorkspace", (workspace,)))
+        for index, route in enumerate(routes):
+            origin, target = route[:2]
+            jobs.append(("plotRouteInWorkspace", (origin, target, workspace, "route" + str(index)) + tuple(route[2:])))
+    if telemetryPath is not None:
+        jobs.append(("plotTelemetry", (telemetryPath,)))
+        jobs.append(("plotTelemetryAnimation", (telemetryPath,)))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(renderJob, path, name, args) for name, args in jobs]
+        files = []
+        for future in futures:
+            result = future.result()
+            files.extend(result if isinstance(result, list) else [result])
+        return files
@@ -0,0 +1,183 @@
+"""
+Perfis de trajetória ponto a ponto.
+
+Cada perfil descreve a fração percorrida s(τ) entre a origem (s = 0) e o alvo
+(s = 1) em função do tempo normalizado τ = t / T, com velocidade e aceleração
+nulas nas extremidades quando o perfil permite. Todos os métodos aceitam
+arrays de tempo e são avaliados de forma vetorizada.
+
+Os picos normalizados (peakVel, peakAcc, peakJerk) dão os máximos do perfil
+para um deslocamento unitário em T = 1 s. Para um deslocamento D em T segundos
+a velocidade máxima é peakVel * D / T, a aceleração peakAcc * D / T² e o jerk
+peakJerk * D / T³.
+
+timeOptimal indica os perfis que coincidem com o movimento de tempo mínimo
+sob limites de velocidade, aceleração e jerk (bang-bang, trapezoidal e curva
+S). Só esses podem ser reproduzidos enviando os picos como limites ao
+controlador da junta; cúbico e quíntico precisam ser amostrados e enviados a
+cada ciclo (CylindricRobot.executeJointTrajectory).
+"""
+import numpy as np
+import math
+
+class TrajectoryProfile(object):
+    name = None
+    peakVel = None
+    peakAcc = None
+    peakJerk = math.inf
+    timeOptimal = False
+    # Instantes normalizados em que o perfil muda de fase
+    events = ()
+
+    # Implementado pelos perfis: s, ds/dτ e d²s/dτ² para τ em [0, 1]
+    def normalized(self, tau):
+        raise NotImplementedError
+
+    def normalizedTime(self, time, duration):
+        return np.clip(np.asarray(time, dtype=float) / duration, 0., 1.)
+
+    def position(self, time, duration):
+        return self.normalized(self.normalizedTime(time, duration))[0]
+
+    def velocity(self, time, duration):
+        return self.normalized(self.normalizedTime(time, duration))[1] / duration
+
+    def acceleration(self, time, duration):
+        return self.normalized(self.normalizedTime(time, duration))[2] / duration**2
+
+    def eventTimes(self, duration):
+        return [event * duration for event in self.events]
+
+# Tempo mínimo: aceleração constante até a metade e frenagem depois
+class BangBangProfile(TrajectoryProfile):
+    name = 'bang-bang'
+    timeOptimal = True
+    peakVel = 2.
+    peakAcc = 4.
+    events = (0.5,)
+
+    def normalized(self, tau):
+        accelerating = tau < 0.5
+        s = np.where(accelerating, 2 * tau**2, -1 + 4 * tau - 2 * tau**2)
+        ds = np.where(accelerating, 4 * tau, 4 - 4 * tau)
+        dds = np.where(accelerating, 4., -4.)
+        return s, ds, dds
+
+# Polinômio de 3ª ordem com velocidade nula nas extremidades
+class CubicProfile(TrajectoryProfile):
+    name = 'cubic'
+    peakVel = 1.5
+    peakAcc = 6.
+
+    def normalized(self, tau):
+        s = 3 * tau**2 - 2 * tau**3
+        ds = 6 * tau - 6 * tau**2
+        dds = 6 - 12 * tau
+        return s, ds, dds
+
+# Polinômio de 5ª ordem com velocidade e aceleração nulas nas extremidades
+class QuinticProfile(TrajectoryProfile):
+    name = 'quintic'
+    peakVel = 1.875
+    peakAcc = 10 / math.sqrt(3)
+    peakJerk = 60.
+
+    def normalized(self, tau):
+        s = 10 * tau**3 - 15 * tau**4 + 6 * tau**5
+        ds = 30 * tau**2 - 60 * tau**3 + 30 * tau**4
+        dds = 60 * tau - 180 * tau**2 + 120 * tau**3
+        return s, ds, dds
+
+# Velocidade trapezoidal: acelera durante accelFraction do tempo, mantém a
+# velocidade constante e freia durante o mesmo tempo
+class TrapezoidalProfile(TrajectoryProfile):
+    name = 'trapezoidal'
+    timeOptimal = True
+
+    def __init__(self, accelFraction=1/3):
+        if not 0 < accelFraction <= 0.5:
+            raise ValueError("accelFraction deve estar entre 0 e 0.5")
+        self.accelFraction = accelFraction
+        self.peakVel = 1 / (1 - accelFraction)
+        self.peakAcc = self.peakVel / accelFraction
+        self.events = (accelFraction, 1 - accelFraction)
+
+    def normalized(self, tau):
+        f = self.accelFraction
+        vel = self.peakVel
+        acc = self.peakAcc
+        # Usa a simetria do perfil: a frenagem é o espelho da aceleração
+        mirrored = tau > 0.5
+        u = np.where(mirrored, 1 - tau, tau)
+        accelerating = u < f
+        s = np.where(accelerating, acc * u**2 / 2, vel * (u - f / 2))
+        ds = np.where(accelerating, acc * u, vel)
+        dds = np.where(accelerating, acc, 0.)
+        return (np.where(mirrored, 1 - s, s), ds, np.where(mirrored, -dds, dds))
+
+# Curva S com jerk limitado: como o trapezoidal, mas a aceleração sobe e desce
+# em rampas que ocupam jerkFraction da fase de aceleração cada uma
+class SCurveProfile(TrajectoryProfile):
+    name = 's-curve'
+    timeOptimal = True
+
+    def __init__(self, accelFraction=1/3, jerkFraction=0.25):
+        if not 0 < accelFraction <= 0.5:
+            raise ValueError("accelFraction deve estar entre 0 e 0.5")
+        if not 0 < jerkFraction <= 0.5:
+            raise ValueError("jerkFraction deve estar entre 0 e 0.5")
+        self.accelFraction = accelFraction
+        self.jerkTime = jerkFraction * accelFraction
+        self.peakVel = 1 / (1 - accelFraction)
+        self.peakAcc = self.peakVel / (accelFraction - self.jerkTime)
+        self.peakJerk = self.peakAcc / self.jerkTime
+        tj = self.jerkTime
+        self.events = tuple(sorted({tj, accelFraction - tj, accelFraction,
+                                    1 - accelFraction, 1 - accelFraction + tj, 1 - tj}))
+
+    def normalized(self, tau):
+        f = self.accelFraction
+        tj = self.jerkTime
+        acc = self.peakAcc
+        jerk = self.peakJerk
+        vel = self.peakVel
+
+        mirrored = tau > 0.5
+        u = np.where(mirrored, 1 - tau, tau)
+
+        # Fim da rampa de subida e início da rampa de descida da aceleração
+        v1 = jerk * tj**2 / 2
+        s1 = jerk * tj**3 / 6
+        w = u - tj
+        v2 = v1 + acc * (f - 2 * tj)
+        s2 = s1 + v1 * (f - 2 * tj) + acc * (f - 2 * tj)**2 / 2
+        z = u - (f - tj)
+
+        conditions = [u < tj, u < f - tj, u < f]
+        s = np.select(conditions,
+                      [jerk * u**3 / 6,
+                       s1 + v1 * w + acc * w**2 / 2,
+                       s2 + v2 * z + acc * z**2 / 2 - jerk * z**3 / 6],
+                      vel * f / 2 + vel * (u - f))
+        ds = np.select(conditions,
+                       [jerk * u**2 / 2, v1 + acc * w, v2 + acc * z - jerk * z**2 / 2],
+                       vel)
+        dds = np.select(conditions, [jerk * u, acc, acc - jerk * z], 0.)
+        return (np.where(mirrored, 1 - s, s), ds, np.where(mirrored, -dds, dds))
+
+BANG_BANG = BangBangProfile()
+CUBIC = CubicProfile()
+QUINTIC = QuinticProfile()
+TRAPEZOIDAL = TrapezoidalProfile()
+S_CURVE = SCurveProfile()
+
+PROFILES = {profile.name: profile for profile in (BANG_BANG, CUBIC, QUINTIC, TRAPEZOIDAL, S_CURVE)}
+
+# Aceita o nome do perfil ou o próprio objeto
+def getProfile(profile):
+    if isinstance(profile, TrajectoryProfile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError("Perfil de trajetória desconhecido: " + str(profile))
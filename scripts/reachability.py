@@ -0,0 +1,127 @@
+"""
+Índice de alcançabilidade do robô cilíndrico em uma grade de voxels.
+
+A grade é construída a partir da varredura do espaço de trabalho
+(generate_workspace), que percorre as juntas dentro de CylindricRobot.limits.
+Um voxel é marcado como alcançável quando algum ponto da varredura cai dentro
+dele, por isso a resolução da varredura é escolhida a partir do tamanho do
+voxel. Depois de construído, consultar um ponto custa apenas um acesso à grade.
+
+O índice pode ser salvo em disco com os bits compactados (np.packbits),
+junto com a geometria do robô usada para gerá-lo.
+"""
+import numpy as np
+import math
+from robot import CylindricRobot
+from generate_workspace import workspaceChunks
+
+DEFAULT_VOXEL_SIZE = 0.02 # m
+
+# Parâmetros que definem o espaço de trabalho e devem coincidir ao carregar
+def geometryKey(robot: CylindricRobot):
+    return np.array(robot.geometry.key(), dtype=float)
+
+class ReachabilityIndex(object):
+    def __init__(self, grid, origin, voxelSize, geometry=None):
+        self.grid = np.ascontiguousarray(grid, dtype=bool)
+        self.origin = np.asarray(origin, dtype=float)
+        self.voxelSize = float(voxelSize)
+        self.shape = np.array(self.grid.shape)
+        self.geometry = geometry
+
+    @classmethod
+    def build(cls, robot: CylindricRobot, voxelSize=DEFAULT_VOXEL_SIZE):
+        # Limites cartesianos do espaço de trabalho a partir dos limites das juntas
+        geometry = robot.geometry
+        radius = math.hypot(geometry.a2, geometry.df + geometry.hi[2])
+        zMin = geometry.d1 + geometry.lo[1] - geometry.a3
+        zMax = geometry.d1 + geometry.hi[1] - geometry.a3
+        origin = np.array([-radius, -radius, zMin])
+        extent = np.array([2 * radius, 2 * radius, zMax - zMin])
+        shape = tuple(np.ceil(extent / voxelSize).astype(int) + 1)
+        grid = np.zeros(shape, dtype=bool)
+
+        # Varredura com passo de meio voxel, inclusive no arco de maior raio
+        resolution = (voxelSize / (2 * radius), voxelSize / 2, voxelSize / 2)
+        for chunk in workspaceChunks(robot, resolution):
+            index = np.floor((chunk - origin) / voxelSize).astype(np.intp)
+            np.clip(index, 0, np.array(shape) - 1, out=index)
+            grid[index[:, 0], index[:, 1], index[:, 2]] = True
+
+        return cls(grid, origin, voxelSize, geometryKey(robot))
+
+    # Converte pontos (N, 3) para índices da grade e indica quais estão dentro dela
+    def voxelIndex(self, points):
+        index = np.floor((points - self.origin) / self.voxelSize).astype(np.intp)
+        inside = np.all((index >= 0) & (index < self.shape), axis=1)
+        return index, inside
+
+    def isReachable(self, x, y, z):
+        i = math.floor((x - self.origin[0]) / self.voxelSize)
+        j = math.floor((y - self.origin[1]) / self.voxelSize)
+        k = math.floor((z - self.origin[2]) / self.voxelSize)
+        nx, ny, nz = self.grid.shape
+        if not (0 <= i < nx and 0 <= j < ny and 0 <= k < nz):
+            return False
+        return bool(self.grid[i, j, k])
+
+    # Consulta vetorizada: retorna uma máscara (N,) de pontos alcançáveis
+    def areReachable(self, points):
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        index, inside = self.voxelIndex(points)
+        reachable = np.zeros(len(points), dtype=bool)
+        index = index[inside]
+        reachable[inside] = self.grid[index[:, 0], index[:, 1], index[:, 2]]
+        return reachable
+
+    # Amostra o segmento de reta com passo de meio voxel
+    def sampleSegment(self, start, end):
+        start = np.asarray(start, dtype=float)
+        end = np.asarray(end, dtype=float)
+        samples = max(2, int(np.ceil(2 * np.linalg.norm(end - start) / self.voxelSize)) + 1)
+        alpha = np.linspace(0., 1., samples)[:, None]
+        return start + alpha * (end - start)
+
+    def isSegmentReachable(self, start, end):
+        return bool(np.all(self.areReachable(self.sampleSegment(start, end))))
+
+    # Verifica uma trajetória formada por segmentos de reta entre os pontos
+    def isPathReachable(self, waypoints):
+        waypoints = np.asarray(waypoints, dtype=float)
+        for start, end in zip(waypoints[:-1], waypoints[1:]):
+            if not self.isSegmentReachable(start, end):
+                return False
+        return True
+
+    def save(self, path):
+        # Usa o arquivo aberto para que o numpy não altere a extensão do caminho
+        with open(path, 'wb') as file:
+            np.savez_compressed(file, bits=np.packbits(self.grid, axis=None),
+                                shape=self.shape, origin=self.origin,
+                                voxelSize=self.voxelSize,
+                                geometry=np.array([]) if self.geometry is None else self.geometry)
+
+    # Carrega o índice do disco. Se robot for informado, verifica se o índice
+    # foi gerado com a mesma geometria e limites de juntas
+    @classmethod
+    def load(cls, path, robot: CylindricRobot = None):
+        with np.load(path) as data:
+            shape = tuple(data['shape'])
+            grid = np.unpackbits(data['bits'], count=math.prod(shape)).reshape(shape)
+            index = cls(grid, data['origin'], float(data['voxelSize']), data['geometry'])
+        if robot is not None and not np.array_equal(index.geometry, geometryKey(robot)):
+            raise ValueError("Índice de alcançabilidade gerado para outra geometria do robô")
+        return index
+
+    # Carrega o índice se existir e for compatível, senão constrói e salva
+    @classmethod
+    def loadOrBuild(cls, path, robot: CylindricRobot, voxelSize=DEFAULT_VOXEL_SIZE):
+        try:
+            index = cls.load(path, robot)
+            if index.voxelSize == voxelSize:
+                return index
+        except (OSError, ValueError):
+            pass
+        index = cls.build(robot, voxelSize)
+        index.save(path)
+        return index
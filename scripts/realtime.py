@@ -0,0 +1,86 @@
+"""
+Temporização da malha de controle por prazos absolutos.
+
+Em vez de ficar consultando perf_counter() em laço, o executor calcula de
+antemão os instantes de envio (buildSchedule) e dorme até cada prazo
+(DeadlineClock.waitUntil). Como os prazos são absolutos em relação ao início,
+o atraso de um ciclo não se acumula nos seguintes. A diferença entre o instante
+real e o agendado de cada ciclo é guardada para as estatísticas de jitter.
+
+No modo sincronizado (SimulationClock) os prazos são contados em tempo de
+simulação e o executor avança a simulação passo a passo até cada prazo.
+"""
+import numpy as np
+import time
+from time import perf_counter
+
+DEFAULT_CONTROL_RATE = 5.0 # Hz, equivalente ao envio a cada 0.2 s
+
+# Gera os instantes de envio entre 0 e duration (exclusivo em 0, inclusivo em
+# duration) na frequência rate, incluindo exatamente os instantes em events
+def buildSchedule(duration, rate, events=()):
+    period = 1.0 / rate
+    ticks = np.arange(1, int(np.floor(duration * rate)) + 1) * period
+    schedule = np.concatenate([ticks, np.asarray(events, dtype=float), [duration]])
+    schedule = np.unique(schedule[(schedule > 0) & (schedule <= duration)])
+    # Remove instantes muito próximos de um evento para não enviar duas vezes seguidas
+    keep = np.ones(len(schedule), dtype=bool)
+    keep[1:] = np.diff(schedule) > 1e-9
+    return schedule[keep]
+
+class DeadlineClock(object):
+    def __init__(self, clock=perf_counter, sleep=time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self.startTime = None
+
+    def start(self):
+        self.startTime = self.clock()
+
+    def now(self):
+        return self.clock() - self.startTime
+
+    # Dorme até o prazo (em segundos desde start) e retorna o instante real
+    def waitUntil(self, deadline):
+        remaining = deadline - self.now()
+        while remaining > 0:
+            self.sleep(remaining)
+            remaining = deadline - self.now()
+        return self.now()
+
+# Estatísticas do atraso entre o instante real e o agendado, em segundos
+def jitterStats(scheduled, actual):
+    lateness = np.asarray(actual, dtype=float) - np.asarray(scheduled, dtype=float)
+    if len(lateness) == 0:
+        return {'count': 0}
+    return {'count': len(lateness),
+            'mean': float(np.mean(lateness)),
+            'std': float(np.std(lateness)),
+            'min': float(np.min(lateness)),
+            'max': float(np.max(lateness)),
+            'p50': float(np.percentile(lateness, 50)),
+            'p99': float(np.percentile(lateness, 99))}
+
+# Relógio baseado no tempo de simulação para o modo sincronizado (stepping).
+# Em vez de dormir, avança a simulação com sim.step() até o prazo, então a
+# execução roda tão rápido quanto a física permitir e é reprodutível
+class SimulationClock(object):
+    def __init__(self, sim):
+        self.sim = sim
+        self.startTime = None
+        self.dt = None
+
+    def start(self):
+        self.dt = self.sim.getSimulationTimeStep()
+        self.startTime = self.sim.getSimulationTime()
+
+    def now(self):
+        return self.sim.getSimulationTime() - self.startTime
+
+    # Avança passos de simulação até o instante mais próximo do prazo
+    def waitUntil(self, deadline):
+        now = self.now()
+        while now < deadline - self.dt / 2:
+            self.sim.step()
+            now = self.now()
+        return now
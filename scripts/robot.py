@@ -25,32 +25,134 @@ Transformação de 3 -> 0 (Cinemática direta)
 """
 import numpy as np
 import math
+import logging
 from time import perf_counter
+from realtime import DeadlineClock, SimulationClock, jitterStats, DEFAULT_CONTROL_RATE
+from trajectory import planCartesianTrajectory, planJointTrajectory, concatenatePlans, executionResults
+from profiles import BANG_BANG, getProfile
+from timing import minimumJointDuration, minimumCartesianDuration
+from batch_io import BatchedIO
+from path_planner import planPath, DEFAULT_CLEARANCE
+from blending import planBlendedJointTrajectory, planBlendedCartesianTrajectory
+from instrumentation import metrics, instrumented, InstrumentedSim
+from kinematics_cache import KinematicsCache, DEFAULT_CACHE_SIZE, DEFAULT_TOLERANCE
+from geometry import RobotGeometry, JointState
+from validation import REJECT, checkPolicy, enforcePlanLimits, enforceJointTarget, enforceJointDynamics
 
+logger = logging.getLogger(__name__)
+
+# Parâmetro lido de robot.geometry. Como a geometria é imutável, atribuir um
+# valor troca a geometria do robô por uma cópia alterada
+def geometryParameter(name):
+    def getter(self):
+        return getattr(self.geometry, name)
+
+    def setter(self, value):
+        self.geometry = self.geometry.replace(**{name: value})
+    return property(getter, setter)
+
+# Tempo de ik, ikBatch e fkBatch medido quando a instrumentação está ligada
+@instrumented("ik", "ikBatch", "fkBatch")
 class CylindricRobot(object):
-    def __init__(self, name, sim, debug = False):
+    def __init__(self, name, sim, debug = False, batchedIO = False, stepping = False,
+                 limitPolicy = REJECT):
         self.name = name
-        self.sim = sim
-        self.d1 = 0.15 # m
-        self.a2 = 0.15 # m
-        self.a3 = 0.075 # m
-        self.df = 0.25 # m
+        # Mede o tempo de cada chamada ao simulador quando a instrumentação está ligada
+        self.sim = InstrumentedSim(sim)
+        # Constantes de DH (d1, a2, a3, df em m) e limites de movimentação das
+        # juntas: -180° <-> 180°, 0 <-> 2.0 m e 0 <-> 1.2 m
+        self.geometry = RobotGeometry(0.15, 0.15, 0.075, 0.25,
+                                      [-math.pi, 0., 0.], [math.pi, 2.0, 1.2])
         self.motorBaseName = "/motor"
         self.jointNumber = 3
         self.motors = self.getMotors(self.sim)
         self.tipName = "/tip"
         self.tip = self.getTipObject(self.sim)
-        # Limite de movimentação das juntas
-        self.limits = [{'min': -math.pi, 'max': math.pi}, # rad
-                        {'min': 0., 'max': 2.0}, # m
-                        {'min': 0., 'max': 1.2}] # m
+        # Última leitura da ponta e das juntas, sobrescrita a cada ciclo
+        self.state = JointState(self.jointNumber)
 
+        # Limites dinâmicos das juntas usados no cálculo da duração mínima
+        self.velLimits = [math.pi / 2, 0.5, 0.5] # rad/s, m/s, m/s
+        self.accLimits = [math.pi, 1.0, 1.0] # rad/s², m/s², m/s²
         self.jointJerk = 1000
+        # Limites da ponta em trajetórias cartesianas com vários pontos, por eixo
+        self.linearVelLimit = 0.5 # m/s
+        self.linearAccLimit = 1.0 # m/s²
+        # O que fazer com alvos e trajetórias fora dos limites (validation.py)
+        self.limitPolicy = checkPolicy(limitPolicy)
         self.debug = debug
         self.teleport = False
+        # Instantes agendados e reais da última trajetória executada
+        # (timingStats calcula as estatísticas quando pedidas)
+        self.lastTiming = None
+        # Troca de dados com o simulador numa única chamada por ciclo
+        self.io = BatchedIO(self, install=batchedIO)
+        # No modo sincronizado a simulação só avança com step()
+        self.stepping = False
+        if stepping:
+            self.enableStepping()
+        # Cache opcional de ik e fk (enableKinematicsCache)
+        self.kinematicsCache = None
+
+    d1 = geometryParameter('d1')
+    a2 = geometryParameter('a2')
+    a3 = geometryParameter('a3')
+    df = geometryParameter('df')
+
+    # Limites no formato [{'min': ..., 'max': ...}], somente leitura. Para
+    # alterá-los, atribua uma nova lista
+    @property
+    def limits(self):
+        return self.geometry.limits()
+
+    @limits.setter
+    def limits(self, limits):
+        geometry = self.geometry
+        self.geometry = RobotGeometry.fromLimits(geometry.d1, geometry.a2, geometry.a3, geometry.df, limits)
     
+    # Ativa o modo sincronizado, opcionalmente com passo de simulação dt (s)
+    def enableStepping(self, dt=None):
+        if dt is not None:
+            self.sim.setFloatParam(self.sim.floatparam_simulation_time_step, dt)
+        self.sim.setStepping(True)
+        self.stepping = True
+
+    # Remove da cena o script de troca de dados instalado por batchedIO
+    def close(self):
+        self.io.close()
+
+    def disableStepping(self):
+        self.sim.setStepping(False)
+        self.stepping = False
+
+    # Passa a consultar ik e fk num cache LRU com coordenadas quantizadas em
+    # células de lado tolerance. Os métodos da instância substituem os da
+    # classe, então sem o cache não há nenhum custo adicional. Só compensa
+    # quando ik e fk custam mais que a consulta (ver kinematics_cache)
+    def enableKinematicsCache(self, size=DEFAULT_CACHE_SIZE, tolerance=DEFAULT_TOLERANCE):
+        self.kinematicsCache = KinematicsCache(self, size, tolerance)
+        self.ik = self.kinematicsCache.ik
+        self.fk = self.kinematicsCache.fk
+        return self.kinematicsCache
+
+    def disableKinematicsCache(self):
+        self.kinematicsCache = None
+        self.__dict__.pop('ik', None)
+        self.__dict__.pop('fk', None)
+
+    # Avança a simulação em um passo (apenas no modo sincronizado)
+    def step(self):
+        self.sim.step()
+
+    # Relógio usado na execução: tempo de simulação no modo sincronizado,
+    # tempo real caso contrário
+    def createClock(self):
+        if self.stepping:
+            return SimulationClock(self.sim)
+        return DeadlineClock()
+
     def setJointPosition(self, positon):
-        jointPos = self.ik(positon[0], positon[1], positon[2])
+        jointPos = enforceJointTarget(self, self.ik(positon[0], positon[1], positon[2]), self.limitPolicy)
         self.sim.setJointPosition(self.motors[0], jointPos[0])
         self.sim.setJointPosition(self.motors[1], jointPos[1])
         self.sim.setJointPosition(self.motors[2], jointPos[2])
@@ -61,7 +163,7 @@ class CylindricRobot(object):
     def getMotors(self, sim):
         motors = []
         for i in range(0, self.jointNumber):
-            print("Getting motor ", self.name + self.motorBaseName + str(i))
+            logger.debug("Getting motor %s", self.name + self.motorBaseName + str(i))
             result = sim.getObject(self.name + self.motorBaseName + str(i))
             if not result:
                 raise KeyError("Unknow motor")
@@ -81,18 +183,31 @@ class CylindricRobot(object):
         for i in range(0, self.jointNumber):
             jointPos.append(self.sim.getJointPosition(self.motors[i]))
         return jointPos
+
+    # Lê a posição das juntas em out (por padrão o buffer self.state.joints)
+    # sem criar uma lista nova
+    def readJoints(self, out=None):
+        out = self.state.joints if out is None else out
+        for i in range(self.jointNumber):
+            out[i] = self.sim.getJointPosition(self.motors[i])
+        return out
     
     def jointMove(self, theta, d2, d3):
         if self.debug:
-            print("Joint move to (", round(theta,3), " °,", round(d2,3), " m,", round(d3,3), " m)")
+            logger.info("Joint move to ( %.3f °, %.3f m, %.3f m)", theta, d2, d3)
+        theta, d2, d3 = enforceJointTarget(self, (theta, d2, d3), self.limitPolicy)
         self.sim.setJointTargetPosition(self.motors[0], theta)
         self.sim.setJointTargetPosition(self.motors[1], d2)
         self.sim.setJointTargetPosition(self.motors[2], d3)
     
     def cartesianMove(self, x, y, z):
         if self.debug:
-            print("Cartesian move to (", round(x,3), " ,", round(y,3), " ,", round(z,3), " ) m")
-        [theta, d2, d3] = self.ik(x, y, z)
+            logger.info("Cartesian move to ( %.3f , %.3f , %.3f ) m", x, y, z)
+        [theta, d2, d3] = enforceJointTarget(self, self.ik(x, y, z), self.limitPolicy)
+        self.sendJoints(theta, d2, d3)
+
+    # Envia a posição das juntas como alvo ou teletransporta se teleport estiver ativo
+    def sendJoints(self, theta, d2, d3):
         if not self.teleport:
             self.sim.setJointTargetPosition(self.motors[0], theta)
             self.sim.setJointTargetPosition(self.motors[1], d2)
@@ -102,110 +217,206 @@ class CylindricRobot(object):
             self.sim.setJointPosition(self.motors[1], d2)
             self.sim.setJointPosition(self.motors[2], d3)
 
-    def cartesianTrajectoryMove(self, x, y, z, duration):
-        print("Cartesian Trajectory move to (", x, " ,", y, " ,", z, " ) m")
-        [theta, d2, d3] = self.ik(x, y, z)
-        print("Joint target is (", round(theta,3), " °,", round(d2,3), " m,", round(d3,3), " m)")
+    # Sem duração informada, usa a menor duração que respeita os limites das
+    # juntas. Com a política RESCALE, uma duração curta demais é aumentada.
+    # Os picos do perfil são enviados como limites e o controlador da junta
+    # executa o movimento de tempo mínimo sob eles, então só perfis com
+    # timeOptimal são aceitos; cúbico e quíntico usam executeJointTrajectory
+    def cartesianTrajectoryMove(self, x, y, z, duration=None, profile=BANG_BANG):
+        profile = getProfile(profile)
+        if not profile.timeOptimal:
+            raise ValueError("O perfil " + profile.name + " não é de tempo mínimo, use executeJointTrajectory")
+        logger.info("Cartesian Trajectory move to ( %s , %s , %s ) m", x, y, z)
+        [theta, d2, d3] = enforceJointTarget(self, self.ik(x, y, z), self.limitPolicy)
+        logger.info("Joint target is ( %.3f °, %.3f m, %.3f m)", theta, d2, d3)
         jointPos = self.getCurrentJointPostions()
-        vel, acc = self.calculateExecutionParams([theta, d2, d3], jointPos, duration)
-        print("Current joint position is: ", [round(elem, 3) for elem in jointPos])
-        print("Execution velocity: ", [round(elem, 3) for elem in vel])
-        print("Execution acceleration: ", [round(elem, 3) for elem in acc])
-        self.sim.setJointTargetPosition(self.motors[0], theta, [vel[0], acc[0], self.jointJerk])
-        self.sim.setJointTargetPosition(self.motors[1], d2, [vel[1], acc[1], self.jointJerk])
-        self.sim.setJointTargetPosition(self.motors[2], d3, [vel[2], acc[2], self.jointJerk])
-
-    def calculateExecutionParams(self, target, currentPosition, duration):
+        if duration is None:
+            duration = minimumJointDuration(self, jointPos, [theta, d2, d3], profile)
+            logger.info("Minimum duration: %.3f s", duration)
+        # Já no alvo: não há perfil a seguir, apenas reafirma os alvos
+        if duration <= 0:
+            if any(target != current for target, current in zip((theta, d2, d3), jointPos)):
+                raise ValueError("Duração precisa ser positiva para mover as juntas")
+            self.sim.setJointTargetPosition(self.motors[0], theta)
+            self.sim.setJointTargetPosition(self.motors[1], d2)
+            self.sim.setJointTargetPosition(self.motors[2], d3)
+            return
+        vel, acc, jerk = self.calculateExecutionParams([theta, d2, d3], jointPos, duration, profile)
+        timeScale = enforceJointDynamics(self, vel, acc, self.limitPolicy)
+        if timeScale > 1:
+            duration *= timeScale
+            logger.info("Duration rescaled to %.3f s", duration)
+            vel, acc, jerk = self.calculateExecutionParams([theta, d2, d3], jointPos, duration, profile)
+        logger.info("Current joint position is: %s", [round(elem, 3) for elem in jointPos])
+        logger.info("Execution velocity: %s", [round(elem, 3) for elem in vel])
+        logger.info("Execution acceleration: %s", [round(elem, 3) for elem in acc])
+        self.sim.setJointTargetPosition(self.motors[0], theta, [vel[0], acc[0], jerk[0]])
+        self.sim.setJointTargetPosition(self.motors[1], d2, [vel[1], acc[1], jerk[1]])
+        self.sim.setJointTargetPosition(self.motors[2], d3, [vel[2], acc[2], jerk[2]])
+
+    # Velocidade, aceleração e jerk máximos de cada junta para que o movimento
+    # siga o perfil escolhido na duração desejada. Perfis sem jerk limitado e
+    # juntas que não se movem (jerk 0 travaria a junta) usam o jerk padrão
+    def calculateExecutionParams(self, target, currentPosition, duration, profile=BANG_BANG):
+        profile = getProfile(profile)
         vel = []
         acc = []
+        jerk = []
         for i in range(0, self.jointNumber):
-            jointVel = 2 * (target[i] - currentPosition[i]) / duration
-            jointAcc = 4 * (target[i] - currentPosition[i]) / duration**2
-            vel.append(abs(jointVel))
-            acc.append(abs(jointAcc))
-        return vel, acc
-
-    def executeBangBangTrajectory(self, target, duration):
-        print("Executing linear Bang Bang trajectory to (",  
-              [round(elem, 3) for elem in target], " in " , duration, "s")
-        COORDINATES = 3
-        # Função lambda que calcula o valor de alfa na etapa de aceleração
-        accAlpha = lambda time : 2 * (time**2) / (duration**2) 
-        # Função lambda que calcula o valor de alfa na etapa de frenagem
-        brakeAlpha = lambda time : -1 + (4 * time / duration) - (2 * (time**2) / (duration**2))
-        
+            distance = abs(target[i] - currentPosition[i])
+            vel.append(profile.peakVel * distance / duration)
+            acc.append(profile.peakAcc * distance / duration**2)
+            if math.isinf(profile.peakJerk) or distance == 0:
+                jerk.append(self.jointJerk)
+            else:
+                jerk.append(profile.peakJerk * distance / duration**3)
+        return vel, acc, jerk
+
+    def executeBangBangTrajectory(self, target, duration, controlRate=DEFAULT_CONTROL_RATE,
+                                  clock=None, recorder=None):
+        return self.executeCartesianTrajectory(target, duration, BANG_BANG, controlRate, clock, recorder)
+
+    def executeCartesianTrajectory(self, target, duration=None, profile=BANG_BANG,
+                                   controlRate=DEFAULT_CONTROL_RATE, clock=None, recorder=None):
+        profile = getProfile(profile)
+        initialPos = self.getCurrentPosition()
+        if duration is None:
+            duration = minimumCartesianDuration(self, initialPos, target, profile)
+        logger.info("Executing linear %s trajectory to ( %s in %s s at %s Hz",
+                    profile.name, [round(elem, 3) for elem in target], duration, controlRate)
+        # Todo o perfil é calculado antes de iniciar o movimento
+        plan = planCartesianTrajectory(self, initialPos, target, duration, controlRate, profile)
+        return self.executePlan(plan, clock, recorder)
+
+    # Trajetória em espaço de juntas até o alvo cartesiano. O caminho da ponta
+    # não é uma reta, mas nunca passa pela região central inalcançável
+    def executeJointTrajectory(self, target, duration=None, profile=BANG_BANG,
+                               controlRate=DEFAULT_CONTROL_RATE, clock=None, recorder=None):
+        profile = getProfile(profile)
+        initialJoints = self.getCurrentJointPostions()
+        targetJoints = self.ik(target[0], target[1], target[2])
+        if duration is None:
+            duration = minimumJointDuration(self, initialJoints, targetJoints, profile)
+        logger.info("Executing joint %s trajectory to ( %s in %s s at %s Hz",
+                    profile.name, [round(elem, 3) for elem in target], duration, controlRate)
+        plan = planJointTrajectory(self, initialJoints, targetJoints, duration, controlRate, profile)
+        return self.executePlan(plan, clock, recorder)
+
+    # Trajetória cartesiana que contorna a região central quando a reta até o
+    # alvo passa por ela (path_planner.planPath). Cada trecho reto usa o perfil
+    # escolhido. Sem duration, cada trecho usa sua duração mínima; com ela, o
+    # tempo é dividido proporcionalmente às durações mínimas, então todos os
+    # trechos ficam igualmente folgados em relação aos limites das juntas
+    def executeCartesianPath(self, target, duration=None, profile=BANG_BANG,
+                             controlRate=DEFAULT_CONTROL_RATE, clock=None, recorder=None,
+                             clearance=DEFAULT_CLEARANCE):
+        profile = getProfile(profile)
+        waypoints = planPath(self, self.getCurrentPosition(), target, clearance)
+        durations = np.array([minimumCartesianDuration(self, start, end, profile)
+                              for start, end in zip(waypoints[:-1], waypoints[1:])])
+        if duration is not None:
+            durations *= duration / np.sum(durations)
+        logger.info("Executing %s path with %d segments to ( %s in %.3f s", profile.name,
+                    len(waypoints) - 1, [round(elem, 3) for elem in target], float(np.sum(durations)))
+        plan = concatenatePlans([planCartesianTrajectory(self, start, end, segment, controlRate, profile)
+                                 for start, end, segment in zip(waypoints[:-1], waypoints[1:], durations)])
+        return self.executePlan(plan, clock, recorder)
+
+    # Trajetória pelos pontos informados, partindo da posição atual, sem parar
+    # nos pontos intermediários (blending.py). Com jointTargets os pontos são
+    # posições das juntas; senão são pontos cartesianos, concordados em espaço
+    # de juntas ou, com linear, em linha reta no espaço cartesiano. Sem
+    # duration, usa a menor duração dentro dos limites
+    def executeWaypointTrajectory(self, waypoints, duration=None, jointTargets=False, linear=False,
+                                  controlRate=DEFAULT_CONTROL_RATE, clock=None, recorder=None):
+        waypoints = np.asarray(waypoints, dtype=float).reshape(-1, self.jointNumber)
+        if jointTargets:
+            path = np.vstack([self.getCurrentJointPostions(), waypoints])
+            plan = planBlendedJointTrajectory(self, path, duration, controlRate)
+        elif linear:
+            path = np.vstack([self.getCurrentPosition(), waypoints])
+            plan = planBlendedCartesianTrajectory(self, path, duration, controlRate)
+        else:
+            joints, valid = self.ikBatch(waypoints)
+            if not np.all(valid):
+                raise ValueError("Falhou em calcular ik")
+            path = np.vstack([self.getCurrentJointPostions(), joints])
+            plan = planBlendedJointTrajectory(self, path, duration, controlRate)
+        logger.info("Executing blended trajectory through %d points in %.3f s at %s Hz",
+                    len(waypoints), plan.duration, controlRate)
+        return self.executePlan(plan, clock, recorder)
+
+    # Executa um plano pré-calculado (trajectory.TrajectoryPlan). A cada ciclo
+    # apenas envia as juntas já calculadas e lê a posição atual do robô. Se um
+    # recorder (telemetry.TelemetryRecorder) for informado, cada ciclo é gravado.
+    # O plano inteiro é validado contra os limites antes do primeiro envio
+    def executePlan(self, plan, clock=None, recorder=None):
+        plan = enforcePlanLimits(self, plan, self.limitPolicy)
         # Dados de execução da trajetória em coordenada cartesianas
         initialPos = self.getCurrentPosition()
-        lastPos = initialPos
-        lastDPos = initialPos
-
-        # Listas para armazenar dados
-        jointsPosition = []
-        endEffectorPos = []
-        endEffectorVel = []
-        desiredVel = []
-        trajectoryTime = []
-        velocityTime = []
-
-        # Variáveis de temporização
-        switchTime = duration / 2.0
-        startTime = perf_counter() # Mais preciso que time.time()
-        lastTime = 0.0
-        now = 0.0
-        desiredVel.append([0,0,0])
-        endEffectorVel.append([0,0,0])
-        velocityTime.append(0)
-        while perf_counter() - startTime <= duration:
-            
-            now = (perf_counter() - startTime) 
-            # Fixa o tempo de envio para 0.2 s e envia o ponto de inflexão da velocidade
-            if now - lastTime < 0.2 and abs(now - switchTime) > 0.001:
-                continue
-
-            # Define a função alpha utilizada
-            if now < switchTime:
-                alpha = accAlpha(now)
-            else:
-                alpha = brakeAlpha(now)
+        samples = len(plan)
+        endEffectorPos = np.empty((samples, 3))
+        jointsPosition = np.empty((samples, self.jointNumber))
+        actualTimes = np.empty(samples)
+        # Instantes e alvos convertidos uma única vez: o laço apenas indexa
+        # listas e grava nos buffers de self.state, sem alocar por ciclo
+        times = plan.times.tolist()
+        targets = plan.joints.tolist()
+        state = self.state
 
-            # Calcula a posição alvo nesse instante
-            pos = []
-            for i in range(0, COORDINATES):
-                # Lista com as posições x, y, z nessa ordem
-                pos.append(initialPos[i] + alpha * (target[i] - initialPos[i]))
+        clock = self.createClock() if clock is None else clock
+        self.io.resetStats()
+        # Estados lidos uma vez: desligados, o laço só testa variáveis locais
+        collecting = metrics.enabled
+        verbose = logger.isEnabledFor(logging.DEBUG)
+        clock.start()
+        for tick in range(samples):
+            # Dorme até o próximo prazo em vez de consultar o relógio em laço
+            now = clock.waitUntil(times[tick])
+            actualTimes[tick] = now
+            if collecting:
+                start = perf_counter()
 
-            # Realiza a movimentação do robô
-            self.cartesianMove(*pos)
+            # Realiza a movimentação do robô e lê o estado atual
+            self.io.exchangeInto(targets[tick], state)
+            endEffectorPos[tick] = state.tip
+            jointsPosition[tick] = state.joints
+            if recorder is not None:
+                recorder.append(time=now, scheduled=times[tick],
+                                tipPos=state.tip, jointPos=state.joints,
+                                desiredPos=plan.cartesian[tick], desiredVel=plan.desiredVel[tick])
 
             # Mostra o progresso da trajetória
-            curPos = self.getCurrentPosition()
-            print("Time:", round(now, 4), "    Position: ", [round(elem, 3) for elem in curPos])
-            print("")
-
-            # Mede a velocidade executada e a velocidade final
-            dVel = [(cur - last) / (now - lastTime) for cur, last in zip(pos, lastDPos)]
-            lastDPos = pos
-            vel = [(cur - last) / (now - lastTime) for cur, last in zip(curPos, lastPos)]
-            lastPos = curPos
-            lastTime = now
-            desiredVel.append(dVel)
-            endEffectorVel.append(vel)
-            velocityTime.append(now)
-
-            # Salva os dados para plot dos gráficos
-            trajectoryTime.append(now) 
-            endEffectorPos.append(curPos)
-            jointsPosition.append(self.getCurrentJointPostions())
-
-        print("Time:", round(duration,2), "    Position: ", 
-              [round(elem, 3) for elem in self.getCurrentPosition()])
-
-        # Salva os valores finais de velocidade 
-        endEffectorVel.append([0,0,0])
-        desiredVel.append([0,0,0])
-        velocityTime.append(duration)
-        
-        return trajectoryTime, endEffectorPos, endEffectorVel, desiredVel, velocityTime, jointsPosition
+            if verbose:
+                logger.debug("Time: %.4f    Position: %s", now, np.round(state.tip, 3).tolist())
+            if collecting:
+                elapsed = perf_counter() - start
+                metrics.addTime("tick", elapsed)
+                metrics.observe("tick", elapsed)
+                metrics.observe("lateness", max(0., now - times[tick]))
+
+        if collecting:
+            metrics.increment("ticks", samples)
+            metrics.increment("trajectories")
+        if recorder is not None:
+            recorder.flush()
+        self.lastTiming = (plan.times, actualTimes)
+        # Percentis e leituras extras só quando o log vai mostrá-los
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Time: %.2f    Position: %s", plan.duration,
+                        [round(elem, 3) for elem in self.getCurrentPosition()])
+            logger.info("Jitter (s): %s", {key: round(value, 6) for key, value in self.timingStats.items()})
+            logger.info("I/O: %s", self.io.stats())
+
+        return executionResults(plan, initialPos, actualTimes, endEffectorPos, jointsPosition)
+
+    # Estatísticas de atraso entre o instante real e o agendado da última
+    # trajetória executada (realtime.jitterStats), ou None
+    @property
+    def timingStats(self):
+        if self.lastTiming is None:
+            return None
+        return jitterStats(*self.lastTiming)
 
     # Retorna a matriz de rotação para transformação direta
     def genDirRotMatrix (self, theta):
@@ -217,58 +428,88 @@ class CylindricRobot(object):
              [1,   0,   0]])
     
     def genDirTransVector(self, theta, d2, d3):
+        geometry = self.geometry
         c1 = math.cos(theta)
         s1 = math.sin(theta)
-        return [-s1*(d3 + self.df) + c1 * self.a2, 
-                c1*(d3 + self.df) + s1 * self.a2, 
-                self.d1 + d2 - self.a3]
+        return [-s1*(d3 + geometry.df) + c1 * geometry.a2, 
+                c1*(d3 + geometry.df) + s1 * geometry.a2, 
+                geometry.d1 + d2 - geometry.a3]
 
+    # Cinemática direta de um ponto com math: montar um array para fkBatch
+    # custa dezenas de vezes mais que a própria conta. As contas são as mesmas
+    # de fkBatch; só sin e cos vêm de bibliotecas diferentes (math e NumPy),
+    # que podem diferir no último bit em algumas plataformas
     def fk(self, theta, d2, d3):
-        return self.genDirTransVector(theta, d2, d3)
+        geometry = self.geometry
+        c1 = math.cos(theta)
+        s1 = math.sin(theta)
+        r = d3 + geometry.df
+        return [-s1*r + c1*geometry.a2, c1*r + s1*geometry.a2, geometry.d1 + d2 - geometry.a3]
 
+    # Cinemática direta vetorizada: joints é um array (N, 3) com [theta, d2, d3]
+    # em cada linha e o retorno é um array (N, 3) com [x, y, z]
+    def fkBatch(self, joints):
+        geometry = self.geometry
+        joints = np.asarray(joints, dtype=float).reshape(-1, self.jointNumber)
+        theta = joints[:, 0]
+        c1 = np.cos(theta)
+        s1 = np.sin(theta)
+        points = np.empty_like(joints)
+        points[:, 0] = -s1*(joints[:, 2] + geometry.df) + c1 * geometry.a2
+        points[:, 1] = c1*(joints[:, 2] + geometry.df) + s1 * geometry.a2
+        points[:, 2] = geometry.d1 + joints[:, 1] - geometry.a3
+        return points
+
+    # Cinemática inversa em forma fechada. Pela cinemática direta, (x, y) é o
+    # vetor (a2, d3 + df) rotacionado de theta em torno de Z, logo:
+    #   r = d3 + df = sqrt(x² + y² - a2²)
+    #   theta = atan2(y a2 - x r, x a2 + y r)
+    # A raiz negativa de r sempre resulta em d3 < 0, então só existe uma
+    # solução. Pontos com x² + y² < a2² (incluindo a origem) ou r < df não são
+    # alcançáveis. Não há divisão por y, então y == 0 é tratado normalmente.
+    # Em relação a ikBatch, d2 e d3 são idênticos bit a bit e theta pode
+    # diferir em 1 ulp (math.atan2 e np.arctan2 arredondam de formas
+    # diferentes em ~2% dos pontos)
     def ik(self, x, y, z):
-        d2 = z - self.d1 + self.a3
-        thetaList = self.calculateIkTheta(x, y)
-        theta = None
-        d3 = None
-        d3List = []
-        for angle in thetaList:
-            c1 = math.cos(angle)
-            s1 = math.sin(angle)
-            d3 = y * c1 - x * s1 - self.df
-            d3List.append(d3)
-        
-        if self.debug:
-            print("Soluções para theta: ", thetaList)
-            print("Soluções para d3: ", d3List)
-    
-        if d3List[0] >= 0:
-            d3 = d3List[0]
-            theta = thetaList[0]
-        elif d3List[1] >= 0:
-            d3 = d3List[1]
-            theta = thetaList[1]
-        else:
+        geometry = self.geometry
+        a2 = geometry.a2
+        r2 = x*x + y*y - a2*a2
+        if r2 < 0:
+            raise ValueError("Falhou em calcular ik")
+        r = math.sqrt(r2)
+        d3 = r - geometry.df
+        if d3 < 0:
             raise ValueError("Falhou em calcular ik")
+        theta = math.atan2(y*a2 - x*r, x*a2 + y*r)
+        d2 = z - geometry.d1 + geometry.a3
         if self.debug:
-            print("Solução da cinemática inversa: ", 
-                [round(math.degrees(theta), 3), round(d2, 3), round(d3, 3)])
+            logger.info("Solução da cinemática inversa: %s",
+                        [round(math.degrees(theta), 3), round(d2, 3), round(d3, 3)])
         
-        return [theta, d2, d3]
-
-    def calculateIkTheta(self, x, y):
-        x2 = x**2
-        y2 = y**2
-        y4 = y**4
-        a2 = self.a2
-        a2_2 =self.a2**2
-        d = x**2 + y**2
-        denSqrtTerm = math.sqrt(x2*y2 + y4 - y2*a2_2)
-        numSqrtTerm = math.sqrt(-y2 * (-x2 - y2 + a2_2))
-        root1DenTerm = (x * a2 - denSqrtTerm) / d
-        root1NumTerm = ((x * numSqrtTerm / d) - (x2 * a2 / d) + a2) / y
-        root1 = math.atan2(root1NumTerm, root1DenTerm)
-        root2DenTerm = (x * a2 + denSqrtTerm) / d
-        root2NumTerm = (-(x * numSqrtTerm / d) - (x2 * a2 / d) + a2) / y
-        root2 = math.atan2(root2NumTerm, root2DenTerm)
-        return [root1, root2]
\ No newline at end of file
+        return (theta, d2, d3)
+
+    # Cinemática inversa vetorizada: points é um array (N, 3) com [x, y, z] em
+    # cada linha. Retorna as juntas (N, 3) e uma máscara (N,) indicando quais
+    # linhas possuem solução válida. Linhas inválidas são preenchidas com NaN.
+    def ikBatch(self, points):
+        geometry = self.geometry
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        x = points[:, 0]
+        y = points[:, 1]
+        a2 = geometry.a2
+        joints = np.empty_like(points)
+
+        with np.errstate(invalid='ignore'):
+            r = np.sqrt(x*x + y*y - a2*a2)
+        # NaN (raiz de número negativo) nunca é válido
+        valid = r >= geometry.df
+        r[~valid] = np.nan
+        joints[:, 0] = np.arctan2(y*a2 - x*r, x*a2 + y*r)
+        joints[:, 1] = np.where(valid, points[:, 2] - geometry.d1 + geometry.a3, np.nan)
+        joints[:, 2] = r - geometry.df
+
+        if self.debug:
+            logger.info("Soluções válidas da cinemática inversa: %d de %d",
+                        np.count_nonzero(valid), len(valid))
+
+        return joints, valid
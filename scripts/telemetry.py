@@ -0,0 +1,116 @@
+"""
+Gravação de telemetria em formato colunar no disco.
+
+Cada coluna (tempo, posição da ponta, posição das juntas, ...) tem tipo e
+formato fixos e é guardada num buffer circular do NumPy alocado uma única vez.
+Quando o buffer enche, ou em flush(), as amostras pendentes são anexadas ao
+arquivo binário da coluna (<pasta>/<coluna>.bin). O arquivo meta.json descreve
+o tipo e o formato de cada coluna, então os dados podem ser lidos de volta com
+np.memmap (loadTelemetry) sem carregar tudo na memória. Se a execução for
+interrompida, tudo o que já foi descarregado continua legível.
+"""
+import numpy as np
+import json
+import os
+
+META_FILE = "meta.json"
+DEFAULT_BUFFER_SIZE = 1024
+
+# Colunas gravadas durante a execução de uma trajetória
+TRAJECTORY_COLUMNS = {
+    'time': ((), np.float64), # Instante real de envio (s)
+    'scheduled': ((), np.float64), # Instante agendado (s)
+    'tipPos': ((3,), np.float64), # Posição medida da ponta (m)
+    'jointPos': ((3,), np.float64), # Posição medida das juntas
+    'desiredPos': ((3,), np.float64), # Posição cartesiana enviada (m)
+    'desiredVel': ((3,), np.float64), # Velocidade cartesiana desejada (m/s)
+}
+
+class TelemetryRecorder(object):
+    def __init__(self, path, columns=TRAJECTORY_COLUMNS, bufferSize=DEFAULT_BUFFER_SIZE):
+        self.path = path
+        self.bufferSize = bufferSize
+        os.makedirs(path, exist_ok=True)
+
+        # Metadados primeiro, para que os arquivos possam ser lidos a qualquer momento
+        meta = {'columns': {name: {'shape': list(shape), 'dtype': np.dtype(dtype).str}
+                            for name, (shape, dtype) in columns.items()}}
+        with open(os.path.join(path, META_FILE), 'w') as file:
+            json.dump(meta, file, indent=2)
+
+        self.buffers = {name: np.zeros((bufferSize,) + tuple(shape), dtype=dtype)
+                        for name, (shape, dtype) in columns.items()}
+        self.files = {name: open(os.path.join(path, name + ".bin"), 'wb') for name in columns}
+        self.count = 0 # Amostras recebidas
+        self.flushed = 0 # Amostras já gravadas no disco
+
+    def __len__(self):
+        return self.count
+
+    # Adiciona uma amostra. Colunas não informadas ficam com o valor anterior
+    # daquela posição do buffer
+    def append(self, **values):
+        if self.count - self.flushed == self.bufferSize:
+            self.flush()
+        row = self.count % self.bufferSize
+        for name, value in values.items():
+            self.buffers[name][row] = value
+        self.count += 1
+
+    # Grava no disco as amostras pendentes do buffer circular
+    def flush(self):
+        start = self.flushed % self.bufferSize
+        pending = self.count - self.flushed
+        if pending == 0:
+            return
+        end = start + pending
+        for name, buffer in self.buffers.items():
+            file = self.files[name]
+            if end <= self.bufferSize:
+                file.write(buffer[start:end].tobytes())
+            else:
+                file.write(buffer[start:].tobytes())
+                file.write(buffer[:end - self.bufferSize].tobytes())
+            file.flush()
+        self.flushed = self.count
+
+    # Últimas n amostras de uma coluna (no máximo o tamanho do buffer)
+    def recent(self, name, n=None):
+        n = min(self.count, self.bufferSize if n is None else n, self.bufferSize)
+        index = np.arange(self.count - n, self.count) % self.bufferSize
+        return self.buffers[name][index]
+
+    def close(self):
+        self.flush()
+        for file in self.files.values():
+            file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# Lê as colunas gravadas como arrays mapeados em memória (somente leitura).
+# Todas as colunas são cortadas no menor número de amostras completas
+def loadTelemetry(path):
+    with open(os.path.join(path, META_FILE)) as file:
+        meta = json.load(file)
+
+    columns = {}
+    for name, info in meta['columns'].items():
+        dtype = np.dtype(info['dtype'])
+        shape = tuple(info['shape'])
+        rowSize = dtype.itemsize * int(np.prod(shape))
+        rows = os.path.getsize(os.path.join(path, name + ".bin")) // rowSize
+        columns[name] = (dtype, shape, rows)
+
+    rows = min(info[2] for info in columns.values())
+    data = {}
+    for name, (dtype, shape, __) in columns.items():
+        if rows == 0:
+            data[name] = np.empty((0,) + shape, dtype=dtype)
+        else:
+            data[name] = np.memmap(os.path.join(path, name + ".bin"), dtype=dtype,
+                                   mode='r', shape=(rows,) + shape)
+    return data
@@ -0,0 +1,77 @@
+"""
+Cálculo da duração mínima de movimentos respeitando os limites dinâmicos das
+juntas (CylindricRobot.velLimits, accLimits e jointJerk).
+
+Todas as juntas seguem o mesmo perfil normalizado s(τ), então o movimento é
+sincronizado: todas começam e terminam juntas. Para um perfil fixo, a
+velocidade de cada junta escala com 1/T, a aceleração com 1/T² e o jerk com
+1/T³, o que permite obter a duração mínima em forma fechada a partir dos
+máximos calculados para T = 1 s.
+"""
+import numpy as np
+from profiles import BANG_BANG, TrapezoidalProfile, getProfile
+from geometry import thetaStopCrossings
+
+# Amostras usadas para avaliar o caminho de movimentos cartesianos
+PATH_SAMPLES = 2001
+
+# Limites dinâmicos (velocidade, aceleração e jerk) de cada junta
+def jointDynamicLimits(robot):
+    return (np.asarray(robot.velLimits, dtype=float),
+            np.asarray(robot.accLimits, dtype=float),
+            np.full(robot.jointNumber, float(robot.jointJerk)))
+
+# Menor duração tal que os picos normalizados (T = 1 s) de cada junta respeitem
+# os limites. Jerk é ignorado quando for None (perfis sem jerk limitado)
+def durationFromPeaks(robot, peakVel, peakAcc, peakJerk=None):
+    velLimits, accLimits, jerkLimits = jointDynamicLimits(robot)
+    duration = max(np.max(peakVel / velLimits), np.max(np.sqrt(peakAcc / accLimits)))
+    if peakJerk is not None:
+        duration = max(duration, np.max(np.cbrt(peakJerk / jerkLimits)))
+    return float(duration)
+
+# Duração mínima de um movimento em espaço de juntas com o perfil escolhido
+def minimumJointDuration(robot, start, target, profile=BANG_BANG):
+    profile = getProfile(profile)
+    distance = np.abs(np.asarray(target, dtype=float) - np.asarray(start, dtype=float))
+    peakJerk = None if np.isinf(profile.peakJerk) else profile.peakJerk * distance
+    return durationFromPeaks(robot, profile.peakVel * distance, profile.peakAcc * distance, peakJerk)
+
+# Duração mínima de uma trajetória linear cartesiana. As juntas não variam
+# linearmente ao longo da reta, então o caminho é amostrado com ikBatch e as
+# derivadas em relação ao tempo normalizado são obtidas numericamente
+def minimumCartesianDuration(robot, start, target, profile=BANG_BANG, samples=PATH_SAMPLES):
+    profile = getProfile(profile)
+    start = np.asarray(start, dtype=float)
+    target = np.asarray(target, dtype=float)
+    tau = np.linspace(0., 1., samples)
+    cartesian = start + profile.position(tau, 1.)[:, None] * (target - start)
+    joints, valid = robot.ikBatch(cartesian)
+    if not np.all(valid):
+        raise ValueError("Trajetória passa por ponto sem solução de ik")
+    if np.any(thetaStopCrossings(joints)):
+        raise ValueError("Trajetória cruza o fim de curso da junta de rotação")
+
+    vel = np.gradient(joints, tau, axis=0)
+    acc = np.gradient(vel, tau, axis=0)
+    peakJerk = None
+    if not np.isinf(profile.peakJerk):
+        peakJerk = np.max(np.abs(np.gradient(acc, tau, axis=0)), axis=0)
+    return durationFromPeaks(robot, np.max(np.abs(vel), axis=0),
+                             np.max(np.abs(acc), axis=0), peakJerk)
+
+# Movimento em espaço de juntas de tempo mínimo com velocidade trapezoidal.
+# Retorna a duração e o perfil trapezoidal (fração de aceleração) a ser usado.
+# Com V = max(D / vmax) e A = max(D / amax) entre as juntas, o movimento é
+# triangular se V² <= A e, caso contrário, tem trecho de velocidade constante
+def timeOptimalJointMove(robot, start, target):
+    velLimits, accLimits, __ = jointDynamicLimits(robot)
+    distance = np.abs(np.asarray(target, dtype=float) - np.asarray(start, dtype=float))
+    velTerm = float(np.max(distance / velLimits))
+    accTerm = float(np.max(distance / accLimits))
+    if accTerm == 0:
+        return 0., TrapezoidalProfile(0.5)
+    if velTerm**2 <= accTerm:
+        return 2 * float(np.sqrt(accTerm)), TrapezoidalProfile(0.5)
+    duration = velTerm + accTerm / velTerm
+    return duration, TrapezoidalProfile((accTerm / velTerm) / duration)
@@ -0,0 +1,132 @@
+"""
+Planejamento de trajetórias cartesianas antes da execução.
+
+Todo o perfil (profiles.py) é avaliado de uma vez, de forma vetorizada, nos
+instantes de envio: posição cartesiana, cinemática inversa (ikBatch) e
+velocidade desejada. A malha de controle só precisa indexar o plano e enviar as
+juntas ao simulador. Os planos são imutáveis e podem ser reutilizados para
+movimentos repetidos.
+"""
+import numpy as np
+from collections import OrderedDict
+from realtime import buildSchedule, DEFAULT_CONTROL_RATE
+from profiles import BANG_BANG, getProfile
+from analysis import backwardDifference
+
+class TrajectoryPlan(object):
+    def __init__(self, times, cartesian, joints, desiredVel, duration):
+        self.times = times # Instantes de envio (s)
+        self.cartesian = cartesian # Posições cartesianas (M, 3)
+        self.joints = joints # Posições das juntas (M, 3)
+        self.desiredVel = desiredVel # Velocidade cartesiana desejada (M, 3)
+        self.duration = duration
+        for array in (self.times, self.cartesian, self.joints, self.desiredVel):
+            array.flags.writeable = False
+
+    def __len__(self):
+        return len(self.times)
+
+def planCartesianTrajectory(robot, initialPos, target, duration,
+                            controlRate=DEFAULT_CONTROL_RATE, profile=BANG_BANG):
+    profile = getProfile(profile)
+    initialPos = np.asarray(initialPos, dtype=float)
+    target = np.asarray(target, dtype=float)
+    # Instantes de envio, sempre incluindo as mudanças de fase do perfil
+    times = buildSchedule(duration, controlRate, profile.eventTimes(duration))
+
+    displacement = target - initialPos
+    cartesian = initialPos + profile.position(times, duration)[:, None] * displacement
+    joints, valid = robot.ikBatch(cartesian)
+    if not np.all(valid):
+        raise ValueError("Falhou em calcular ik no instante " + str(times[~valid][0]) + " s")
+
+    desiredVel = profile.velocity(times, duration)[:, None] * displacement
+    return TrajectoryPlan(times, cartesian, joints, desiredVel, duration)
+
+# Trajetória em espaço de juntas até a configuração alvo: todas as juntas
+# seguem o mesmo perfil. A junta de rotação tem fim de curso em ±180° e não
+# pode passar por ele, então theta vai direto ao alvo, sem tomar o menor
+# ângulo. Como cada junta varia entre dois valores válidos, o caminho fica
+# dentro dos limites e nunca entra na região central
+def planJointTrajectory(robot, initialJoints, targetJoints, duration,
+                        controlRate=DEFAULT_CONTROL_RATE, profile=BANG_BANG):
+    profile = getProfile(profile)
+    initialJoints = np.asarray(initialJoints, dtype=float)
+    displacement = np.asarray(targetJoints, dtype=float) - initialJoints
+    times = buildSchedule(duration, controlRate, profile.eventTimes(duration))
+
+    joints = initialJoints + profile.position(times, duration)[:, None] * displacement
+    cartesian = robot.fkBatch(joints)
+
+    # Velocidade cartesiana pela derivada da cinemática direta:
+    #   dx = -y dtheta - sin(theta) dd3, dy = x dtheta + cos(theta) dd3, dz = dd2
+    jointVel = profile.velocity(times, duration)[:, None] * displacement
+    desiredVel = np.empty_like(cartesian)
+    desiredVel[:, 0] = -cartesian[:, 1] * jointVel[:, 0] - np.sin(joints[:, 0]) * jointVel[:, 2]
+    desiredVel[:, 1] = cartesian[:, 0] * jointVel[:, 0] + np.cos(joints[:, 0]) * jointVel[:, 2]
+    desiredVel[:, 2] = jointVel[:, 1]
+    return TrajectoryPlan(times, cartesian, joints, desiredVel, duration)
+
+# Junta planos consecutivos num único plano, deslocando os instantes de cada
+# um pela duração dos anteriores
+def concatenatePlans(plans):
+    offsets = np.cumsum([0.] + [plan.duration for plan in plans[:-1]])
+    return TrajectoryPlan(np.concatenate([plan.times + offset for plan, offset in zip(plans, offsets)]),
+                          np.concatenate([plan.cartesian for plan in plans]),
+                          np.concatenate([plan.joints for plan in plans]),
+                          np.concatenate([plan.desiredVel for plan in plans]),
+                          float(offsets[-1] + plans[-1].duration))
+
+# Monta os dados retornados pela execução de um plano a partir das leituras:
+# tempos, posições da ponta, velocidades medida e desejada (com zeros no início
+# e no fim), tempos das velocidades e posições das juntas
+def executionResults(plan, initialPos, actualTimes, endEffectorPos, jointsPosition):
+    # Mede a velocidade executada entre duas leituras consecutivas
+    endEffectorVel = backwardDifference(endEffectorPos, actualTimes, initialPos)
+
+    # Adiciona os valores inicial e final de velocidade 
+    zero = [[0,0,0]]
+    endEffectorVel = zero + endEffectorVel.tolist() + zero
+    desiredVel = zero + plan.desiredVel.tolist() + zero
+    velocityTime = [0] + actualTimes.tolist() + [plan.duration]
+    trajectoryTime = actualTimes.tolist()
+
+    return trajectoryTime, endEffectorPos.tolist(), endEffectorVel, desiredVel, velocityTime, jointsPosition.tolist()
+
+# Lado da célula de quantização dos pontos na chave do cache de planos (m). A
+# posição inicial é medida, então nunca se repete exatamente
+PLAN_CACHE_TOLERANCE = 1e-4
+
+# Planejador com cache dos planos já calculados para movimentos repetidos. Os
+# pontos inicial e final entram na chave quantizados em células de lado
+# tolerance: um plano reaproveitado pode começar até tolerance/2 por eixo
+# longe da posição medida. Os planos só valem para a geometria com que foram
+# calculados; se robot.geometry mudar, o cache é esvaziado
+class TrajectoryPlanner(object):
+    def __init__(self, robot, controlRate=DEFAULT_CONTROL_RATE, cacheSize=64,
+                 tolerance=PLAN_CACHE_TOLERANCE):
+        self.robot = robot
+        self.controlRate = controlRate
+        self.cacheSize = cacheSize
+        self.scale = 1. / tolerance
+        self.cache = OrderedDict()
+        self.geometry = robot.geometry
+
+    def quantize(self, point):
+        return tuple(round(value * self.scale) for value in point)
+
+    def plan(self, initialPos, target, duration, profile=BANG_BANG):
+        profile = getProfile(profile)
+        if self.robot.geometry is not self.geometry:
+            self.geometry = self.robot.geometry
+            self.cache.clear()
+        key = (self.quantize(initialPos), self.quantize(target), duration, self.controlRate, profile)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        plan = planCartesianTrajectory(self.robot, initialPos, target, duration,
+                                       self.controlRate, profile)
+        self.cache[key] = plan
+        if len(self.cache) > self.cacheSize:
+            self.cache.popitem(last=False)
+        return plan
@@ -0,0 +1,166 @@
+"""
+Validação dos movimentos contra os limites das juntas antes do envio ao
+simulador.
+
+Uma trajetória planejada (trajectory.TrajectoryPlan) é verificada inteira de
+uma vez: as posições contra robot.geometry (lo e hi), e a velocidade e a
+aceleração de cada junta, obtidas por diferenças divididas entre as amostras,
+contra robot.velLimits e robot.accLimits. Para trechos polinomiais as
+diferenças divididas nunca passam do máximo da derivada no trecho, então o
+teste não gera falsos alarmes. theta tem fim de curso em ±π, então a
+diferença entre amostras não é reduzida ao menor ângulo, e um salto de mais
+de π entre amostras (a trajetória cruza o fim de curso) é rejeitado em
+qualquer política: esticar o tempo ou limitar as posições não o corrige.
+
+O que fazer com uma violação é definido pela política:
+    - REJECT: levanta ValueError antes de qualquer envio
+    - CLAMP: limita as posições a lo e hi (a junta para no fim de curso);
+      velocidade e aceleração são verificadas no plano original e, acima
+      dos limites, continuam sendo rejeitadas
+    - RESCALE: estica o tempo uniformemente pelo menor fator que coloca
+      velocidade e aceleração dentro dos limites (velocidade / k,
+      aceleração / k²); posições fora dos limites continuam sendo rejeitadas
+"""
+import numpy as np
+import math
+from analysis import centralDifference
+from trajectory import TrajectoryPlan
+from geometry import thetaStopCrossings
+
+REJECT = "reject"
+CLAMP = "clamp"
+RESCALE = "rescale"
+POLICIES = (REJECT, CLAMP, RESCALE)
+
+# Folga absoluta das posições (m ou rad) e relativa de velocidade e
+# aceleração. A folga relativa cobre a estimativa numérica dos picos feita
+# por timing.minimumCartesianDuration, que fica até ~0,2% abaixo
+POSITION_TOLERANCE = 1e-9
+DYNAMIC_TOLERANCE = 1e-2
+
+JOINT_NAMES = ("theta", "d2", "d3")
+
+def checkPolicy(policy):
+    if policy not in POLICIES:
+        raise ValueError("Política de limites desconhecida: " + str(policy))
+    return policy
+
+# Velocidade (M - 1, 3) e aceleração (M - 2, 3) das juntas por diferenças
+# divididas
+def jointDerivatives(times, joints):
+    times = np.asarray(times, dtype=float)
+    deltas = np.diff(joints, axis=0)
+    dt = np.diff(times)[:, None]
+    vel = deltas / dt
+    acc = np.diff(vel, axis=0) / ((times[2:] - times[:-2]) / 2)[:, None]
+    return vel, acc
+
+# Verifica as posições, velocidades e acelerações de joints (M, 3) nos
+# instantes times. Retorna um dicionário com as amostras fora dos limites de
+# posição, os pares de amostras em que theta cruza o fim de curso, a razão
+# entre o pico e o limite de velocidade e de aceleração de cada junta, e o
+# fator de tempo que coloca a dinâmica dentro dos limites
+def validateTrajectory(robot, times, joints):
+    joints = np.asarray(joints, dtype=float)
+    outside = ~robot.geometry.withinLimits(joints, POSITION_TOLERANCE)
+    crossings = np.zeros(max(len(joints) - 1, 0), dtype=bool)
+    velRatio = np.zeros(robot.jointNumber)
+    accRatio = np.zeros(robot.jointNumber)
+    if len(joints) > 1:
+        crossings = thetaStopCrossings(joints)
+        vel, acc = jointDerivatives(times, joints)
+        velRatio = np.max(np.abs(vel), axis=0) / robot.velLimits
+        if len(acc):
+            accRatio = np.max(np.abs(acc), axis=0) / robot.accLimits
+    # Fator de tempo: a velocidade escala com 1/k e a aceleração com 1/k²
+    timeScale = max(1., float(np.max(velRatio)), math.sqrt(float(np.max(accRatio))))
+    dynamicValid = timeScale <= 1 + DYNAMIC_TOLERANCE
+    positionValid = not np.any(outside) and not np.any(crossings)
+    return {'valid': positionValid and dynamicValid,
+            'positionValid': positionValid,
+            'dynamicValid': dynamicValid,
+            'outside': outside,
+            'crossings': crossings,
+            'velRatio': velRatio,
+            'accRatio': accRatio,
+            'timeScale': timeScale}
+
+# Mensagem com a primeira violação encontrada no relatório
+def describeViolation(report, times=None):
+    crossings = report.get('crossings')
+    if crossings is not None and np.any(crossings):
+        index = int(np.argmax(crossings)) + 1
+        where = " no instante %.4f s" % times[index] if times is not None else ""
+        return "Junta theta cruza o fim de curso" + where
+    if not report['positionValid']:
+        index = int(np.argmax(report['outside']))
+        where = " no instante %.4f s" % times[index] if times is not None else ""
+        return "Posição das juntas fora dos limites" + where
+    for name, ratios in (("velocidade", report['velRatio']), ("aceleração", report['accRatio'])):
+        joint = int(np.argmax(ratios))
+        if ratios[joint] > 1 + DYNAMIC_TOLERANCE:
+            return "%s da junta %s %.1f%% acima do limite" % (
+                name.capitalize(), JOINT_NAMES[joint], 100 * (ratios[joint] - 1))
+    return "Dentro dos limites"
+
+# Plano com o tempo esticado por factor: mesmas amostras em instantes
+# factor vezes maiores e velocidade desejada dividida por factor
+def rescalePlan(plan, factor):
+    return TrajectoryPlan(plan.times * factor, plan.cartesian.copy(), plan.joints.copy(),
+                          plan.desiredVel / factor, plan.duration * factor)
+
+# Plano com as posições das juntas limitadas a lo e hi. Nas amostras
+# alteradas a posição cartesiana vem da cinemática direta e a velocidade
+# desejada da derivada dessas posições
+def clampPlan(robot, plan, outside):
+    joints = robot.geometry.clamp(plan.joints)
+    cartesian = plan.cartesian.copy()
+    cartesian[outside] = robot.fkBatch(joints[outside])
+    desiredVel = plan.desiredVel.copy()
+    if len(plan) > 1:
+        desiredVel[outside] = centralDifference(cartesian, plan.times)[outside]
+    return TrajectoryPlan(plan.times.copy(), cartesian, joints, desiredVel, plan.duration)
+
+# Aplica a política ao plano e retorna o plano que pode ser executado
+def enforcePlanLimits(robot, plan, policy=REJECT):
+    checkPolicy(policy)
+    report = validateTrajectory(robot, plan.times, plan.joints)
+    if report['valid']:
+        return plan
+    # Nenhuma política corrige a passagem pelo fim de curso de theta
+    if np.any(report['crossings']):
+        raise ValueError(describeViolation(report, plan.times))
+    if not report['positionValid'] and policy != CLAMP:
+        raise ValueError(describeViolation(report, plan.times))
+    if not report['dynamicValid'] and policy != RESCALE:
+        raise ValueError(describeViolation(report))
+    if not report['positionValid']:
+        plan = clampPlan(robot, plan, report['outside'])
+    if not report['dynamicValid']:
+        plan = rescalePlan(plan, report['timeScale'])
+    return plan
+
+# Aplica a política a um único alvo das juntas e retorna o alvo como tupla
+# de floats, como ik. Sem trajetória, apenas a posição é verificada
+def enforceJointTarget(robot, joints, policy=REJECT):
+    checkPolicy(policy)
+    geometry = robot.geometry
+    joints = np.asarray(joints, dtype=float)
+    if not geometry.withinLimits(joints, POSITION_TOLERANCE):
+        if policy != CLAMP:
+            raise ValueError("Alvo das juntas fora dos limites: " + str(np.round(joints, 4).tolist()))
+        joints = geometry.clamp(joints)
+    return tuple(joints.tolist())
+
+# Fator de tempo para que a velocidade vel e a aceleração acc pedidas a cada
+# junta fiquem dentro dos limites. Com RESCALE retorna o fator (>= 1) e nas
+# outras políticas levanta ValueError se algum limite for ultrapassado
+def enforceJointDynamics(robot, vel, acc, policy=REJECT):
+    checkPolicy(policy)
+    velRatio = np.abs(np.asarray(vel, dtype=float)) / robot.velLimits
+    accRatio = np.abs(np.asarray(acc, dtype=float)) / robot.accLimits
+    report = {'positionValid': True, 'velRatio': velRatio, 'accRatio': accRatio}
+    timeScale = max(1., float(np.max(velRatio)), math.sqrt(float(np.max(accRatio))))
+    if timeScale > 1 + DYNAMIC_TOLERANCE and policy != RESCALE:
+        raise ValueError(describeViolation(report))
+    return timeScale
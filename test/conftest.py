@@ -0,0 +1,25 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from offline_sim import OfflineSim
+from robot import CylindricRobot
+
+# test_vel.py é um script de análise da telemetria gravada por main.py
+collect_ignore = ["test_vel.py"]
+
+# Simulador local já iniciado
+@pytest.fixture
+def sim():
+    sim = OfflineSim()
+    sim.startSimulation()
+    yield sim
+    sim.stopSimulation()
+
+# Robô no modo sincronizado: a simulação avança apenas com os passos da execução
+@pytest.fixture
+def robot(sim):
+    robot = CylindricRobot("/P0_ST", sim, stepping=True)
+    yield robot
+    robot.close()
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from analysis import savitzkyGolay, backwardDifference, centralDifference
+
+@pytest.mark.parametrize("order", [2, 3, 4])
+def test_savitzky_golay_is_exact_on_polynomials(order):
+    delta = 0.01
+    time = np.arange(200) * delta
+    coefficients = np.arange(1., order + 2)
+    signal = np.polyval(coefficients, time)
+    derivative = np.polyval(np.polyder(coefficients), time)
+    second = np.polyval(np.polyder(coefficients, 2), time)
+    assert np.allclose(savitzkyGolay(signal, 11, order), signal, atol=1e-8)
+    assert np.allclose(savitzkyGolay(signal, 11, order, deriv=1, delta=delta), derivative, atol=1e-6)
+    assert np.allclose(savitzkyGolay(signal, 11, order, deriv=2, delta=delta), second, atol=1e-3)
+
+def test_savitzky_golay_multichannel_and_errors():
+    signal = np.column_stack([np.linspace(0., 1., 50), np.linspace(1., 0., 50)])
+    assert np.allclose(savitzkyGolay(signal, 7, 1), signal)
+    with pytest.raises(ValueError):
+        savitzkyGolay(signal, 6, 2)
+    with pytest.raises(ValueError):
+        savitzkyGolay(signal[:5], 7, 2)
+
+def test_differences_on_linear_signal():
+    time = np.array([0.1, 0.2, 0.2, 0.4])
+    values = 3 * time
+    # Amostras com dt nulo têm derivada nula em vez de NaN
+    assert np.allclose(backwardDifference(values, time, 0.), [3., 3., 0., 3.])
+    assert np.allclose(centralDifference(3 * np.linspace(0, 1, 5), np.linspace(0, 1, 5)), 3.)
+
+# No modo sincronizado duas leituras podem cair no mesmo passo de simulação
+def test_central_difference_with_repeated_timestamps():
+    time = np.array([0., 0.02, 0.04, 0.04, 0.06, 0.08])
+    values = np.column_stack([3 * time, time**2])
+    with np.errstate(all='raise'):
+        derivative = centralDifference(values, time)
+    assert np.all(np.isfinite(derivative))
+    assert np.allclose(derivative[:, 0], 3.)
+    assert derivative[2, 1] == derivative[3, 1] == pytest.approx(0.08)
+    assert np.array_equal(centralDifference([1., 1.], [0., 0.]), [0., 0.])
@@ -0,0 +1,73 @@
+import asyncio
+import numpy as np
+import pytest
+
+from async_robot import AsyncCylindricRobot
+
+START = [0.5, 0.5, 1.]
+TARGET = [-0.3, 0.6, 1.4]
+
+@pytest.fixture
+def asyncRobot(robot):
+    robot.setJointPosition(START)
+    asyncRobot = AsyncCylindricRobot(robot)
+    yield asyncRobot
+    asyncRobot.close()
+
+# Depois de parar, o alvo de cada junta é a posição em que ela estava
+def assertStopped(robot):
+    targets = robot.sim.target[0]
+    assert np.array_equal(targets, robot.sim.position[0])
+    assert not np.allclose(robot.getCurrentPosition(), TARGET, atol=1e-2)
+
+def test_execute_streams_every_sample(asyncRobot):
+    async def run():
+        plan = await asyncRobot.plan(TARGET, controlRate=50.)
+        return plan, await asyncRobot.executeAll(plan)
+
+    plan, samples = asyncio.run(run())
+    assert len(samples) == len(plan)
+    assert [sample.scheduled for sample in samples] == plan.times.tolist()
+    assert np.all(np.diff([sample.time for sample in samples]) >= 0)
+
+def test_timeout_stops_robot(asyncRobot):
+    async def run():
+        plan = await asyncRobot.plan(TARGET, controlRate=50.)
+        return await asyncRobot.executeAll(plan, timeout=plan.duration / 2)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(run())
+    assertStopped(asyncRobot.robot)
+
+def test_cancellation_stops_robot(asyncRobot):
+    samples = []
+
+    async def consume(plan):
+        async for sample in asyncRobot.execute(plan):
+            samples.append(sample)
+
+    async def run():
+        plan = await asyncRobot.plan(TARGET, controlRate=50.)
+        task = asyncio.create_task(consume(plan))
+        while len(samples) < 10:
+            await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return plan
+
+    plan = asyncio.run(run())
+    assert 10 <= len(samples) < len(plan)
+    assertStopped(asyncRobot.robot)
+
+def test_consumer_break_stops_robot(asyncRobot):
+    async def run():
+        plan = await asyncRobot.plan(TARGET, controlRate=50.)
+        stream = asyncRobot.execute(plan)
+        async for sample in stream:
+            if sample.scheduled > plan.duration / 3:
+                break
+        await stream.aclose()
+
+    asyncio.run(run())
+    assertStopped(asyncRobot.robot)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from offline_sim import OfflineSim
+from robot import CylindricRobot
+
+TARGETS = [0.4, 0.8, 0.3]
+
+# Simulador sem suporte a scripts
+class NoScriptSim(OfflineSim):
+    def createScript(self, *args, **kwargs):
+        raise Exception("createScript not supported")
+
+# Cria o script, mas as funções dele não podem ser chamadas
+class BrokenScriptSim(OfflineSim):
+    def callScriptFunction(self, functionName, scriptHandle, *args):
+        raise Exception("Unknown script function: " + functionName)
+
+def createRobot(sim):
+    sim.startSimulation()
+    return CylindricRobot("/P0_ST", sim, batchedIO=True, stepping=True)
+
+def test_batched_exchange_is_one_round_trip(sim):
+    robot = CylindricRobot("/P0_ST", sim, batchedIO=True, stepping=True)
+    assert robot.io.batched
+    tipPos, jointPos = robot.io.exchange(TARGETS)
+    assert robot.io.roundTrips == 1
+    assert tipPos == pytest.approx(robot.fk(*jointPos))
+    assert np.array_equal(sim.target[0], TARGETS)
+    robot.close()
+    assert not robot.io.batched
+    assert sim.scripts == set()
+
+@pytest.mark.parametrize("simClass", [NoScriptSim, BrokenScriptSim])
+def test_falls_back_to_individual_calls(simClass):
+    sim = simClass()
+    robot = createRobot(sim)
+    assert not robot.io.batched
+    # O script que não responde não fica na cena
+    assert sim.scripts == set()
+    tipPos, jointPos = robot.io.exchange(TARGETS)
+    assert robot.io.roundTrips == 2 * robot.jointNumber + 1
+    assert tipPos == pytest.approx(robot.fk(*jointPos))
+    assert np.array_equal(sim.target[0], TARGETS)
+    robot.close()
+
+def test_batched_and_individual_reads_agree():
+    robots = [createRobot(sim) for sim in (OfflineSim(), NoScriptSim())]
+    for robot in robots:
+        robot.setJointPosition([0.5, 0.5, 1.])
+        robot.io.exchange(TARGETS)
+        for __ in range(20):
+            robot.step()
+    batched, individual = [robot.io.readState() for robot in robots]
+    assert batched[0] == pytest.approx(individual[0])
+    assert batched[1] == pytest.approx(individual[1])
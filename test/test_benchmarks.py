@@ -0,0 +1,24 @@
+import pytest
+
+from benchmarks import measure, compare, cycleCalls
+
+def test_latency_percentiles_come_from_individual_calls():
+    calls = []
+    result = measure(lambda: [calls.append(1) for __ in range(10)], 10, 3,
+                     cycleCalls(calls.append, [(1,), (2,)]), 1)
+    assert result['callItems'] == 1
+    assert result['latencySamples'] >= 100
+    assert result['latencyP50'] <= result['latencyP90'] <= result['latencyP99']
+    # Sem chamada menor, a latência é a de cada rodada inteira
+    whole = measure(lambda: None, 10, 3)
+    assert whole['callItems'] == 10
+    assert whole['latencySamples'] == 3
+
+def test_compare_refuses_baseline_from_other_mode():
+    results = {'ik': {'throughput': 100.}}
+    baseline = {'quick': True, 'results': {'ik': {'throughput': 200.}}}
+    with pytest.raises(ValueError):
+        compare(results, baseline)
+    assert compare(results, baseline, quick=True)['ik']['regression']
+    with pytest.raises(ValueError):
+        compare(results, dict(baseline, quick=False), quick=True)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from blending import blendTiming, evaluateBlend, blendDuration, planBlendedJointTrajectory
+
+WAYPOINTS = [[-0.75, -0.25, 0.75], [0.5, 0.5, 1.0], [-0.5, 0.6, 0.5], [0.4, -0.6, 1.2]]
+
+def test_blend_ends_at_rest_on_final_waypoint(robot):
+    joints, valid = robot.ikBatch(WAYPOINTS)
+    assert np.all(valid)
+    plan = planBlendedJointTrajectory(robot, joints)
+    assert plan.joints[-1] == pytest.approx(joints[-1])
+    assert plan.cartesian[-1] == pytest.approx(WAYPOINTS[-1])
+    assert np.allclose(plan.desiredVel[-1], 0.)
+
+def test_blend_respects_joint_limits():
+    waypoints = np.array([[0., 0., 0.], [1., 0.5, 0.2], [0., 1., 1.]])
+    velLimits = np.array([1., 0.5, 0.5])
+    accLimits = np.array([2., 1., 1.])
+    durations, blends = blendTiming(waypoints, velLimits, accLimits)
+    times = np.linspace(0., blendDuration(durations, blends), 5001)
+    position, velocity, acceleration = evaluateBlend(waypoints, durations, blends, times)
+    assert np.all(np.abs(velocity) <= velLimits + 1e-9)
+    assert np.all(np.abs(acceleration) <= accLimits + 1e-9)
+    assert position[0] == pytest.approx(waypoints[0])
+    assert position[-1] == pytest.approx(waypoints[-1])
+    assert np.allclose(velocity[[0, -1]], 0.)
+
+def test_executed_blend_stops_at_final_waypoint(robot):
+    robot.setJointPosition(WAYPOINTS[0])
+    results = robot.executeWaypointTrajectory(WAYPOINTS[1:], controlRate=100.)
+    # A simulação segue alguns passos após o último alvo para parar
+    for __ in range(200):
+        robot.step()
+    assert robot.getCurrentPosition() == pytest.approx(WAYPOINTS[-1], abs=1e-3)
+    assert np.allclose(robot.getCurrentVelocity(), 0., atol=1e-6)
+    assert len(results[0]) > 0
@@ -0,0 +1,120 @@
+import pytest
+
+from connect import ConnectionManager, ReconnectedError
+
+# Socket que registra o fechamento
+class FakeSocket(object):
+    def __init__(self):
+        self.closed = False
+
+    def close(self, linger=None):
+        self.closed = True
+
+# sim mínimo: a cena já está aberta e getSimulationTime pode ficar sem
+# resposta, como um socket REQ que passou do tempo limite
+class FakeSim(object):
+    def __init__(self, client):
+        self.client = client
+
+    def getObject(self, path, options=None):
+        return 0
+
+    def getSimulationTime(self):
+        if self.client.hung:
+            raise TimeoutError("Resource temporarily unavailable")
+        return 1.0
+
+    # Chamada que altera o estado: o simulador pode tê-la executado antes
+    # de a resposta se perder
+    def startSimulation(self):
+        self.client.started += 1
+        if self.client.hung:
+            raise TimeoutError("Resource temporarily unavailable")
+        return 1
+
+class FakeClient(object):
+    def __init__(self, refuse=False):
+        self.refuse = refuse
+        self.hung = False
+        self.started = 0
+        self.socket = FakeSocket()
+
+    def require(self, name):
+        if self.refuse:
+            raise TimeoutError("Resource temporarily unavailable")
+        return FakeSim(self)
+
+class FakeFactory(object):
+    def __init__(self, refusals=0):
+        self.refusals = refusals
+        self.clients = []
+        self.timeouts = []
+
+    def __call__(self, host, port, timeout):
+        self.timeouts.append(timeout)
+        client = FakeClient(refuse=len(self.clients) < self.refusals)
+        self.clients.append(client)
+        return client
+
+def manager(factory, **options):
+    return ConnectionManager(clientFactory=factory, baseDelay=0., maxDelay=0., callTimeout=0.5, **options)
+
+def test_connect_discards_clients_without_reply():
+    factory = FakeFactory(refusals=2)
+    connection = manager(factory)
+    connection.connect()
+    assert len(factory.clients) == 3
+    assert [client.socket.closed for client in factory.clients] == [True, True, False]
+    assert connection.client is factory.clients[-1]
+    assert factory.timeouts == [0.5] * 3
+
+def test_connect_gives_up_after_max_attempts():
+    factory = FakeFactory(refusals=3)
+    with pytest.raises(TimeoutError):
+        manager(factory, maxAttempts=3).connect()
+    assert all(client.socket.closed for client in factory.clients)
+
+def test_health_check_rebuilds_client_after_timeout():
+    factory = FakeFactory()
+    connection = manager(factory)
+    connection.connect()
+    first = connection.client
+    connection.healthCheck()
+    assert connection.client is first
+
+    first.hung = True
+    connection.healthCheck()
+    assert first.socket.closed
+    assert connection.client is not first
+    assert connection.failedHealthChecks == 1
+    assert connection.reconnects == 1
+    assert connection.isHealthy()
+
+def test_proxy_call_reconnects_and_retries():
+    factory = FakeFactory()
+    connection = manager(factory)
+    sim = connection.getSim()
+    connection.client.hung = True
+    assert sim.getSimulationTime() == 1.0
+    assert connection.reconnects == 1
+    assert len(factory.clients) == 2
+
+def test_proxy_call_does_not_repeat_writes_after_reconnect():
+    factory = FakeFactory()
+    connection = manager(factory)
+    sim = connection.getSim()
+    connection.client.hung = True
+    with pytest.raises(ReconnectedError):
+        sim.startSimulation()
+    assert connection.reconnects == 1
+    assert [client.started for client in factory.clients] == [1, 0]
+
+def test_reconnect_hooks_restore_state():
+    factory = FakeFactory()
+    connection = manager(factory)
+    connection.addReconnectHook(lambda sim: sim.startSimulation())
+    sim = connection.getSim()
+    connection.client.hung = True
+    with pytest.raises(ReconnectedError):
+        sim.startSimulation()
+    assert [client.started for client in factory.clients] == [1, 1]
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from offline_sim import OfflineSim
+from fleet import RobotFleet, discoverRobots
+
+STARTS = [[0.5, 0.5, 1.], [-0.5, 0.5, 1.]]
+TARGETS = [[0.7, 0.2, 1.2], [-0.6, 0.3, 0.8]]
+
+@pytest.fixture(params=[False, True], ids=["individual", "batched"])
+def fleet(request):
+    sim = OfflineSim(robots=("/P0_ST", "/P1_ST"))
+    sim.startSimulation()
+    fleet = RobotFleet(sim, batchedIO=request.param, stepping=True)
+    for robot, start in zip(fleet.robots, STARTS):
+        robot.setJointPosition(start)
+    yield fleet
+    fleet.close()
+
+def test_discover_robots():
+    assert discoverRobots(OfflineSim(robots=("/P0_ST", "/P1_ST", "/P2_ST"))) == ["/P0_ST", "/P1_ST", "/P2_ST"]
+    with pytest.raises(KeyError):
+        RobotFleet(OfflineSim(robots=()))
+
+def test_robots_move_simultaneously(fleet):
+    durations = [1.5, 2.]
+    results = fleet.executeCartesianTrajectories(TARGETS, durations, controlRate=50.)
+    for (times, tipPos, *__), duration in zip(results, durations):
+        assert times[-1] == pytest.approx(duration, abs=0.02)
+        assert np.all(np.diff(times) > 0)
+    # No meio do movimento mais curto os dois robôs já saíram do lugar
+    times, tipPos = results[0][0], results[0][1]
+    middle = int(np.searchsorted(times, 0.5))
+    otherMiddle = int(np.searchsorted(results[1][0], 0.5))
+    for tips, index, start in ((tipPos, middle, STARTS[0]), (results[1][1], otherMiddle, STARTS[1])):
+        assert np.linalg.norm(np.subtract(tips[index], start)) > 0.02
+    for __ in range(100):
+        fleet.sim.step()
+    for robot, target in zip(fleet.robots, TARGETS):
+        assert robot.getCurrentPosition() == pytest.approx(target, abs=1e-3)
+
+def test_one_exchange_per_tick(fleet):
+    fleet.executeCartesianTrajectories(TARGETS, 2., controlRate=50.)
+    stats = fleet.io.stats()
+    assert stats['ticks'] == fleet.timingStats['count']
+    assert fleet.timingStats['setpoints'] == 2 * stats['ticks']
+    perTick = 1 if fleet.io.batched else 2 * (2 * fleet.robots[0].jointNumber + 1)
+    assert stats['roundTrips'] == perTick * stats['ticks']
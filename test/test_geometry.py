@@ -0,0 +1,39 @@
+import math
+import numpy as np
+import pytest
+
+from geometry import RobotGeometry
+
+def test_geometry_is_immutable(robot):
+    geometry = robot.geometry
+    with pytest.raises(AttributeError):
+        geometry.a2 = 0.2
+    with pytest.raises(ValueError):
+        geometry.lo[0] = 0.
+    changed = geometry.replace(a2=0.2)
+    assert changed is not geometry and changed != geometry
+    assert changed.replace(a2=geometry.a2) == geometry
+    assert hash(changed.replace(a2=geometry.a2)) == hash(geometry)
+
+def test_limits_round_trip(robot):
+    geometry = robot.geometry
+    limits = geometry.limits()
+    assert RobotGeometry.fromLimits(geometry.d1, geometry.a2, geometry.a3, geometry.df, limits) == geometry
+    with pytest.raises(TypeError):
+        limits[0]['min'] = 0.
+    with pytest.raises(ValueError):
+        RobotGeometry(0., 0., 0., 0., [1.], [0.])
+
+def test_clamp_and_within_limits(robot):
+    geometry = robot.geometry
+    joints = np.array([[0., 1., 0.5], [4., -1., 0.5], [0., 2. + 1e-12, 0.]])
+    assert geometry.withinLimits(joints).tolist() == [True, False, False]
+    assert geometry.withinLimits(joints, 1e-9).tolist() == [True, False, True]
+    assert np.all(geometry.withinLimits(geometry.clamp(joints)))
+
+def test_geometry_change_is_seen_by_kinematics(robot):
+    before = robot.fk(0.3, 0.5, 0.4)
+    robot.a2 = 0.2
+    assert robot.fk(0.3, 0.5, 0.4) != before
+    assert robot.ik(*robot.fk(0.3, 0.5, 0.4)) == pytest.approx((0.3, 0.5, 0.4))
+    assert math.isclose(robot.geometry.deadZoneRadius, math.hypot(0.2, robot.df))
@@ -0,0 +1,48 @@
+import logging
+import pytest
+
+import robot as robotModule
+from instrumentation import metrics
+
+@pytest.fixture
+def collecting():
+    metrics.reset()
+    metrics.enable()
+    yield metrics
+    metrics.disable()
+    metrics.reset()
+
+def test_disabled_metrics_leave_original_methods(robot):
+    assert not metrics.enabled
+    assert type(robot).ik.__name__ == "ik"
+    assert not hasattr(type(robot).ik, '__wrapped__')
+
+def test_execution_ticks_are_measured(robot, collecting):
+    robot.setJointPosition([0.5, 0.5, 1.])
+    robot.executeCartesianTrajectory([0.6, 0.3, 1.2], controlRate=100.)
+    robot.ik(0.6, 0.3, 1.2)
+    snapshot = collecting.snapshot()
+    ticks = snapshot['counters']['ticks']
+    assert snapshot['counters']['trajectories'] == 1
+    assert snapshot['timers']['tick']['count'] == ticks
+    assert snapshot['histograms']['lateness']['count'] == ticks
+    assert snapshot['timers']['ik']['count'] >= 1
+    assert "cylindric_robot_ticks" in collecting.toPrometheus()
+
+def test_timing_stats_without_info_logging(robot, monkeypatch):
+    calls = []
+    monkeypatch.setattr(robotModule, 'jitterStats',
+                        lambda *args: calls.append(args) or {'count': len(args[0])})
+    robot.setJointPosition([0.5, 0.5, 1.])
+    assert robot.timingStats is None
+    logger = logging.getLogger('robot')
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    try:
+        robot.executeCartesianTrajectory([0.6, 0.3, 1.2], controlRate=100.)
+    finally:
+        logger.setLevel(level)
+    # Sem log INFO os percentis só são calculados quando pedidos
+    assert calls == []
+    assert robot.timingStats['count'] == len(robot.lastTiming[0])
+    assert len(calls) == 1
@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip("tkinter")
+from interface import RobotWorker
+
+# Robô cujas leituras falham enquanto down for verdadeiro
+class FlakyRobot(object):
+    def __init__(self):
+        self.down = True
+
+    def getCurrentPosition(self):
+        if self.down:
+            raise TimeoutError("Resource temporarily unavailable")
+        return [0., 0., 0.]
+
+    def getCurrentJointPostions(self):
+        return [0., 0., 0.]
+
+    def fk(self, *joints):
+        return [0., 0., 0.]
+
+# Leituras sem resposta a cada tick não enchem a fila de erros: fica só a
+# última falha, apagada pela próxima leitura certa
+def test_read_failures_are_coalesced():
+    robot = FlakyRobot()
+    worker = RobotWorker(robot)
+    try:
+        for __ in range(5):
+            worker.readState()
+        assert isinstance(worker.lastReadError(), TimeoutError)
+        assert worker.errors.empty()
+
+        robot.down = False
+        worker.readState()
+        assert worker.lastReadError() is None
+        assert worker.snapshot()[0] is not None
+    finally:
+        worker.stop()
+
+def test_command_errors_are_queued():
+    worker = RobotWorker(FlakyRobot())
+    worker.submit(worker.robot.getCurrentPosition)
+    worker.stop()
+    assert isinstance(worker.errors.get_nowait(), TimeoutError)
@@ -0,0 +1,69 @@
+import math
+import numpy as np
+import pytest
+
+# Configurações das juntas sorteadas dentro dos limites (N, 3)
+def randomJoints(robot, count, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(robot.geometry.lo, robot.geometry.hi, size=(count, robot.jointNumber))
+
+# Solução de ik anterior à forma fechada (raízes da equação em theta),
+# mantida aqui como referência
+def legacyIk(robot, x, y, z):
+    x2 = x**2
+    y2 = y**2
+    a2 = robot.a2
+    a2_2 = a2**2
+    d = x2 + y2
+    denSqrtTerm = math.sqrt(x2*y2 + y**4 - y2*a2_2)
+    numSqrtTerm = math.sqrt(-y2 * (-x2 - y2 + a2_2))
+    thetaList = [math.atan2(((x * numSqrtTerm / d) - (x2 * a2 / d) + a2) / y, (x * a2 - denSqrtTerm) / d),
+                 math.atan2((-(x * numSqrtTerm / d) - (x2 * a2 / d) + a2) / y, (x * a2 + denSqrtTerm) / d)]
+    d2 = z - robot.d1 + robot.a3
+    for angle in thetaList:
+        d3 = y * math.cos(angle) - x * math.sin(angle) - robot.df
+        if d3 >= 0:
+            return [angle, d2, d3]
+    raise ValueError("Falhou em calcular ik")
+
+def test_ik_matches_legacy_solver(robot):
+    points = robot.fkBatch(randomJoints(robot, 2000))
+    points = points[points[:, 1] != 0] # A fórmula antiga divide por y
+    for x, y, z in points.tolist():
+        assert robot.ik(x, y, z) == pytest.approx(legacyIk(robot, x, y, z), abs=1e-9)
+
+def test_ik_inverts_fk(robot):
+    for row in randomJoints(robot, 2000).tolist():
+        assert robot.ik(*robot.fk(*row)) == pytest.approx(row, abs=1e-9)
+
+def test_ik_on_axis_and_dead_zone(robot):
+    # y == 0 não é singular na forma fechada
+    theta, d2, d3 = robot.ik(0.8, 0., 1.)
+    assert robot.fk(theta, d2, d3) == pytest.approx([0.8, 0., 1.])
+    # Origem e pontos dentro do cilindro central não têm solução
+    for point in ([0., 0., 1.], [0.1, 0.1, 1.], [0., robot.geometry.deadZoneRadius * 0.99, 1.]):
+        with pytest.raises(ValueError):
+            robot.ik(*point)
+
+def test_batch_ik_inverts_batch_fk(robot):
+    joints = randomJoints(robot, 2000)
+    solution, valid = robot.ikBatch(robot.fkBatch(joints))
+    assert np.all(valid)
+    assert np.allclose(solution, joints, atol=1e-9)
+
+# math e NumPy usam as mesmas fórmulas; só as funções trigonométricas podem
+# diferir no último bit
+def test_scalar_and_batch_agree(robot):
+    joints = randomJoints(robot, 20000)
+    points = robot.fkBatch(joints)
+    assert np.allclose(points, [robot.fk(*row) for row in joints.tolist()], rtol=0., atol=1e-15)
+    batchJoints, valid = robot.ikBatch(points)
+    assert np.all(valid)
+    scalarJoints = np.array([robot.ik(*point) for point in points.tolist()])
+    assert np.array_equal(batchJoints[:, 1:], scalarJoints[:, 1:])
+    np.testing.assert_array_max_ulp(batchJoints[:, 0], scalarJoints[:, 0], maxulp=1)
+
+def test_batch_ik_marks_dead_zone(robot):
+    __, valid = robot.ikBatch([[0., 0., 1.], [0.1, 0.1, 1.], [0.8, 0., 1.]])
+    assert valid.tolist() == [False, False, True]
+    assert robot.fkBatch(np.zeros(3)).shape == (1, 3)
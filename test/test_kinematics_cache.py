@@ -0,0 +1,56 @@
+import pytest
+
+from kinematics_cache import KinematicsCache
+
+POINTS = [[0.5, 0.5, 1.], [0.6, 0.2, 1.2], [-0.4, 0.6, 0.8]]
+
+def test_hits_and_quantized_keys(robot):
+    cache = robot.enableKinematicsCache(size=8, tolerance=1e-6)
+    first = robot.ik(*POINTS[0])
+    assert robot.ik(*POINTS[0]) == first
+    # Mesma célula de quantização: recebe a solução do primeiro ponto
+    assert robot.ik(POINTS[0][0] + 1e-8, POINTS[0][1], POINTS[0][2]) == first
+    assert cache.stats()['ik']['hits'] == 2
+    assert cache.stats()['ik']['misses'] == 1
+    assert robot.fk(*first) == pytest.approx(POINTS[0])
+    assert robot.fk(*first) is not robot.fk(*first)
+
+def test_least_recently_used_is_evicted(robot):
+    cache = robot.enableKinematicsCache(size=2)
+    robot.ik(*POINTS[0])
+    robot.ik(*POINTS[1])
+    robot.ik(*POINTS[0]) # POINTS[1] passa a ser o menos usado
+    robot.ik(*POINTS[2])
+    assert cache.evictions['ik'] == 1
+    misses = cache.misses['ik']
+    robot.ik(*POINTS[0])
+    assert cache.misses['ik'] == misses
+    robot.ik(*POINTS[1])
+    assert cache.misses['ik'] == misses + 1
+
+def test_geometry_change_invalidates(robot):
+    cache = robot.enableKinematicsCache()
+    before = robot.ik(*POINTS[0])
+    robot.a2 = 0.2
+    after = robot.ik(*POINTS[0])
+    assert after != before
+    assert cache.invalidations == 1
+    assert after == pytest.approx(type(robot).ik(robot, *POINTS[0]))
+
+def test_failures_are_not_cached(robot):
+    cache = robot.enableKinematicsCache()
+    for __ in range(2):
+        with pytest.raises(ValueError):
+            robot.ik(0., 0., 1.)
+    assert cache.misses['ik'] == 2
+    assert cache.stats()['ik']['entries'] == 0
+
+def test_disable_restores_methods(robot):
+    robot.enableKinematicsCache()
+    robot.disableKinematicsCache()
+    assert robot.kinematicsCache is None
+    assert 'ik' not in vars(robot) and 'fk' not in vars(robot)
+    with pytest.raises(ValueError):
+        KinematicsCache(robot, size=0)
+    with pytest.raises(ValueError):
+        KinematicsCache(robot, tolerance=0.)
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from offline_sim import OfflineSim
+
+def test_stepping_advances_time_only_on_step(sim):
+    sim.setStepping(True)
+    start = sim.getSimulationTime()
+    assert sim.getSimulationTime() == start
+    for __ in range(10):
+        sim.step()
+    assert sim.getSimulationTime() == pytest.approx(start + 10 * sim.dt)
+
+def test_joint_settles_on_target(sim):
+    sim.setStepping(True)
+    motor = sim.getObject("/P0_ST/motor1")
+    sim.setJointTargetPosition(motor, 0.8)
+    for __ in range(400):
+        sim.step()
+    assert sim.getJointPosition(motor) == 0.8
+    assert sim.getJointVelocity(motor) == 0.
+
+def test_motion_params_limit_velocity(sim):
+    sim.setStepping(True)
+    motor = sim.getObject("/P0_ST/motor1")
+    sim.setJointTargetPosition(motor, 1.5, [0.25, 1., 1000.])
+    peak = 0.
+    for __ in range(400):
+        sim.step()
+        peak = max(peak, abs(sim.getJointVelocity(motor)))
+    assert peak <= 0.25 + 1e-9
+    assert peak == pytest.approx(0.25)
+
+def test_joints_stop_at_end_stops(sim):
+    sim.setStepping(True)
+    motor = sim.getObject("/P0_ST/motor2")
+    sim.setJointTargetPosition(motor, 5.)
+    for __ in range(400):
+        sim.step()
+    assert sim.getJointPosition(motor) == sim.upper[0, 2]
+
+def test_tip_follows_forward_kinematics(sim):
+    sim.setJointPosition(sim.getObject("/P0_ST/motor0"), 0.4)
+    sim.setJointPosition(sim.getObject("/P0_ST/motor2"), 0.3)
+    tip = sim.getObjectPosition(sim.getObject("/P0_ST/tip"))
+    assert tip == pytest.approx(sim.kinematics[0].fk(0.4, 0., 0.3))
+
+def test_scene_objects_and_scripts():
+    sim = OfflineSim(robots=("/P0_ST", "/P1_ST"))
+    assert sim.getObject("/P2_ST", {'noError': True}) == -1
+    with pytest.raises(Exception):
+        sim.getObject("/P2_ST")
+    aliases = [sim.getObjectAlias(handle) for handle in sim.getObjectsInTree(sim.handle_scene)]
+    assert aliases == ["P0_ST", "P1_ST"]
+    script = sim.createScript(sim.scripttype_customization, "")
+    motors = [sim.getObject("/P1_ST/motor" + str(joint)) for joint in range(3)]
+    tip, joints = sim.callScriptFunction('readState', script, motors, sim.getObject("/P1_ST/tip"))
+    assert joints == [0., 0., 0.]
+    sim.removeScript(script)
+    with pytest.raises(Exception):
+        sim.callScriptFunction('readState', script, motors, tip)
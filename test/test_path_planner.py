@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from path_planner import planPath, isPathFeasible, deadZoneRadius, samplePath
+from geometry import thetaStopCrossings
+
+def test_straight_line_when_feasible(robot):
+    path = planPath(robot, [0.5, 0.5, 1.], [0.6, 0.2, 1.2])
+    assert path.shape == (2, 3)
+
+def test_detour_stays_outside_dead_zone(robot):
+    start, target = [0.6, 0.2, 1.], [-0.6, 0.2, 1.]
+    assert not isPathFeasible(robot, [start, target])
+    path = planPath(robot, start, target)
+    assert len(path) > 2
+    points = samplePath(path)
+    assert np.all(np.hypot(points[:, 0], points[:, 1]) >= deadZoneRadius(robot))
+    assert path[0] == pytest.approx(start)
+    assert path[-1] == pytest.approx(target)
+
+def test_detour_avoids_theta_end_stop(robot):
+    # O lado mais curto passa por -y, onde theta cruza ±π
+    path = planPath(robot, [-0.6, -0.2, 1.], [0.6, -0.2, 1.])
+    joints, valid = robot.ikBatch(samplePath(path))
+    assert np.all(valid)
+    assert not np.any(thetaStopCrossings(joints))
+    assert np.all(path[1:-1, 1] > 0)
+
+def test_straight_line_across_theta_end_stop_is_replaced(robot):
+    start, target = [-1., -0.8, 1.], [0.7, -0.8, 1.]
+    assert not isPathFeasible(robot, [start, target])
+    path = planPath(robot, start, target)
+    assert isPathFeasible(robot, path)
+
+def test_executed_path_reaches_target(robot):
+    start, target = [-0.6, -0.2, 1.], [0.6, -0.2, 1.]
+    robot.setJointPosition(start)
+    robot.executeCartesianPath(target)
+    for __ in range(100):
+        robot.step()
+    assert robot.getCurrentPosition() == pytest.approx(target, abs=1e-3)
+
+def test_unreachable_endpoint_raises(robot):
+    with pytest.raises(ValueError):
+        planPath(robot, [0.6, 0.3, 1.], [0., 0., 1.])
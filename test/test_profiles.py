@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from profiles import PROFILES, BANG_BANG, CUBIC, QUINTIC, TrapezoidalProfile, SCurveProfile
+
+TAU = np.linspace(0., 1., 200001)
+
+@pytest.mark.parametrize("profile", list(PROFILES.values()) + [TrapezoidalProfile(0.2),
+                                                                 SCurveProfile(0.4, 0.5)],
+                         ids=lambda profile: profile.name)
+def test_profile_peaks(profile):
+    s, ds, dds = profile.normalized(TAU)
+    assert s[0] == pytest.approx(0., abs=1e-12)
+    assert s[-1] == pytest.approx(1., abs=1e-12)
+    assert np.max(np.abs(ds)) == pytest.approx(profile.peakVel, rel=1e-4)
+    assert np.max(np.abs(dds)) == pytest.approx(profile.peakAcc, rel=1e-4)
+    # Derivadas analíticas coerentes com a posição
+    assert np.allclose(np.gradient(s, TAU), ds, atol=1e-3)
+    if np.isfinite(profile.peakJerk):
+        jerk = np.gradient(dds, TAU)
+        assert np.max(np.abs(jerk)) == pytest.approx(profile.peakJerk, rel=1e-2)
+
+@pytest.mark.parametrize("profile", PROFILES.values(), ids=lambda profile: profile.name)
+def test_profile_scales_with_duration(profile):
+    duration = 2.5
+    time = TAU * duration
+    assert np.max(np.abs(profile.velocity(time, duration))) == pytest.approx(
+        profile.peakVel / duration, rel=1e-4)
+    assert np.max(np.abs(profile.acceleration(time, duration))) == pytest.approx(
+        profile.peakAcc / duration**2, rel=1e-4)
+
+@pytest.mark.parametrize("profile", [CUBIC, QUINTIC], ids=lambda profile: profile.name)
+def test_move_refuses_profiles_that_are_not_time_optimal(robot, profile):
+    with pytest.raises(ValueError):
+        robot.cartesianTrajectoryMove(-0.3, 0.6, 1.4, 8., profile)
+
+# O controlador da junta move no tempo mínimo sob os picos enviados, que para
+# perfis de tempo mínimo é a própria duração pedida
+@pytest.mark.parametrize("profile", [BANG_BANG, TrapezoidalProfile(0.25)],
+                         ids=lambda profile: profile.name)
+def test_move_settles_in_requested_duration(robot, profile):
+    target = [-0.3, 0.6, 1.4]
+    robot.setJointPosition([0.5, 0.5, 1.])
+    robot.cartesianTrajectoryMove(*target, 8., profile)
+    start = robot.sim.getSimulationTime()
+    while np.linalg.norm(np.subtract(robot.getCurrentPosition(), target)) > 1e-6:
+        robot.step()
+        assert robot.sim.getSimulationTime() - start < 10.
+    assert robot.sim.getSimulationTime() - start == pytest.approx(8., rel=0.05)
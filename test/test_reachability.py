@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from reachability import ReachabilityIndex
+
+VOXEL_SIZE = 0.05
+
+@pytest.fixture
+def index(robot):
+    return ReachabilityIndex.build(robot, VOXEL_SIZE)
+
+def test_reachable_points_are_marked(robot, index):
+    rng = np.random.default_rng(0)
+    joints = rng.uniform(robot.geometry.lo, robot.geometry.hi, size=(2000, 3))
+    points = robot.fkBatch(joints)
+    assert np.all(index.areReachable(points))
+    assert all(index.isReachable(*point) for point in points[:100].tolist())
+
+def test_far_and_central_points_are_not_reachable(robot, index):
+    radius = robot.geometry.deadZoneRadius
+    # Eixo central (longe da borda da zona morta) e fora da grade
+    points = [[0., 0., 1.], [0., 0., 5.], [10., 0., 1.], [-10., -10., -10.]]
+    assert not np.any(index.areReachable(points))
+    assert not index.isReachable(radius / 4, 0., 1.)
+    assert not index.isSegmentReachable([0.8, 0., 1.], [-0.8, 0., 1.])
+    assert index.isPathReachable([[0.8, 0., 1.], [0., 0.8, 1.], [-0.8, 0., 1.]])
+
+def test_save_and_load_round_trip(robot, index, tmp_path):
+    path = tmp_path / "reachability.idx"
+    index.save(path)
+    loaded = ReachabilityIndex.load(path, robot)
+    assert np.array_equal(loaded.grid, index.grid)
+    assert np.array_equal(loaded.origin, index.origin)
+    assert loaded.voxelSize == index.voxelSize
+    robot.a2 = 0.2
+    with pytest.raises(ValueError):
+        ReachabilityIndex.load(path, robot)
+
+def test_load_or_build_rebuilds_for_other_geometry(robot, index, tmp_path):
+    path = tmp_path / "reachability.idx"
+    index.save(path)
+    assert np.array_equal(ReachabilityIndex.loadOrBuild(path, robot, VOXEL_SIZE).grid, index.grid)
+    robot.a2 = 0.2
+    rebuilt = ReachabilityIndex.loadOrBuild(path, robot, VOXEL_SIZE)
+    assert np.array_equal(ReachabilityIndex.load(path, robot).grid, rebuilt.grid)
@@ -0,0 +1,56 @@
+import os
+import numpy as np
+import pytest
+
+from telemetry import TelemetryRecorder, loadTelemetry
+
+COLUMNS = {'time': ((), np.float64), 'jointPos': ((3,), np.float64), 'tick': ((), np.int32)}
+
+def record(path, count, bufferSize=8):
+    recorder = TelemetryRecorder(path, COLUMNS, bufferSize)
+    for tick in range(count):
+        recorder.append(time=tick * 0.01, jointPos=[tick, 2 * tick, 3 * tick], tick=tick)
+    return recorder
+
+def test_round_trip_across_buffer_wraps(tmp_path):
+    with record(tmp_path, 29) as recorder:
+        assert len(recorder) == 29
+        assert recorder.recent('tick', 3).tolist() == [26, 27, 28]
+    data = loadTelemetry(tmp_path)
+    assert data['tick'].tolist() == list(range(29))
+    assert data['time'] == pytest.approx(np.arange(29) * 0.01)
+    assert np.array_equal(data['jointPos'], np.arange(29)[:, None] * [1, 2, 3])
+
+def test_flushed_samples_are_readable_before_close(tmp_path):
+    recorder = record(tmp_path, 20)
+    # Buffer de 8 amostras: as 16 primeiras já foram descarregadas
+    assert len(loadTelemetry(tmp_path)['tick']) == 16
+    recorder.flush()
+    assert len(loadTelemetry(tmp_path)['tick']) == 20
+    recorder.close()
+
+def test_truncated_trailing_row_is_dropped(tmp_path):
+    record(tmp_path, 10).close()
+    # Execução interrompida no meio da escrita da última linha
+    with open(os.path.join(tmp_path, "jointPos.bin"), 'r+b') as file:
+        file.truncate(9 * 3 * 8 + 5)
+    data = loadTelemetry(tmp_path)
+    assert all(len(column) == 9 for column in data.values())
+    assert data['tick'].tolist() == list(range(9))
+    assert np.array_equal(data['jointPos'][-1], [8, 16, 24])
+
+def test_empty_recording(tmp_path):
+    TelemetryRecorder(tmp_path, COLUMNS).close()
+    data = loadTelemetry(tmp_path)
+    assert data['jointPos'].shape == (0, 3)
+
+def test_executed_plan_is_recorded(robot, tmp_path):
+    robot.setJointPosition([0.5, 0.5, 1.])
+    with TelemetryRecorder(tmp_path) as recorder:
+        times, tipPos, __, __, __, jointPos = robot.executeCartesianTrajectory(
+            [0.6, 0.3, 1.2], controlRate=100., recorder=recorder)
+    data = loadTelemetry(tmp_path)
+    assert data['time'].tolist() == times
+    assert np.array_equal(data['tipPos'], tipPos)
+    assert np.array_equal(data['jointPos'], jointPos)
+    assert data['desiredPos'][-1] == pytest.approx([0.6, 0.3, 1.2])
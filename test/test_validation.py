@@ -0,0 +1,113 @@
+import asyncio
+import numpy as np
+import pytest
+
+from trajectory import planCartesianTrajectory
+from timing import minimumCartesianDuration
+from validation import REJECT, CLAMP, RESCALE, validateTrajectory, enforcePlanLimits
+from profiles import BANG_BANG
+from offline_sim import OfflineSim
+from fleet import RobotFleet
+from async_robot import AsyncCylindricRobot
+
+START = [-0.75, -0.25, 0.75]
+TARGET = [-0.25, 0.75, 1.75]
+
+def minimumPlan(robot, factor=1.):
+    duration = minimumCartesianDuration(robot, START, TARGET, BANG_BANG)
+    return planCartesianTrajectory(robot, START, TARGET, duration * factor, 200., BANG_BANG)
+
+# Plano que leva d2 além do fim de curso (z acima do alcance)
+def outOfRangePlan(robot):
+    return planCartesianTrajectory(robot, START, [-0.25, 0.75, 2.5], 20., 200., BANG_BANG)
+
+def test_minimum_duration_plan_is_valid(robot):
+    plan = minimumPlan(robot)
+    report = validateTrajectory(robot, plan.times, plan.joints)
+    assert report['valid']
+    assert enforcePlanLimits(robot, plan) is plan
+
+def test_reject_stops_before_sending(robot):
+    robot.setJointPosition(START)
+    before = robot.getCurrentJointPostions()
+    for plan in (minimumPlan(robot, 0.5), outOfRangePlan(robot)):
+        with pytest.raises(ValueError):
+            robot.executePlan(plan)
+        assert robot.getCurrentJointPostions() == before
+        assert robot.io.ticks == 0
+
+def test_rescale_stretches_time(robot):
+    fast = minimumPlan(robot, 0.5)
+    plan = enforcePlanLimits(robot, fast, RESCALE)
+    assert plan.duration == pytest.approx(2 * fast.duration, rel=1e-2)
+    assert np.array_equal(plan.joints, fast.joints)
+    assert validateTrajectory(robot, plan.times, plan.joints)['dynamicValid']
+    with pytest.raises(ValueError):
+        enforcePlanLimits(robot, outOfRangePlan(robot), RESCALE)
+
+def test_clamp_limits_positions(robot):
+    plan = enforcePlanLimits(robot, outOfRangePlan(robot), CLAMP)
+    assert np.all(plan.joints <= robot.geometry.hi)
+    assert np.all(plan.joints >= robot.geometry.lo)
+    assert plan.cartesian[-1] == pytest.approx(robot.fk(*plan.joints[-1]))
+    with pytest.raises(ValueError):
+        enforcePlanLimits(robot, minimumPlan(robot, 0.5), CLAMP)
+
+def test_robot_policies_on_single_targets(robot):
+    with pytest.raises(ValueError):
+        robot.jointMove(0., 3., 0.)
+    robot.limitPolicy = CLAMP
+    robot.setJointPosition([-0.25, 0.75, 2.5])
+    assert robot.getCurrentJointPostions()[1] == pytest.approx(robot.geometry.hi[1])
+    robot.limitPolicy = REJECT
+    with pytest.raises(ValueError):
+        robot.cartesianTrajectoryMove(*START, duration=0.1)
+    robot.limitPolicy = RESCALE
+    robot.cartesianTrajectoryMove(*START, duration=0.1)
+
+def test_executed_rescaled_plan_reaches_target(robot):
+    robot.setJointPosition(START)
+    robot.limitPolicy = RESCALE
+    results = robot.executeCartesianTrajectory(TARGET, minimumPlan(robot).duration / 2, controlRate=200.)
+    assert results[0][-1] > minimumPlan(robot).duration * 0.99
+    for __ in range(100):
+        robot.step()
+    assert robot.getCurrentPosition() == pytest.approx(TARGET, abs=1e-3)
+
+def test_fleet_rejects_before_sending():
+    sim = OfflineSim(robots=("/P0_ST", "/P1_ST"))
+    sim.startSimulation()
+    fleet = RobotFleet(sim, stepping=True)
+    plans = [minimumPlan(fleet.robots[0]), outOfRangePlan(fleet.robots[1])]
+    with pytest.raises(ValueError):
+        fleet.executePlans(plans)
+    assert sim.getSimulationTime() == 0.
+    assert fleet.io.ticks == 0
+    fleet.close()
+
+def test_async_rejects_before_first_sample(robot):
+    samples = []
+
+    async def run():
+        async with AsyncCylindricRobot(robot) as asyncRobot:
+            async for sample in asyncRobot.execute(outOfRangePlan(robot)):
+                samples.append(sample)
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
+    assert samples == []
+    assert robot.io.ticks == 0
+
+@pytest.mark.parametrize("policy", [REJECT, CLAMP, RESCALE])
+def test_theta_end_stop_crossing_rejected_by_every_policy(robot, policy):
+    # A reta por -y leva theta de um lado do fim de curso (±π) ao outro
+    plan = planCartesianTrajectory(robot, [-1., -0.8, 1.], [0.7, -0.8, 1.], 10., 200., BANG_BANG)
+    report = validateTrajectory(robot, plan.times, plan.joints)
+    assert not report['positionValid']
+    assert np.any(report['crossings'])
+    with pytest.raises(ValueError, match="fim de curso"):
+        enforcePlanLimits(robot, plan, policy)
+
+def test_minimum_duration_rejects_theta_end_stop_crossing(robot):
+    with pytest.raises(ValueError):
+        minimumCartesianDuration(robot, [-1., -0.8, 1.], [0.7, -0.8, 1.])
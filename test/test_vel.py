@@ -1,26 +1,33 @@
-import pickle
+import os
+import sys
 import matplotlib.pyplot as plt
 import numpy as np
 
-f = open('data.pkl', 'rb')
-trajTime, eefPos, eefVel, desiredVel, velTime, jointsPos = pickle.load(f)
-f.close()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from telemetry import loadTelemetry
+from analysis import windowedDifference, trackingError
 
-toolVelocity = [[0,0,0]]
-start = 10
+# Distância, em amostras, entre as leituras usadas na diferença
+WINDOW = 10
 
-for i in range(start, len(eefPos)):
-    vel = [( cur - last) / (trajTime[i] - trajTime[i - start]) for cur, last in zip(eefPos[i], eefPos[i-start])]
-    toolVelocity.append(vel)
-toolVelocity.append([0,0,0])
+# Telemetria gravada por main.py, lida direto do disco com np.memmap
+data = loadTelemetry('telemetry')
+eefPos = data['tipPos']
+desiredVel = data['desiredVel']
+velTime = data['time']
 
-timeList = trajTime[int(start/2):len(trajTime) - int(start/2)]
-timeList.insert(0, 0)
-timeList.append(13)
+# Velocidade medida no centro de cada janela, com o robô parado no início e no fim
+centers, measured = windowedDifference(eefPos, velTime, WINDOW)
+timeList = np.concatenate([[0.], centers, [velTime[-1]]])
+zero = np.zeros((1, 3))
+vel = np.vstack([zero, measured, zero])
+
+error = trackingError(velTime, desiredVel, timeList, vel)
+print("Erro de velocidade RMS: ", error['rms'])
+print("Erro de velocidade máximo: ", error['maxAbs'])
 
 __, axis = plt.subplots(3, 1)
-vel = np.array(toolVelocity)
-dVel = np.array(desiredVel)
+dVel = np.asarray(desiredVel)
 
 axis[0].plot(timeList, vel[:, 0], label='Medida')
 axis[0].plot(velTime, dVel[:, 0], label='Enviada')